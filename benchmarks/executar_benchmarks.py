@@ -0,0 +1,227 @@
+"""
+Benchmark de ponta a ponta: extração de áudio, carregamento do modelo e transcrição.
+
+Gera um corpus determinístico com o FFmpeg (lavfi), mede cada etapa
+separadamente com o modelo 'tiny' na CPU e grava os resultados em JSON
+dentro de 'benchmarks/resultados/', para comparar execuções entre commits.
+Os eventos das métricas (src/metricas.py) emitidos durante o benchmark vão
+para um arquivo '.metricas.jsonl' ao lado dos resultados, fora do log usado
+nas estimativas de tempo das execuções normais.
+
+Uso:
+    python benchmarks/executar_benchmarks.py
+    python benchmarks/executar_benchmarks.py --comparar benchmarks/resultados/<anterior>.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PASTA_PROJETO = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PASTA_PROJETO))
+
+from src import armazenamento_temp  # noqa: E402
+from src import extract_audio  # noqa: E402
+from src import metricas  # noqa: E402
+from src import transcriber  # noqa: E402
+
+
+MODELO_BENCHMARK = "tiny"
+
+PASTA_RESULTADOS = PASTA_PROJETO / "benchmarks" / "resultados"
+
+# (nome, duração em segundos, contêiner, codec de áudio)
+CORPUS = (
+    ("curto_aac", 15, "mp4", "aac"),
+    ("medio_mp3", 60, "mkv", "libmp3lame"),
+    ("longo_opus", 180, "webm", "libopus"),
+)
+
+
+def obter_commit():
+    # Identifica o commit atual para associar os resultados
+    try:
+        resultado = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=PASTA_PROJETO, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return resultado.stdout.strip() or None
+
+
+def gerar_clipe(pasta, nome, duracao, conteiner, codec):
+    """
+    Sintetiza um vídeo com tom + ruído de semente fixa e um fluxo de
+    vídeo de teste, sempre com o mesmo conteúdo para a mesma configuração.
+    """
+    caminho = Path(pasta) / f"{nome}.{conteiner}"
+    codec_video = "libvpx" if conteiner == "webm" else "mpeg4"
+    comando = [
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=size=160x120:rate=5:duration={duracao}",
+        "-f", "lavfi", "-i", f"sine=frequency=220:duration={duracao}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:seed=42:amplitude=0.05:duration={duracao}",
+        "-filter_complex", "[1:a][2:a]amix=inputs=2[a]",
+        "-map", "0:v", "-map", "[a]",
+        "-c:v", codec_video, "-c:a", codec,
+        "-ar", "48000", "-ac", "2",
+        "-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact",
+        str(caminho)
+    ]
+    resultado = subprocess.run(comando, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        return None
+    return caminho
+
+
+def medir_clipe(modelo, caminho_video, pasta_audio):
+    # Mede extração e transcrição de um clipe do corpus; o pico de memória é o do próprio
+    # clipe (amostrado por medir_etapa), e não o máximo desde o início do processo
+    caminho_audio = Path(pasta_audio) / f"{caminho_video.stem}.{armazenamento_temp.obter_formato()}"
+
+    with metricas.medir_etapa("benchmark_clipe", caminho_video.name) as dados:
+        tempo_inicio = time.perf_counter()
+        sucesso = extract_audio.extrair_audio(caminho_video, caminho_audio)
+        tempo_extracao = time.perf_counter() - tempo_inicio
+        if not sucesso:
+            dados["sucesso"] = False
+            return None
+
+        audio = extract_audio.carregar_audio_extraido(caminho_audio)
+        duracao_audio = len(audio) / extract_audio.AUDIO_SAMPLE_RATE
+
+        tempo_inicio = time.perf_counter()
+        modelo.transcribe(audio, verbose=None, **transcriber.obter_parametros_decodificacao())
+        tempo_transcricao = time.perf_counter() - tempo_inicio
+        del audio
+
+    return {
+        "duracao_audio": duracao_audio,
+        "tempo_extracao": tempo_extracao,
+        "tempo_transcricao": tempo_transcricao,
+        "fator_tempo_real": tempo_transcricao / duracao_audio,
+        "fator_tempo_real_extracao": tempo_extracao / duracao_audio,
+        "pico_memoria_mb": dados.get("pico_memoria_mb"),
+    }
+
+
+def executar():
+    """
+    Executa o benchmark completo e retorna o dicionário de resultados.
+    """
+    import torch
+
+    transcriber.MODEL_SIZE = MODELO_BENCHMARK
+    resultados = {
+        "commit": obter_commit(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "threads_torch": torch.get_num_threads(),
+        "modelo": MODELO_BENCHMARK,
+        "clipes": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_transcritor_") as pasta:
+        print("🎬 Gerando corpus sintético...")
+        clipes = []
+        for nome, duracao, conteiner, codec in CORPUS:
+            caminho = gerar_clipe(pasta, nome, duracao, conteiner, codec)
+            if caminho is None:
+                print(f"   ⚠️  {nome}: codec '{codec}' indisponível neste FFmpeg, ignorado")
+                continue
+            clipes.append((nome, codec, caminho))
+
+        print("🤖 Carregando modelo...")
+        transcriber.limpar_modelo()
+        with metricas.medir_etapa("benchmark_modelo", modelo=MODELO_BENCHMARK) as dados:
+            tempo_inicio = time.perf_counter()
+            modelo = transcriber.carregar_modelo()
+            resultados["tempo_carregamento_modelo"] = time.perf_counter() - tempo_inicio
+        resultados["pico_memoria_carregamento_mb"] = dados.get("pico_memoria_mb")
+
+        for nome, codec, caminho in clipes:
+            print(f"⏱️  {nome}...")
+            medidas = medir_clipe(modelo, caminho, pasta)
+            if medidas is None:
+                print(f"   ❌ Falha na extração de {nome}")
+                continue
+            medidas["codec"] = codec
+            resultados["clipes"][nome] = medidas
+            print(f"   extração {medidas['tempo_extracao']:.2f}s | "
+                  f"transcrição {medidas['tempo_transcricao']:.2f}s | "
+                  f"RTF {medidas['fator_tempo_real']:.3f}")
+
+    duracao_total = sum(c["duracao_audio"] for c in resultados["clipes"].values())
+    tempo_total = sum(c["tempo_extracao"] + c["tempo_transcricao"] for c in resultados["clipes"].values())
+    resultados["duracao_audio_total"] = duracao_total
+    resultados["vazao_audio_por_segundo"] = duracao_total / tempo_total if tempo_total > 0 else None
+    picos = [resultados["pico_memoria_carregamento_mb"]]
+    picos.extend(c["pico_memoria_mb"] for c in resultados["clipes"].values())
+    picos = [pico for pico in picos if pico is not None]
+    resultados["pico_memoria_mb"] = max(picos) if picos else None
+    return resultados
+
+
+def obter_prefixo_resultados():
+    # Caminho base dos arquivos desta execução: 'benchmarks/resultados/<data>_<commit>'
+    PASTA_RESULTADOS.mkdir(parents=True, exist_ok=True)
+    carimbo = time.strftime("%Y%m%d-%H%M%S")
+    return PASTA_RESULTADOS / f"{carimbo}_{obter_commit() or 'sem-commit'}"
+
+
+def gravar_resultados(resultados, prefixo):
+    # Grava em '<prefixo>.json'
+    caminho = prefixo.with_name(f"{prefixo.name}.json")
+    caminho.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    return caminho
+
+
+def comparar(atual, anterior):
+    """
+    Mostra a variação percentual de cada medida de tempo em relação a
+    uma execução anterior (valores positivos = mais lento).
+    """
+    print(f"\n📊 Comparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    pares = [("carregamento do modelo", atual.get("tempo_carregamento_modelo"),
+              anterior.get("tempo_carregamento_modelo"))]
+    for nome, medidas in atual["clipes"].items():
+        medidas_anteriores = anterior.get("clipes", {}).get(nome)
+        if medidas_anteriores is None:
+            continue
+        for chave in ("tempo_extracao", "tempo_transcricao"):
+            pares.append((f"{nome} {chave}", medidas[chave], medidas_anteriores[chave]))
+    for rotulo, valor, valor_anterior in pares:
+        if not valor or not valor_anterior:
+            continue
+        variacao = (valor - valor_anterior) / valor_anterior
+        print(f"   {rotulo}: {valor_anterior:.2f}s → {valor:.2f}s ({variacao:+.1%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do Transcritor")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultado anterior para comparação")
+    argumentos = parser.parse_args(argv)
+
+    prefixo = obter_prefixo_resultados()
+    # As etapas medidas aqui não entram no histórico usado nas estimativas (indice_midias)
+    metricas.METRICAS_ARQUIVO = str(prefixo.with_name(f"{prefixo.name}.metricas.jsonl"))
+    resultados = executar()
+    caminho = gravar_resultados(resultados, prefixo)
+    print(f"\n💾 Resultados salvos em: {caminho.relative_to(PASTA_PROJETO)}")
+
+    if argumentos.comparar:
+        anterior = json.loads(Path(argumentos.comparar).read_text(encoding="utf-8"))
+        comparar(resultados, anterior)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
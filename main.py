@@ -1,11 +1,27 @@
+import argparse
 import sys
 import time
 from pathlib import Path
+from src import cache_mel
+from src import calibracao
+from src import cascata
 from src import cleanup
+from src import daemon
+from src import decodificacao_lote
 from src import extract_audio
+from src import fallback
+from src import fila_tarefas
+from src import formatos_saida
+from src import indice_midias
 from src import list_videos
+from src import metricas
+from src import pipeline
+from src import precarregamento
+from src import quantizacao
 from src import startup_checks
 from src import transcriber
+from src import vad
+from src import workers
 from src.utils import plural, confirmar_acao, exibir_cabecalho, formatar_duracao
 from src.list_videos import analisar_status_videos, confirmar_processamento_inteligente
 
@@ -26,7 +42,42 @@ def processar_video_individual(nome_base):
     return transcriber.transcrever_video(nome_base)
 
 
-def processar_todos_videos():
+def _tipo_formatos(texto):
+    # Converte "--formatos srt,json" em uma tupla válida ou em erro do argparse
+    try:
+        return formatos_saida.analisar_formatos(texto)
+    except ValueError as erro:
+        raise argparse.ArgumentTypeError(str(erro))
+
+
+def analisar_argumentos(argv=None):
+    # Lê as opções de linha de comando (todas opcionais; o padrão é o modo interativo)
+    parser = argparse.ArgumentParser(description="Transcrição de vídeos com Whisper")
+    parser.add_argument(
+        "--workers", type=int, default=None, metavar="N",
+        help="Número de processos de transcrição em paralelo, cada um com seu próprio modelo "
+             "(padrão: o valor calibrado com --calibrar, ou 1)"
+    )
+    parser.add_argument(
+        "--calibrar", action="store_true",
+        help="Mede threads, processos e afinidade de CPU mais rápidos nesta máquina, grava em 'models/' e encerra"
+    )
+    parser.add_argument(
+        "--comparar-quantizacao", metavar="CLIPE",
+        help="Compara o modelo fp32 com o int8 (tempo, memória e diferença no texto) em um clipe e encerra"
+    )
+    parser.add_argument(
+        "--formatos", type=_tipo_formatos, metavar="LISTA",
+        help="Formatos gravados em 'transcripts/', separados por vírgula: txt, srt, vtt, json (o .txt é sempre gerado)"
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="Observa a pasta 'videos/' e transcreve cada vídeo novo assim que a cópia termina (sem perguntas)"
+    )
+    return parser.parse_args(argv)
+
+
+def processar_todos_videos(num_workers=1):
     # Busca todos os vídeos na pasta 'videos/' e decide quais processar
     nomes_videos = list_videos.obter_nomes_videos()
     if not nomes_videos:
@@ -34,10 +85,39 @@ def processar_todos_videos():
         return 0, 0, False
     total_videos = len(nomes_videos)
     print(f"\n🎬 Total de vídeos encontrados: {total_videos} {plural(total_videos, 'Vídeo', 'Vídeos')}\n")
+    # Consulta o ffprobe (em paralelo, com cache) e descarta o que o FFmpeg não conseguiria processar
+    nomes_videos, rejeitados, infos_midias = indice_midias.separar_processaveis(nomes_videos)
+    if rejeitados:
+        print(f"🚫 {plural(len(rejeitados), 'Vídeo ignorado', 'Vídeos ignorados')} ({len(rejeitados)}):")
+        for nome, motivo in rejeitados:
+            print(f"   • {nome}: {motivo}")
+        print()
+    if not nomes_videos:
+        return 0, 0, False
+    # Fila persistente: recupera vídeos de uma execução interrompida e esquece os que sumiram
+    fila_tarefas.recuperar_interrompidas()
+    fila_tarefas.descartar_ausentes(nomes_videos)
+    retomados = fila_tarefas.listar_pendentes()
     # Separa vídeos que já têm transcrição daqueles que não têm
-    nao_transcritos, ja_transcritos = analisar_status_videos(nomes_videos)
+    nao_transcritos, ja_transcritos, reaproveitados = analisar_status_videos(nomes_videos)
+    if retomados:
+        # Pendentes da execução anterior (inclusive reprocessamentos) entram como não transcritos
+        print(f"🔁 {plural(len(retomados), 'Vídeo pendente', 'Vídeos pendentes')} da execução anterior "
+              f"({len(retomados)}) {plural(len(retomados), 'será retomado', 'serão retomados')}\n")
+        pendentes = set(retomados) | set(nao_transcritos)
+        ja_transcritos = [nome for nome in ja_transcritos if nome not in pendentes]
+        nao_transcritos = [nome for nome in nomes_videos if nome in pendentes]
+    # Mostra o total de áudio e a estimativa de tempo antes da confirmação
+    indice_midias.exibir_estimativa(nao_transcritos, infos_midias, transcriber.MODEL_SIZE, num_workers)
+    if nao_transcritos and ja_transcritos:
+        indice_midias.exibir_estimativa(nomes_videos, infos_midias, transcriber.MODEL_SIZE, num_workers,
+                                        rotulo="Áudio total (reprocessando todos)")
     # Pergunta ao usuário como proceder (apenas novos / todos / cancelar)
     incluir_nao_transcritos, incluir_ja_transcritos = confirmar_processamento_inteligente(nao_transcritos, ja_transcritos)
+    if not incluir_ja_transcritos:
+        # Vídeos já transcritos que não serão reprocessados: só depois da resposta são copiadas
+        # as transcrições de vídeos renomeados e gerados os formatos que faltam
+        list_videos.completar_ja_transcritos(ja_transcritos, reaproveitados)
     if not incluir_nao_transcritos and not incluir_ja_transcritos:
         return 0, 0, True
     lista_para_transcrever = []
@@ -45,30 +125,45 @@ def processar_todos_videos():
         lista_para_transcrever.extend(nao_transcritos)
     if incluir_ja_transcritos:
         lista_para_transcrever.extend(ja_transcritos)
-    # Executa o processamento em sequência e acumula estatísticas
-    sucessos = 0
+    # Grava a seleção na fila persistente: vídeos novos antes de reprocessamentos
+    # e, no modo --workers, do mais longo para o mais curto
+    ordem = lista_para_transcrever
+    if num_workers > 1:
+        ordem = [nome for nome, _ in workers.ordenar_por_duracao(lista_para_transcrever)]
+    novos = set(nao_transcritos)
+    fila_tarefas.enfileirar([nome for nome in ordem if nome in novos], fila_tarefas.FILA_PRIORIDADE_NOVOS)
+    fila_tarefas.enfileirar([nome for nome in ordem if nome not in novos])
+    # Executa o processamento sobrepondo extração e transcrição,
+    # ou distribui os vídeos entre vários processos no modo --workers
     tempo_inicio = time.time()
     hora_inicio = time.strftime("%H:%M:%S", time.localtime(tempo_inicio))
     dia_inicio = time.strftime("%d/%m/%Y", time.localtime(tempo_inicio))
-    for i, nome_base in enumerate(lista_para_transcrever, 1):
-        exibir_cabecalho(f"🔄 VÍDEO {i}/{len(lista_para_transcrever)} - {nome_base}")
-        try:
-            sucesso = processar_video_individual(nome_base)
-            if sucesso:
-                sucessos += 1
-            else:
-                break
-        except KeyboardInterrupt:
-            # Permite que o usuário cancele todo o processo via Ctrl+C
-            raise
-        except Exception:
-            # Propaga exceções inesperadas para diagnóstico
-            raise
+    # Processos de transcrição já criados pelo pré-carregamento, se houver
+    grupo = precarregamento.retirar_grupo()
+    try:
+        if num_workers > 1:
+            sucessos, estatisticas = workers.processar_em_paralelo(num_workers, grupo)
+        else:
+            sucessos, estatisticas = pipeline.executar_pipeline(grupo)
+    except KeyboardInterrupt:
+        # Permite que o usuário cancele todo o processo via Ctrl+C
+        raise
+    except Exception:
+        # Propaga exceções inesperadas para diagnóstico
+        raise
     tempo_fim = time.time()
     hora_fim = time.strftime("%H:%M:%S", time.localtime(tempo_fim))
     dia_fim = time.strftime("%d/%m/%Y", time.localtime(tempo_fim))
     tempo_total = time.time() - tempo_inicio
     tempo_formatado = formatar_duracao(tempo_total)
+    metricas.registrar_evento(
+        "lote",
+        videos=len(lista_para_transcrever),
+        sucessos=sucessos,
+        falhas=len(estatisticas["falhas"]),
+        workers=num_workers,
+        tempo_parede=round(tempo_total, 4)
+    )
     # Exibe relatório final com tempo e arquivos salvos
     exibir_cabecalho("📊 RELATÓRIO FINAL")
     if dia_inicio == dia_fim:
@@ -76,6 +171,15 @@ def processar_todos_videos():
     else:
         print(f"\n📅 Início: {hora_inicio} {dia_inicio} | Fim: {hora_fim} {dia_fim}")
     print(f"🕒 Tempo total: {tempo_formatado}")
+    if num_workers > 1:
+        workers.exibir_relatorio_workers(estatisticas)
+    else:
+        pipeline.exibir_relatorio_sobreposicao(estatisticas)
+    vad.exibir_relatorio_vad()
+    fallback.exibir_relatorio_fallback()
+    cascata.exibir_relatorio_cascata(transcriber.MODEL_SIZE)
+    decodificacao_lote.exibir_relatorio_lote(transcriber.MODEL_SIZE)
+    cache_mel.exibir_relatorio_mel()
     pasta_transcripts = obter_pasta_projeto() / "transcripts"
     arquivos_salvos = []
     for nome in lista_para_transcrever:
@@ -94,17 +198,38 @@ def processar_todos_videos():
         for filename in arquivos_salvos:
             print(f"   📄 {filename}")
 
+    falhas = estatisticas["falhas"]
+    if falhas:
+        print(f"\n❌ {len(falhas)} {plural(len(falhas), 'vídeo com falha', 'vídeos com falha')}:")
+        for nome, motivo in falhas:
+            print(f"   🎬 {nome}: {motivo}")
+
     return len(lista_para_transcrever), transcricoes_concluidas, False
 
 
-def main():
+def main(argv=None):
     try:               
         # Ponto de entrada principal: exibe cabeçalho, checa pré-requisitos
         exibir_cabecalho()
         
         if not verificar_prerequisitos():
             return False
-        total, sucessos, cancelado = processar_todos_videos()
+        argumentos = analisar_argumentos(argv)
+        if argumentos.formatos:
+            formatos_saida.FORMATOS_SAIDA = argumentos.formatos
+        if argumentos.comparar_quantizacao:
+            return quantizacao.comparar_quantizacao(argumentos.comparar_quantizacao) is not None
+        if argumentos.calibrar:
+            return calibracao.calibrar() is not None
+        if argumentos.daemon:
+            return daemon.executar_daemon()
+        num_workers = argumentos.workers
+        if num_workers is None:
+            calibrada = calibracao.obter_calibracao()
+            num_workers = calibrada["workers"] if calibrada is not None else 1
+        # O modelo carrega em segundo plano enquanto os vídeos são listados e o usuário responde
+        precarregamento.iniciar(num_workers)
+        total, sucessos, cancelado = processar_todos_videos(num_workers)
 
         if cancelado:
             raise KeyboardInterrupt()
@@ -127,6 +252,7 @@ def main():
     except Exception:
         raise
     finally:
+        precarregamento.cancelar()
         transcriber.limpar_modelo()
         cleanup.limpar_temp_audios()
         cleanup.limpar_pycache()
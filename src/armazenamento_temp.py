@@ -0,0 +1,229 @@
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from src import checkpoints
+
+
+# -------------------------------
+# Configurações do armazenamento temporário dos áudios extraídos
+# -------------------------------
+ARMAZENAMENTO_PASTA = None  # Pasta dos áudios extraídos; None usa 'temp_audios/' (ex.: "/dev/shm/transcricoes")
+
+ARMAZENAMENTO_FORMATO = "wav"  # "wav" (PCM 16-bit) ou "flac" (sem perdas, cerca de metade do tamanho)
+
+ARMAZENAMENTO_LIMITE_BYTES = 2 * 1024 ** 3  # Bytes máximos de áudio extraído aguardando transcrição, em disco ou memória (None = sem limite)
+
+ARMAZENAMENTO_ESPACO_LIVRE_MINIMO = 512 * 1024 ** 2  # Espaço livre mantido no disco da pasta
+
+ARMAZENAMENTO_ESPERA_MAXIMA = 1800  # Segundos aguardando espaço antes de extrair mesmo assim
+
+FORMATOS_SUPORTADOS = ("wav", "flac")
+
+# Bytes por segundo de áudio mono 16 kHz em cada formato (FLAC é estimado)
+_BYTES_POR_SEGUNDO = {"wav": 32000, "flac": 18000}
+
+_INTERVALO_VERIFICACAO = 0.5
+
+# Bytes reservados por extrações em andamento neste processo
+_reservado = 0
+_condicao = threading.Condition()
+
+# Bytes de áudios extraídos em memória (AUDIO_EM_MEMORIA) aguardando transcrição neste processo
+_em_memoria = 0
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_pasta_padrao():
+    """
+    Retorna a pasta 'temp_audios/' do projeto.
+    """
+    return obter_pasta_projeto() / "temp_audios"
+
+
+def obter_pasta_temp():
+    """
+    Retorna (criando, se preciso) a pasta onde os áudios extraídos são
+    gravados. Se ARMAZENAMENTO_PASTA não puder ser criada (ex.: /dev/shm
+    fora do Linux), usa 'temp_audios/'.
+    """
+    if ARMAZENAMENTO_PASTA:
+        pasta = Path(ARMAZENAMENTO_PASTA).expanduser()
+        try:
+            pasta.mkdir(parents=True, exist_ok=True)
+            return pasta
+        except OSError:
+            pass
+    pasta = obter_pasta_padrao()
+    pasta.mkdir(parents=True, exist_ok=True)
+    return pasta
+
+
+def obter_formato():
+    """
+    Retorna o formato configurado para os áudios extraídos.
+
+    Lança ValueError se ARMAZENAMENTO_FORMATO não for suportado.
+    """
+    if ARMAZENAMENTO_FORMATO not in FORMATOS_SUPORTADOS:
+        raise ValueError(f"formato de áudio temporário não suportado: {ARMAZENAMENTO_FORMATO} "
+                         f"(use {', '.join(FORMATOS_SUPORTADOS)})")
+    return ARMAZENAMENTO_FORMATO
+
+
+def obter_caminho_audio(nome_video):
+    """
+    Retorna o caminho do áudio extraído de 'videos/{nome_video}'.
+    """
+    return obter_pasta_temp() / f"{Path(nome_video).stem}.{obter_formato()}"
+
+
+def estimar_bytes(duracao):
+    """
+    Estima o tamanho (bytes) do áudio extraído de uma mídia com 'duracao'
+    segundos no formato configurado; 0 se a duração for desconhecida.
+    """
+    if not duracao:
+        return 0
+    return int(duracao * _BYTES_POR_SEGUNDO[obter_formato()])
+
+
+def listar_audios(pasta=None):
+    """
+    Lista os áudios extraídos (e extrações incompletas) de uma pasta de
+    armazenamento; por padrão, da pasta configurada.
+    """
+    pasta = Path(pasta) if pasta is not None else obter_pasta_temp()
+    if not pasta.exists():
+        return []
+    arquivos = []
+    for formato in FORMATOS_SUPORTADOS:
+        arquivos.extend(pasta.glob(f"*.{formato}"))
+        arquivos.extend(pasta.glob(f"*.{formato}.tmp"))
+    return [arquivo for arquivo in arquivos if arquivo.is_file()]
+
+
+def calcular_bytes_em_uso():
+    """
+    Soma o tamanho dos áudios que aguardam transcrição na pasta configurada.
+
+    Áudios de transcrições interrompidas (com diário pendente) ficam de
+    fora: ocupam espaço, mas não há ninguém trabalhando neles agora.
+    """
+    total = 0
+    for arquivo in listar_audios():
+        if arquivo.suffix != ".tmp" and checkpoints.possui_diario(arquivo.name):
+            continue
+        try:
+            total += arquivo.stat().st_size
+        except FileNotFoundError:
+            # Removido por outro processo durante a contagem
+            pass
+    return total
+
+
+def _ha_espaco(bytes_previstos):
+    # Sempre permite uma extração quando nada está em uso, para evitar travamento
+    em_uso = calcular_bytes_em_uso() + _reservado + _em_memoria
+    if em_uso == 0:
+        return True
+    if ARMAZENAMENTO_LIMITE_BYTES is not None and em_uso + bytes_previstos > ARMAZENAMENTO_LIMITE_BYTES:
+        return False
+    livre = shutil.disk_usage(obter_pasta_temp()).free
+    return livre - bytes_previstos >= ARMAZENAMENTO_ESPACO_LIVRE_MINIMO
+
+
+def _aguardar(bytes_previstos, parada, avisar):
+    # Espera (com _condicao adquirida) até caber 'bytes_previstos', 'parada' ser acionada
+    # ou passar ARMAZENAMENTO_ESPERA_MAXIMA
+    inicio = time.time()
+    avisado = False
+    while not _ha_espaco(bytes_previstos):
+        if parada is not None and parada.is_set():
+            break
+        if time.time() - inicio >= ARMAZENAMENTO_ESPERA_MAXIMA:
+            if avisar:
+                print("⚠️  Armazenamento temporário continua cheio, extraindo mesmo assim")
+            break
+        if avisar and not avisado:
+            print("⏳ Armazenamento temporário cheio, aguardando transcrições em andamento...")
+            avisado = True
+        _condicao.wait(timeout=_INTERVALO_VERIFICACAO)
+    return time.time() - inicio
+
+
+def aguardar_espaco(parada=None):
+    """
+    Aguarda, sem reservar nada, até o armazenamento sair do limite: usado
+    pelo pipeline antes de agendar a próxima extração. Retorna antes se
+    'parada' (threading.Event) for acionada.
+    """
+    with _condicao:
+        return _aguardar(0, parada, avisar=False)
+
+
+@contextmanager
+def reservar_espaco(bytes_previstos, parada=None):
+    """
+    Aguarda até que caibam 'bytes_previstos' no armazenamento e os mantém
+    reservados enquanto o bloco executa (a extração).
+
+    Cabe quando o total fica dentro de ARMAZENAMENTO_LIMITE_BYTES, somando
+    os áudios de todos os processos que usam a pasta e os extraídos em
+    memória neste processo, e o espaço livre do disco não fica abaixo de
+    ARMAZENAMENTO_ESPACO_LIVRE_MINIMO. A espera termina antes se 'parada'
+    (threading.Event) for acionada.
+
+    Entrega os segundos de espera.
+    """
+    global _reservado
+    with _condicao:
+        espera = _aguardar(bytes_previstos, parada, avisar=True)
+        _reservado += bytes_previstos
+    try:
+        yield espera
+    finally:
+        with _condicao:
+            _reservado -= bytes_previstos
+            _condicao.notify_all()
+
+
+def registrar_em_memoria(quantidade):
+    """
+    Conta no limite os bytes de um áudio extraído em memória, até que
+    liberar_em_memoria seja chamado depois da transcrição.
+    """
+    global _em_memoria
+    with _condicao:
+        _em_memoria += quantidade
+
+
+def liberar_em_memoria(quantidade):
+    """
+    Desconta do limite um áudio em memória já transcrito (ou descartado).
+    """
+    global _em_memoria
+    with _condicao:
+        _em_memoria = max(0, _em_memoria - quantidade)
+        _condicao.notify_all()
+
+
+def obter_pastas_para_limpeza():
+    """
+    Retorna as pastas que podem conter áudios temporários: 'temp_audios/' e,
+    se configurada, ARMAZENAMENTO_PASTA.
+    """
+    pastas = [obter_pasta_padrao()]
+    if ARMAZENAMENTO_PASTA:
+        pasta = Path(ARMAZENAMENTO_PASTA).expanduser()
+        if pasta.exists() and pasta.resolve() != pastas[0].resolve():
+            pastas.append(pasta)
+    return pastas
+
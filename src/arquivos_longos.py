@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src import vad
+
+
+# -------------------------------
+# Configurações do modo de arquivos longos
+# -------------------------------
+LONGO_ATIVADO = False  # Divide arquivos longos em trechos transcritos em paralelo
+
+LONGO_DURACAO_MINIMA = 30 * 60  # Arquivos a partir desta duração (s) usam o modo em trechos
+
+LONGO_TRECHO_MINIMO = 300.0  # Duração mínima (s) de cada trecho
+
+LONGO_BUSCA_SILENCIO = 30.0  # Janela (s) após o mínimo onde se procura o ponto mais silencioso
+
+LONGO_SOBREPOSICAO = 2.0  # Áudio extra (s) incluído em cada lado do corte
+
+LONGO_PROCESSOS = None  # Processos em paralelo (None = metade dos núcleos)
+
+
+def deve_dividir(duracao_segundos):
+    """
+    Indica se um áudio com esta duração deve ser transcrito em trechos.
+    """
+    return LONGO_ATIVADO and duracao_segundos >= LONGO_DURACAO_MINIMA
+
+
+def calcular_pontos_de_corte(audio, taxa_amostragem=16000, trecho_minimo=None, busca_silencio=None):
+    """
+    Escolhe onde cortar o áudio: cada trecho tem pelo menos
+    LONGO_TRECHO_MINIMO segundos e termina no quadro de menor energia
+    encontrado nos LONGO_BUSCA_SILENCIO segundos seguintes (ambos podem
+    ser substituídos por 'trecho_minimo' e 'busca_silencio').
+
+    Retorna a lista de tempos de corte (s), incluindo 0 e a duração total.
+    """
+    trecho_minimo = trecho_minimo or LONGO_TRECHO_MINIMO
+    busca_silencio = busca_silencio or LONGO_BUSCA_SILENCIO
+    duracao_total = len(audio) / taxa_amostragem
+    energia_db, amostras_por_quadro = vad.calcular_energia_db(audio, taxa_amostragem)
+    duracao_quadro = amostras_por_quadro / taxa_amostragem
+
+    # Suaviza a energia em ~0,5 s para não cortar em uma pausa entre sílabas
+    largura = max(1, int(0.5 / duracao_quadro))
+    energia_suave = np.convolve(energia_db, np.ones(largura) / largura, mode="same")
+
+    cortes = [0.0]
+    while duracao_total - cortes[-1] >= 2 * trecho_minimo:
+        inicio_busca = int((cortes[-1] + trecho_minimo) / duracao_quadro)
+        fim_busca = int((cortes[-1] + trecho_minimo + busca_silencio) / duracao_quadro)
+        janela = energia_suave[inicio_busca:fim_busca]
+        if janela.size == 0:
+            break
+        quadro_corte = inicio_busca + int(np.argmin(janela))
+        cortes.append(quadro_corte * duracao_quadro)
+    cortes.append(duracao_total)
+    return cortes
+
+
+def _clips_do_trecho(clip_timestamps, inicio, fim):
+    # Recorta os trechos de fala do VAD para a janela do trecho, em tempo local
+    if not clip_timestamps:
+        return None
+    clips = []
+    for clip_inicio, clip_fim in zip(clip_timestamps[::2], clip_timestamps[1::2]):
+        clip_inicio = max(clip_inicio, inicio)
+        clip_fim = min(clip_fim, fim)
+        if clip_fim > clip_inicio:
+            clips.extend([round(clip_inicio - inicio, 2), round(clip_fim - inicio, 2)])
+    return clips
+
+
+def deslocar_segmento(segmento, deslocamento):
+    """
+    Retorna uma cópia do segmento com os tempos (e os de suas palavras)
+    deslocados em 'deslocamento' segundos, levando-o para a linha do tempo
+    original do áudio.
+    """
+    segmento = dict(segmento)
+    segmento["start"] += deslocamento
+    segmento["end"] += deslocamento
+    if "words" in segmento:
+        segmento["words"] = [
+            {**palavra, "start": palavra["start"] + deslocamento, "end": palavra["end"] + deslocamento}
+            for palavra in segmento["words"]
+        ]
+    return segmento
+
+
+def costurar_resultados(resultados, janelas, cortes):
+    """
+    Junta os resultados de cada trecho em um único resultado do whisper.
+
+    Os tempos são deslocados para a linha do tempo original e, nas regiões de
+    sobreposição, cada segmento fica com o trecho dono do seu ponto médio,
+    eliminando frases repetidas entre trechos vizinhos.
+    """
+    segmentos = []
+    for i, (resultado, (inicio_janela, _)) in enumerate(zip(resultados, janelas)):
+        inicio_nucleo, fim_nucleo = cortes[i], cortes[i + 1]
+        for segmento in resultado["segments"]:
+            segmento = deslocar_segmento(segmento, inicio_janela)
+            meio = (segmento["start"] + segmento["end"]) / 2
+            ultimo = i == len(janelas) - 1
+            if inicio_nucleo <= meio and (meio < fim_nucleo or ultimo):
+                segmentos.append(segmento)
+
+    for i, segmento in enumerate(segmentos):
+        segmento["id"] = i
+    idioma = next((r["language"] for r in resultados if r.get("language")), None)
+    return {
+        "text": "".join(segmento["text"] for segmento in segmentos),
+        "segments": segmentos,
+        "language": idioma,
+    }
+
+
+def transcrever_em_trechos(audio, parametros, tarefa, inicializador, taxa_amostragem=16000):
+    """
+    Transcreve um áudio longo dividindo-o em trechos alinhados a silêncios,
+    processados em paralelo por LONGO_PROCESSOS processos.
+
+    - audio: array float32 mono
+    - parametros: opções de decodificação (as de 'clip_timestamps' são
+      recortadas para cada trecho)
+    - tarefa: função de nível de módulo (audio_trecho, parametros) -> resultado
+    - inicializador: função de nível de módulo chamada com o número de
+      threads em cada processo (carrega o modelo)
+
+    Retorna um dicionário no formato do whisper ("text", "segments", "language").
+    """
+    duracao_total = len(audio) / taxa_amostragem
+    cortes = calcular_pontos_de_corte(audio, taxa_amostragem)
+
+    janelas = []
+    for inicio, fim in zip(cortes[:-1], cortes[1:]):
+        janelas.append((max(0.0, inicio - LONGO_SOBREPOSICAO), min(duracao_total, fim + LONGO_SOBREPOSICAO)))
+
+    nucleos = os.cpu_count() or 1
+    num_processos = LONGO_PROCESSOS or max(1, nucleos // 2)
+    num_processos = max(1, min(num_processos, len(janelas)))
+    threads_por_processo = max(1, nucleos // num_processos)
+
+    print(f"✂️  Dividido em {len(janelas)} trechos ({num_processos} processos × {threads_por_processo} threads)")
+
+    clip_timestamps = parametros.get("clip_timestamps")
+    tarefas = []
+    for inicio, fim in janelas:
+        parametros_trecho = dict(parametros)
+        clips = _clips_do_trecho(clip_timestamps, inicio, fim)
+        if clips is not None:
+            if not clips:
+                tarefas.append(None)
+                continue
+            parametros_trecho["clip_timestamps"] = clips
+        audio_trecho = audio[int(inicio * taxa_amostragem):int(fim * taxa_amostragem)]
+        tarefas.append((audio_trecho, parametros_trecho))
+
+    vazio = {"text": "", "segments": [], "language": None}
+    # "spawn" em vez do fork padrão do Linux: este processo já tem threads do PyTorch/OpenMP
+    # (e, supervisionado, do próprio laço), e um fork herdaria travas presas
+    with ProcessPoolExecutor(
+        max_workers=num_processos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=inicializador,
+        initargs=(threads_por_processo,)
+    ) as executor:
+        futuros = [
+            executor.submit(tarefa, *argumentos) if argumentos is not None else None
+            for argumentos in tarefas
+        ]
+        resultados = [futuro.result() if futuro is not None else vazio for futuro in futuros]
+
+    return costurar_resultados(resultados, janelas, cortes)
@@ -0,0 +1,240 @@
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE
+from src.utils import Estatisticas, formatar_duracao, plural
+
+
+# -------------------------------
+# Configurações do cache de espectrogramas (log-mel)
+# -------------------------------
+MEL_CACHE_ATIVADO = False  # Guarda o log-mel de cada áudio em 'cache/mel/'; reprocessamentos vão direto ao encoder
+
+MEL_CACHE_LIMITE_BYTES = 4 * 1024 ** 3  # Espaço máximo; os espectrogramas usados há mais tempo saem primeiro (None = sem limite)
+
+MEL_CACHE_FLOAT16 = True  # Grava em float16: cerca de 58 MB por hora de áudio com 80 bandas (o dobro em float32)
+
+# Modelos cujo encoder recebe 128 bandas; os demais usam 80
+_MODELOS_128_BANDAS = ("large", "large-v3", "large-v3-turbo", "turbo")
+
+# Áudios associados ao hash do seu conteúdo (ver associar), por id do objeto
+_associados = {}
+
+# Totais acumulados no processo atual
+_estatisticas = Estatisticas({"reaproveitados": 0, "calculados": 0, "extracoes_evitadas": 0,
+                              "segundos_reaproveitados": 0.0})
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_pasta_cache():
+    """
+    Retorna a pasta dos espectrogramas dentro de 'cache/'.
+    """
+    pasta = obter_pasta_projeto() / "cache" / "mel"
+    pasta.mkdir(parents=True, exist_ok=True)
+    return pasta
+
+
+def obter_n_mels(nome_modelo):
+    """
+    Retorna quantas bandas mel o encoder do modelo 'nome_modelo' recebe.
+    """
+    return 128 if nome_modelo in _MODELOS_128_BANDAS else 80
+
+
+def obter_caminho(hash_midia, n_mels):
+    """
+    Retorna o caminho do espectrograma de um conteúdo (hash do vídeo) com
+    'n_mels' bandas.
+    """
+    return obter_pasta_cache() / f"{hash_midia}_{n_mels}.npy"
+
+
+class AudioEmCache:
+    """
+    Ocupa o lugar do áudio extraído de um vídeo cujo espectrograma já está
+    no cache: a transcrição vai direto ao encoder, sem FFmpeg nem cálculo
+    do log-mel. Como um array de áudio, len() retorna o número de amostras.
+    """
+    nbytes = 0  # Não ocupa o armazenamento temporário
+
+    def __init__(self, hash_midia, amostras):
+        self.hash_midia = hash_midia
+        self.amostras = amostras
+
+    def __len__(self):
+        return self.amostras
+
+
+def obter_amostras_em_cache(hash_midia, bandas):
+    """
+    Retorna o número de amostras (a 16 kHz) do áudio de 'hash_midia' se
+    houver espectrograma em cache para cada quantidade de 'bandas', ou None.
+    """
+    amostras = None
+    for n_mels in bandas:
+        try:
+            quadros = np.load(obter_caminho(hash_midia, n_mels), mmap_mode="r").shape[1]
+        except (OSError, ValueError):
+            return None
+        amostras = (quadros - N_FRAMES) * HOP_LENGTH
+    return amostras
+
+
+def _carregar(caminho):
+    # Abre o espectrograma mapeado em memória (páginas lidas sob demanda) e o marca como usado agora
+    try:
+        mel = np.load(caminho, mmap_mode="c")
+        os.utime(caminho)
+    except (OSError, ValueError):
+        return None
+    return mel
+
+
+def _respeitar_limite(preservar):
+    # Apaga os espectrogramas usados há mais tempo (mtime) até caber em MEL_CACHE_LIMITE_BYTES
+    if MEL_CACHE_LIMITE_BYTES is None:
+        return
+    arquivos = []
+    for caminho in obter_pasta_cache().glob("*.npy"):
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            continue
+        arquivos.append((info.st_mtime_ns, info.st_size, caminho))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= MEL_CACHE_LIMITE_BYTES:
+            break
+        if caminho == preservar:
+            continue
+        caminho.unlink(missing_ok=True)
+        total -= tamanho
+
+
+def _gravar(caminho, mel):
+    # Grava em um arquivo temporário e renomeia: outro processo nunca lê um espectrograma pela metade
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    with open(temporario, "wb") as arquivo:
+        np.save(arquivo, mel)
+    os.replace(temporario, caminho)
+    _respeitar_limite(caminho)
+
+
+def obter_mel(audio, n_mels):
+    """
+    Retorna, como tensor, o log-mel completo de 'audio' com os 30 s de
+    silêncio que o whisper.transcribe acrescenta ao fim: lido do cache ou
+    calculado e gravado nele.
+
+    Vale para um AudioEmCache e para áudios associados ao seu conteúdo
+    (ver associar); para os demais retorna None. Lança RuntimeError se o
+    espectrograma de um AudioEmCache saiu do cache.
+    """
+    import torch
+
+    associacao = _associados.get(id(audio))
+    if associacao is not None:
+        hash_midia = associacao["hash_midia"]
+    elif isinstance(audio, AudioEmCache):
+        hash_midia = audio.hash_midia
+    else:
+        return None
+
+    caminho = obter_caminho(hash_midia, n_mels)
+    mel = _carregar(caminho)
+    reaproveitado = mel is not None
+    if mel is None:
+        if isinstance(audio, AudioEmCache):
+            raise RuntimeError("espectrograma removido do cache antes da transcrição")
+        calculado = whisper.audio.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)
+        # A transcrição usa o valor gravado: o resultado é o mesmo com ou sem o cache
+        mel = calculado.numpy().astype(np.float16 if MEL_CACHE_FLOAT16 else np.float32)
+        _gravar(caminho, mel)
+
+    if associacao is not None and n_mels not in associacao["contados"]:
+        associacao["contados"].add(n_mels)
+        if reaproveitado:
+            _estatisticas["reaproveitados"] += 1
+            _estatisticas["segundos_reaproveitados"] += (mel.shape[1] - N_FRAMES) * HOP_LENGTH / SAMPLE_RATE
+        else:
+            _estatisticas["calculados"] += 1
+    return torch.from_numpy(mel)
+
+
+def _log_mel_com_cache(original):
+    # Substituto do log_mel_spectrogram usado pelo whisper.transcribe: o áudio completo
+    # (com o silêncio de 30 s ao fim) de um áudio associado vem do cache
+    def log_mel_spectrogram(audio, n_mels=80, padding=0, device=None):
+        if padding == N_SAMPLES:
+            mel = obter_mel(audio, n_mels)
+            if mel is not None:
+                return mel if device is None else mel.to(device)
+        return original(audio, n_mels, padding, device)
+    return log_mel_spectrogram
+
+
+@contextmanager
+def associar(pares):
+    """
+    Associa cada áudio de 'pares' (audio, hash_midia) ao hash do seu
+    conteúdo enquanto o bloco executa: o whisper.transcribe e a
+    decodificação em lote passam a ler o espectrograma do cache (ou a
+    gravá-lo nele) em vez de calculá-lo.
+
+    Sem MEL_CACHE_ATIVADO, ou para áudios sem hash, nada muda.
+    """
+    novos = []
+    if MEL_CACHE_ATIVADO:
+        for audio, hash_midia in pares:
+            if hash_midia is None or id(audio) in _associados:
+                continue
+            _associados[id(audio)] = {"audio": audio, "hash_midia": hash_midia, "contados": set()}
+            novos.append(audio)
+            if isinstance(audio, AudioEmCache):
+                _estatisticas["extracoes_evitadas"] += 1
+    if not novos:
+        yield
+        return
+
+    modulo = sys.modules["whisper.transcribe"]
+    original = modulo.log_mel_spectrogram
+    modulo.log_mel_spectrogram = _log_mel_com_cache(original)
+    try:
+        yield
+    finally:
+        modulo.log_mel_spectrogram = original
+        for audio in novos:
+            _associados.pop(id(audio), None)
+
+
+registrar_estatisticas = _estatisticas.registrar
+obter_estatisticas = _estatisticas.obter
+somar_estatisticas = _estatisticas.somar
+
+
+def exibir_relatorio_mel():
+    """
+    Mostra quantos espectrogramas vieram do cache (e quantas extrações de
+    áudio foram dispensadas) e quanto o cache ocupa em disco.
+    """
+    reaproveitados = _estatisticas["reaproveitados"]
+    calculados = _estatisticas["calculados"]
+    if not MEL_CACHE_ATIVADO or not (reaproveitados or calculados):
+        return
+    ocupado = sum(caminho.stat().st_size for caminho in obter_pasta_cache().glob("*.npy"))
+    print(f"\n🗂️  Cache de espectrogramas: {reaproveitados} {plural(reaproveitados, 'reaproveitado', 'reaproveitados')} "
+          f"({formatar_duracao(_estatisticas['segundos_reaproveitados'])} de áudio), "
+          f"{calculados} {plural(calculados, 'calculado', 'calculados')}")
+    if _estatisticas["extracoes_evitadas"]:
+        print(f"   ♻️  Extrações de áudio dispensadas: {_estatisticas['extracoes_evitadas']}")
+    print(f"   💾 Espaço ocupado: {ocupado / 1024 ** 2:.1f} MB")
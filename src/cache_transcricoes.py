@@ -0,0 +1,325 @@
+import hashlib
+import json
+import shutil
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# -------------------------------
+# Configurações do cache de transcrições
+# -------------------------------
+CACHE_AMOSTRAS_HASH = 16  # Blocos lidos ao longo do arquivo para compor o hash
+
+CACHE_TAMANHO_BLOCO = 64 * 1024  # Tamanho (bytes) de cada bloco amostrado
+
+# Situações possíveis de um vídeo em relação ao cache
+STATUS_TRANSCRITO = "transcrito"
+STATUS_REAPROVEITADO = "reaproveitado"
+STATUS_DESATUALIZADO = "desatualizado"
+STATUS_NOVO = "novo"
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_banco():
+    """
+    Retorna o caminho do manifesto SQLite dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "transcricoes.db"
+
+
+@contextmanager
+def _conectar():
+    # Abre o manifesto criando as tabelas na primeira execução; confirma e fecha ao sair
+    conexao = sqlite3.connect(obter_caminho_banco(), timeout=30)
+    try:
+        _criar_tabelas(conexao)
+        yield conexao
+        conexao.commit()
+    finally:
+        conexao.close()
+
+
+def _criar_tabelas(conexao):
+    conexao.execute(
+        "CREATE TABLE IF NOT EXISTS midias ("
+        " nome_video TEXT PRIMARY KEY,"
+        " tamanho INTEGER NOT NULL,"
+        " mtime_ns INTEGER NOT NULL,"
+        " hash_midia TEXT NOT NULL)"
+    )
+    conexao.execute(
+        "CREATE TABLE IF NOT EXISTS transcricoes ("
+        " arquivo TEXT PRIMARY KEY,"
+        " hash_midia TEXT NOT NULL,"
+        " assinatura TEXT NOT NULL)"
+    )
+    conexao.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcricoes_chave"
+        " ON transcricoes (hash_midia, assinatura)"
+    )
+    conexao.execute(
+        "CREATE TABLE IF NOT EXISTS resultados ("
+        " hash_midia TEXT NOT NULL,"
+        " assinatura TEXT NOT NULL,"
+        " dados BLOB NOT NULL,"
+        " PRIMARY KEY (hash_midia, assinatura))"
+    )
+
+
+def calcular_hash_midia(video_path):
+    """
+    Calcula um hash BLAKE2 rápido do conteúdo de um arquivo de mídia.
+
+    Arquivos pequenos são lidos por inteiro; nos demais são lidos
+    CACHE_AMOSTRAS_HASH blocos distribuídos do início ao fim, junto com o
+    tamanho total, o que identifica o conteúdo sem ler o vídeo inteiro.
+    """
+    video_path = Path(video_path)
+    tamanho = video_path.stat().st_size
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(str(tamanho).encode())
+
+    with open(video_path, "rb") as f:
+        if tamanho <= CACHE_AMOSTRAS_HASH * CACHE_TAMANHO_BLOCO:
+            resumo.update(f.read())
+        else:
+            ultimo_inicio = tamanho - CACHE_TAMANHO_BLOCO
+            for i in range(CACHE_AMOSTRAS_HASH):
+                f.seek(ultimo_inicio * i // (CACHE_AMOSTRAS_HASH - 1))
+                resumo.update(f.read(CACHE_TAMANHO_BLOCO))
+
+    return resumo.hexdigest()
+
+
+def calcular_assinatura(configuracao):
+    """
+    Gera uma assinatura curta e estável para um dicionário de configuração
+    (modelo + parâmetros de decodificação).
+    """
+    serializado = json.dumps(configuracao, sort_keys=True, default=str)
+    return hashlib.blake2b(serializado.encode(), digest_size=8).hexdigest()
+
+
+def _obter_hash_video(conexao, nome_video):
+    # Reaproveita o hash calculado antes se tamanho e mtime não mudaram
+    video_path = obter_pasta_projeto() / "videos" / nome_video
+    info = video_path.stat()
+    linha = conexao.execute(
+        "SELECT tamanho, mtime_ns, hash_midia FROM midias WHERE nome_video = ?",
+        (nome_video,)
+    ).fetchone()
+    if linha is not None and linha[0] == info.st_size and linha[1] == info.st_mtime_ns:
+        return linha[2]
+
+    hash_midia = calcular_hash_midia(video_path)
+    conexao.execute(
+        "INSERT OR REPLACE INTO midias (nome_video, tamanho, mtime_ns, hash_midia) VALUES (?, ?, ?, ?)",
+        (nome_video, info.st_size, info.st_mtime_ns, hash_midia)
+    )
+    return hash_midia
+
+
+def obter_hash_video(nome_video):
+    """
+    Retorna o hash do conteúdo atual de 'videos/{nome_video}', reaproveitando
+    o valor do manifesto quando tamanho e mtime não mudaram.
+    """
+    with _conectar() as conexao:
+        return _obter_hash_video(conexao, nome_video)
+
+
+def _copiar_transcricao(origem, destino):
+    # Copia o .txt e os .srt/.vtt/.json gravados junto com ele
+    if origem == destino:
+        return
+    shutil.copyfile(origem, destino)
+    for extensao in (".srt", ".vtt", ".json"):
+        irmao = origem.with_suffix(extensao)
+        if irmao.exists():
+            shutil.copyfile(irmao, destino.with_suffix(extensao))
+
+
+def _resumir_resultado(resultado):
+    # Guarda do resultado do whisper só o que os formatos de saída usam, comprimido
+    segmentos = []
+    for segmento in resultado["segments"]:
+        item = {chave: segmento[chave] for chave in ("id", "start", "end", "text", "temperature", "words")
+                if chave in segmento}
+        if "words" in item:
+            item["words"] = [
+                {chave: palavra[chave] for chave in ("word", "start", "end", "probability")}
+                for palavra in item["words"]
+            ]
+        segmentos.append(item)
+    dados = {"language": resultado.get("language"), "text": resultado["text"], "segments": segmentos}
+    return zlib.compress(json.dumps(dados, ensure_ascii=False, default=float).encode("utf-8"))
+
+
+def _possui_resultado(conexao, hash_midia, assinatura):
+    return conexao.execute(
+        "SELECT 1 FROM resultados WHERE hash_midia = ? AND assinatura = ?",
+        (hash_midia, assinatura)
+    ).fetchone() is not None
+
+
+def consultar_status(nome_video, assinatura, formatos=("txt",)):
+    """
+    Verifica no manifesto a situação de um vídeo da pasta 'videos/', sem
+    gravar nada em 'transcripts/':
+
+      - STATUS_TRANSCRITO: já existe transcrição para este conteúdo e configuração
+      - STATUS_REAPROVEITADO: o mesmo conteúdo foi transcrito com outro nome;
+        a cópia fica para copiar_transcricao, depois da confirmação
+      - STATUS_DESATUALIZADO: existe um .txt com este nome, mas ele pertence a
+        outro conteúdo ou a outra configuração, ou falta um dos 'formatos'
+        e não há resultado guardado para gerá-lo
+      - STATUS_NOVO: nada encontrado
+
+    Os formatos de saída não mudam o texto: os que faltarem são gerados
+    depois a partir do resultado guardado (ver obter_resultado).
+    Transcrições antigas, criadas antes do manifesto, continuam sendo
+    reconhecidas pelo nome do arquivo.
+
+    Retorna (status, origem): 'origem' é o .txt a copiar no
+    STATUS_REAPROVEITADO e None nos demais casos.
+    """
+    pasta_transcripts = obter_pasta_projeto() / "transcripts"
+    arquivo_esperado = pasta_transcripts / f"{Path(nome_video).stem}.txt"
+
+    with _conectar() as conexao:
+        hash_midia = _obter_hash_video(conexao, nome_video)
+
+        linhas = conexao.execute(
+            "SELECT arquivo FROM transcricoes WHERE hash_midia = ? AND assinatura = ?",
+            (hash_midia, assinatura)
+        ).fetchall()
+        arquivos = [pasta_transcripts / arquivo for (arquivo,) in linhas]
+        existentes = [arquivo for arquivo in arquivos if arquivo.exists()]
+        if arquivo_esperado in existentes:
+            status, origem = STATUS_TRANSCRITO, None
+        elif existentes:
+            # Vídeo renomeado (ou cópia): a transcrição existente e as legendas/JSON
+            # gravados junto com ela podem ser reaproveitados
+            status, origem = STATUS_REAPROVEITADO, existentes[0]
+        elif not arquivo_esperado.exists():
+            return STATUS_NOVO, None
+        elif conexao.execute(
+            "SELECT 1 FROM transcricoes WHERE arquivo = ?", (arquivo_esperado.name,)
+        ).fetchone() is None:
+            status, origem = STATUS_TRANSCRITO, None
+        else:
+            return STATUS_DESATUALIZADO, None
+
+        base = origem or arquivo_esperado
+        ausentes = [formato for formato in formatos
+                    if formato != "txt" and not base.with_suffix(f".{formato}").exists()]
+        if ausentes and not _possui_resultado(conexao, hash_midia, assinatura):
+            return STATUS_DESATUALIZADO, None
+    return status, origem
+
+
+def copiar_transcricao(nome_video, origem, assinatura):
+    """
+    Copia a transcrição 'origem' (e os formatos irmãos) para
+    'transcripts/{nome}.txt' e a registra para o conteúdo atual de
+    'videos/{nome_video}' com a configuração 'assinatura'.
+
+    Retorna o Path do .txt.
+    """
+    arquivo_esperado = obter_pasta_projeto() / "transcripts" / f"{Path(nome_video).stem}.txt"
+    _copiar_transcricao(Path(origem), arquivo_esperado)
+    with _conectar() as conexao:
+        hash_midia = _obter_hash_video(conexao, nome_video)
+        conexao.execute(
+            "INSERT OR REPLACE INTO transcricoes (arquivo, hash_midia, assinatura) VALUES (?, ?, ?)",
+            (arquivo_esperado.name, hash_midia, assinatura)
+        )
+    return arquivo_esperado
+
+
+def registrar_transcricao(nome_video, arquivo_transcricao, assinatura, resultado=None):
+    """
+    Registra no manifesto que 'arquivo_transcricao' contém a transcrição do
+    conteúdo atual de 'videos/{nome_video}' com a configuração 'assinatura'.
+
+    Com 'resultado' (o do whisper), guarda também os segmentos, usados
+    para gerar depois os formatos de saída pedidos em outra execução.
+    """
+    video_path = obter_pasta_projeto() / "videos" / nome_video
+    if not video_path.exists():
+        return False
+    with _conectar() as conexao:
+        hash_midia = _obter_hash_video(conexao, nome_video)
+        conexao.execute(
+            "INSERT OR REPLACE INTO transcricoes (arquivo, hash_midia, assinatura) VALUES (?, ?, ?)",
+            (Path(arquivo_transcricao).name, hash_midia, assinatura)
+        )
+        if resultado is not None:
+            conexao.execute(
+                "INSERT OR REPLACE INTO resultados (hash_midia, assinatura, dados) VALUES (?, ?, ?)",
+                (hash_midia, assinatura, _resumir_resultado(resultado))
+            )
+    return True
+
+
+def obter_resultado(nome_video, assinatura):
+    """
+    Retorna o resultado guardado (idioma, texto e segmentos) da transcrição
+    do conteúdo atual de 'videos/{nome_video}' com a configuração
+    'assinatura', ou None.
+    """
+    with _conectar() as conexao:
+        hash_midia = _obter_hash_video(conexao, nome_video)
+        linha = conexao.execute(
+            "SELECT dados FROM resultados WHERE hash_midia = ? AND assinatura = ?",
+            (hash_midia, assinatura)
+        ).fetchone()
+    if linha is None:
+        return None
+    return json.loads(zlib.decompress(linha[0]))
+
+
+def reaproveitar_transcricao(nome_video, hash_origem, assinatura):
+    """
+    Copia para 'transcripts/{nome}.txt' (e formatos irmãos) a transcrição
+    de outro conteúdo, 'hash_origem', feita com a mesma configuração, e a
+    registra para o conteúdo atual de 'videos/{nome_video}'.
+
+    Usado quando a impressão acústica mostra que os dois arquivos têm o
+    mesmo áudio. Retorna o Path do .txt ou None se não houver transcrição.
+    """
+    pasta_transcripts = obter_pasta_projeto() / "transcripts"
+    arquivo_esperado = pasta_transcripts / f"{Path(nome_video).stem}.txt"
+
+    with _conectar() as conexao:
+        linhas = conexao.execute(
+            "SELECT arquivo FROM transcricoes WHERE hash_midia = ? AND assinatura = ?",
+            (hash_origem, assinatura)
+        ).fetchall()
+        existentes = [pasta_transcripts / arquivo for (arquivo,) in linhas
+                      if (pasta_transcripts / arquivo).exists()]
+        if not existentes:
+            return None
+
+        _copiar_transcricao(existentes[0], arquivo_esperado)
+        hash_midia = _obter_hash_video(conexao, nome_video)
+        conexao.execute(
+            "INSERT OR REPLACE INTO transcricoes (arquivo, hash_midia, assinatura) VALUES (?, ?, ?)",
+            (arquivo_esperado.name, hash_midia, assinatura)
+        )
+        conexao.execute(
+            "INSERT OR REPLACE INTO resultados (hash_midia, assinatura, dados)"
+            " SELECT ?, assinatura, dados FROM resultados WHERE hash_midia = ? AND assinatura = ?",
+            (hash_midia, hash_origem, assinatura)
+        )
+    return arquivo_esperado
@@ -0,0 +1,251 @@
+import json
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+
+
+# -------------------------------
+# Configurações da calibração de threads
+# -------------------------------
+CALIBRACAO_DURACAO_CLIPE = 30.0  # Duração (s) do clipe sintético transcrito em cada configuração
+
+CALIBRACAO_MAX_WORKERS = 4  # Maior número de processos simultâneos testado
+
+CALIBRACAO_APLICAR = True  # Aplica a configuração calibrada ao carregar o modelo
+
+_TAXA_AMOSTRAGEM = 16000
+
+# Evita reaplicar (ou sobrescrever as threads de um processo auxiliar)
+_aplicada = False
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_calibracao():
+    """
+    Retorna o caminho da calibração desta máquina em 'models/'.
+    """
+    host = platform.node() or "local"
+    nome_seguro = "".join(c if c.isalnum() or c in "-_." else "_" for c in host)
+    return obter_pasta_projeto() / "models" / f"calibracao_{nome_seguro}.json"
+
+
+def obter_cpus_disponiveis():
+    """
+    Retorna a lista de CPUs lógicas que o processo pode usar.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def obter_cpus_fisicas():
+    """
+    Retorna uma CPU lógica por núcleo físico (descarta os irmãos de SMT),
+    lendo a topologia em /sys. Fora do Linux retorna None.
+    """
+    disponiveis = obter_cpus_disponiveis()
+    vistos = set()
+    fisicas = []
+    for cpu in disponiveis:
+        caminho = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list")
+        try:
+            irmaos = caminho.read_text().strip()
+        except OSError:
+            return None
+        if irmaos not in vistos:
+            vistos.add(irmaos)
+            fisicas.append(cpu)
+    return fisicas
+
+
+def gerar_clipe_sintetico(duracao=None):
+    """
+    Gera um clipe determinístico parecido com voz: vogais com harmônicos,
+    tom variando e sílabas de ~4 Hz, com ruído de fundo de semente fixa.
+    """
+    duracao = duracao or CALIBRACAO_DURACAO_CLIPE
+    t = np.arange(int(duracao * _TAXA_AMOSTRAGEM)) / _TAXA_AMOSTRAGEM
+    frequencia = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    fase = 2 * np.pi * np.cumsum(frequencia) / _TAXA_AMOSTRAGEM
+    voz = sum(np.sin(h * fase) / h for h in range(1, 8))
+    silabas = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.2 * t) > -0.6)
+    ruido = np.random.default_rng(7).standard_normal(t.size)
+    audio = 0.2 * voz * silabas + 0.005 * ruido
+    return (audio / np.max(np.abs(audio))).astype(np.float32) * 0.5
+
+
+def _configuracoes_candidatas():
+    # Combinações (workers, threads por worker, modo de afinidade) a medir
+    cpus = obter_cpus_disponiveis()
+    fisicas = obter_cpus_fisicas()
+    modos = {"todas": cpus}
+    if fisicas and len(fisicas) < len(cpus):
+        modos["nucleos_fisicos"] = fisicas
+
+    candidatas = []
+    for modo, lista in modos.items():
+        workers = 1
+        while workers <= min(CALIBRACAO_MAX_WORKERS, len(lista)):
+            por_worker = len(lista) // workers
+            opcoes_threads = {por_worker, max(1, por_worker // 2)}
+            for threads in sorted(opcoes_threads, reverse=True):
+                candidatas.append((workers, threads, modo, lista))
+            workers *= 2
+    return candidatas
+
+
+def _inicializar_processo_calibracao(num_threads, cpus):
+    # Fixa a afinidade antes de o PyTorch criar seu pool de threads
+    from src import transcriber
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    transcriber.inicializar_processo_worker(num_threads)
+
+
+def _transcrever_clipe(audio):
+    # Executa uma transcrição determinística do clipe e retorna o tempo gasto
+    from src import transcriber
+
+    modelo = transcriber.carregar_modelo()
+    parametros = transcriber.obter_parametros_decodificacao()
+    parametros.update({
+        "language": "en",
+        "temperature": (0.0,),
+        "condition_on_previous_text": False,
+        "word_timestamps": False,
+    })
+    inicio = time.perf_counter()
+    modelo.transcribe(audio, verbose=None, **parametros)
+    return time.perf_counter() - inicio
+
+
+def _medir(workers, threads, cpus, audio):
+    # Retorna segundos de áudio transcritos por segundo com 'workers' processos simultâneos
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_inicializar_processo_calibracao,
+        initargs=(threads, cpus)
+    ) as executor:
+        # Rodada de aquecimento: carrega o modelo em cada processo
+        list(executor.map(_transcrever_clipe, [audio[:_TAXA_AMOSTRAGEM]] * workers))
+        tempos = list(executor.map(_transcrever_clipe, [audio] * workers))
+    duracao = len(audio) / _TAXA_AMOSTRAGEM
+    return workers * duracao / max(tempos)
+
+
+def calibrar():
+    """
+    Mede a vazão da transcrição do clipe sintético em cada combinação de
+    processos, threads e afinidade (todas as CPUs ou um núcleo físico por
+    vez, em máquinas com SMT) e grava a mais rápida em
+    'models/calibracao_<host>.json'.
+
+    Retorna o dicionário gravado.
+    """
+    from src import transcriber
+
+    # A medição parte de todas as CPUs, sem a afinidade de uma calibração anterior
+    marcar_processo_auxiliar()
+    audio = gerar_clipe_sintetico()
+    candidatas = _configuracoes_candidatas()
+    print(f"🧪 Calibrando {len(candidatas)} configurações com o modelo '{transcriber.MODEL_SIZE}' "
+          f"({CALIBRACAO_DURACAO_CLIPE:.0f}s de áudio sintético)")
+
+    # Garante o modelo em 'models/' antes de abrir os processos de medição
+    transcriber.carregar_modelo()
+    transcriber.limpar_modelo()
+
+    medicoes = []
+    for workers, threads, modo, cpus in candidatas:
+        vazao = _medir(workers, threads, cpus, audio)
+        medicoes.append({"workers": workers, "threads": threads, "afinidade": modo, "vazao": round(vazao, 3)})
+        print(f"   ⚙️  {workers} × {threads} threads ({modo}): {vazao:.2f}s de áudio por segundo")
+
+    melhor = max(medicoes, key=lambda medicao: medicao["vazao"])
+    cpus_melhor = next(c for w, t, m, c in candidatas if m == melhor["afinidade"])
+    calibracao = {
+        "host": platform.node(),
+        "modelo": transcriber.MODEL_SIZE,
+        "cpus_logicas": os.cpu_count(),
+        "workers": melhor["workers"],
+        "threads": melhor["threads"],
+        "threads_interop": 1,
+        "afinidade": melhor["afinidade"],
+        "cpus": cpus_melhor,
+        "medicoes": medicoes,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    caminho = obter_caminho_calibracao()
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(calibracao, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"\n🏁 Melhor: {melhor['workers']} × {melhor['threads']} threads ({melhor['afinidade']})")
+    print(f"💾 Calibração salva em: models/{caminho.name}")
+    return calibracao
+
+
+def obter_calibracao():
+    """
+    Retorna a calibração gravada para esta máquina, ou None se não existir,
+    se foi medida com outro modelo ou se o número de CPUs mudou.
+    """
+    from src import transcriber
+
+    try:
+        calibracao = json.loads(obter_caminho_calibracao().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if calibracao.get("cpus_logicas") != os.cpu_count() or calibracao.get("modelo") != transcriber.MODEL_SIZE:
+        return None
+    return calibracao
+
+
+def aplicar_calibracao():
+    """
+    Aplica ao processo atual a afinidade de CPU e as threads (intra e
+    interop) da calibração desta máquina. Só age uma vez por processo.
+
+    Retorna True se uma calibração foi aplicada.
+    """
+    global _aplicada
+    if _aplicada or not CALIBRACAO_APLICAR:
+        return False
+    _aplicada = True
+    calibracao = obter_calibracao()
+    if calibracao is None:
+        return False
+
+    import torch
+
+    if calibracao.get("cpus") and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, calibracao["cpus"])
+        except OSError:
+            # CPU da calibração não está mais disponível (cgroup/contêiner diferente)
+            pass
+    torch.set_num_threads(calibracao["threads"])
+    try:
+        torch.set_num_interop_threads(calibracao.get("threads_interop", 1))
+    except RuntimeError:
+        # Só pode ser definido antes de qualquer trabalho paralelo no processo
+        pass
+    return True
+
+
+def marcar_processo_auxiliar():
+    """
+    Indica que as threads deste processo já foram definidas por quem o criou
+    (modo --workers), para que carregar_modelo não as sobrescreva.
+    """
+    global _aplicada
+    _aplicada = True
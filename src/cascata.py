@@ -0,0 +1,226 @@
+from src.utils import Estatisticas, formatar_duracao, plural
+
+
+# -------------------------------
+# Configurações da cascata de modelos (rascunho rápido + revisão dos trechos duvidosos)
+# -------------------------------
+CASCATA_ATIVADA = False  # Transcreve com um modelo pequeno e refaz com MODEL_SIZE só os trechos duvidosos
+
+CASCATA_MODELO_RASCUNHO = "base"  # Modelo do primeiro passo (ex.: tiny, base, small)
+
+CASCATA_LOGPROB_MINIMO = -0.5  # Segmentos do rascunho com avg_logprob abaixo disto são refeitos
+
+CASCATA_COMPRESSAO_MAXIMA = 2.0  # Segmentos com compression_ratio acima disto (texto repetitivo) são refeitos
+
+CASCATA_SEM_FALA_MAXIMO = 0.4  # Segmentos com no_speech_prob acima disto (possível alucinação) são refeitos
+
+CASCATA_UNIAO = 1.0  # Segmentos duvidosos separados por menos que isto (s) são refeitos em um só trecho
+
+CASCATA_MARGEM = 0.2  # Margem (s) antes e depois de cada trecho, sem invadir os segmentos mantidos
+
+# Totais acumulados no processo atual
+_estatisticas = Estatisticas({"segundos_transcritos": 0.0, "segundos_refeitos": 0.0, "trechos_refeitos": 0})
+
+
+def cascata_ativa(modelo_principal):
+    """
+    Indica se a cascata deve ser usada: ativada e com um modelo de rascunho
+    diferente do modelo principal.
+    """
+    return CASCATA_ATIVADA and CASCATA_MODELO_RASCUNHO != modelo_principal
+
+
+def obter_configuracao():
+    """
+    Retorna os parâmetros da cascata que mudam o texto gerado (entram na
+    assinatura do cache de transcrições).
+    """
+    return {
+        "rascunho": CASCATA_MODELO_RASCUNHO,
+        "logprob": CASCATA_LOGPROB_MINIMO,
+        "compressao": CASCATA_COMPRESSAO_MAXIMA,
+        "sem_fala": CASCATA_SEM_FALA_MAXIMO,
+        "uniao": CASCATA_UNIAO,
+        "margem": CASCATA_MARGEM,
+    }
+
+
+def segmento_duvidoso(segmento):
+    """
+    Indica se um segmento do rascunho está fora dos limites de confiança
+    (logprob médio, taxa de compressão ou probabilidade de não haver fala).
+    """
+    return (
+        segmento.get("avg_logprob", 0.0) < CASCATA_LOGPROB_MINIMO
+        or segmento.get("compression_ratio", 0.0) > CASCATA_COMPRESSAO_MAXIMA
+        or segmento.get("no_speech_prob", 0.0) > CASCATA_SEM_FALA_MAXIMO
+    )
+
+
+def selecionar_trechos(segmentos):
+    """
+    Agrupa os segmentos duvidosos do rascunho em trechos (inicio, fim) a
+    refazer com o modelo principal.
+
+    Duvidosos próximos são unidos e cada trecho ganha CASCATA_MARGEM, limitada
+    pelos segmentos vizinhos que serão mantidos.
+    """
+    trechos = []
+    for segmento in segmentos:
+        if not segmento_duvidoso(segmento):
+            continue
+        if trechos and segmento["start"] - trechos[-1][1] < CASCATA_UNIAO:
+            trechos[-1] = (trechos[-1][0], max(trechos[-1][1], segmento["end"]))
+        else:
+            trechos.append((segmento["start"], segmento["end"]))
+
+    com_margem = []
+    for inicio, fim in trechos:
+        anterior = max((s["end"] for s in segmentos if s["end"] <= inicio), default=0.0)
+        posterior = min((s["start"] for s in segmentos if s["start"] >= fim), default=fim + CASCATA_MARGEM)
+        inicio = max(inicio - CASCATA_MARGEM, anterior, 0.0)
+        fim = min(fim + CASCATA_MARGEM, posterior)
+        if com_margem and inicio <= com_margem[-1][1]:
+            com_margem[-1] = (com_margem[-1][0], fim)
+        elif fim > inicio:
+            com_margem.append((inicio, fim))
+    return com_margem
+
+
+def _dentro(segmento, trechos):
+    # O segmento pertence ao trecho que contém o seu ponto médio
+    meio = (segmento["start"] + segmento["end"]) / 2
+    return any(inicio <= meio <= fim for inicio, fim in trechos)
+
+
+def costurar(rascunho, revisao, trechos):
+    """
+    Substitui, no resultado do rascunho, os segmentos dos trechos refeitos
+    pelos segmentos da revisão, em ordem de tempo.
+
+    Retorna um dicionário no formato do whisper ("text", "segments", "language").
+    """
+    segmentos = [segmento for segmento in rascunho["segments"] if not _dentro(segmento, trechos)]
+    segmentos += [segmento for segmento in revisao["segments"] if _dentro(segmento, trechos)]
+    segmentos.sort(key=lambda segmento: segmento["start"])
+    for i, segmento in enumerate(segmentos):
+        segmento["id"] = i
+    return {
+        "text": "".join(segmento["text"] for segmento in segmentos),
+        "segments": segmentos,
+        "language": rascunho.get("language"),
+    }
+
+
+def revisar_rascunho(principal, audio, resultado, parametros, nomes, verbose=None):
+    """
+    Refaz com o modelo 'principal', em uma única chamada (via
+    clip_timestamps), apenas os trechos duvidosos do rascunho 'resultado',
+    costurando-os de volta nele.
+
+    'nomes' é o par (nome_rascunho, nome_principal), gravado no campo
+    "modelo" de cada segmento para contar quanto do áudio foi refeito.
+    """
+    nome_rascunho, nome_principal = nomes
+    for segmento in resultado["segments"]:
+        segmento["modelo"] = nome_rascunho
+
+    trechos = selecionar_trechos(resultado["segments"])
+    if not trechos:
+        return resultado
+
+    parametros_revisao = dict(parametros)
+    parametros_revisao["clip_timestamps"] = [round(valor, 2) for trecho in trechos for valor in trecho]
+    # O idioma do rascunho vale para a revisão: evita nova detecção a cada trecho
+    parametros_revisao["language"] = parametros.get("language") or resultado.get("language")
+    revisao = principal.transcribe(audio, verbose=verbose, **parametros_revisao)
+    for segmento in revisao["segments"]:
+        segmento["modelo"] = nome_principal
+    return costurar(resultado, revisao, trechos)
+
+
+def transcrever_em_cascata(rascunho, principal, audio, parametros, nomes, verbose=None):
+    """
+    Transcreve 'audio' com o modelo 'rascunho' e refaz com o modelo
+    'principal' apenas os trechos duvidosos (ver revisar_rascunho).
+    """
+    resultado = rascunho.transcribe(audio, verbose=verbose, **parametros)
+    return revisar_rascunho(principal, audio, resultado, parametros, nomes, verbose)
+
+
+class ModeloCascata:
+    """
+    Par de modelos que se comporta como um único modelo do whisper:
+    transcribe faz o rascunho com o modelo pequeno e refaz com o principal
+    apenas os trechos duvidosos. Os demais atributos (dims, device,
+    detect_language...) são os do modelo principal.
+    """
+
+    def __init__(self, rascunho, principal, nome_rascunho, nome_principal):
+        self.rascunho = rascunho
+        self.principal = principal
+        self.nomes = (nome_rascunho, nome_principal)
+
+    def __getattr__(self, nome):
+        return getattr(self.principal, nome)
+
+    def transcribe(self, audio, verbose=None, **parametros):
+        return transcrever_em_cascata(self.rascunho, self.principal, audio, parametros, self.nomes, verbose)
+
+    def revisar(self, audio, resultado, parametros):
+        return revisar_rascunho(self.principal, audio, resultado, parametros, self.nomes)
+
+
+def contar_pelos_segmentos(resultado):
+    """
+    Conta, pelo campo "modelo" dos segmentos, quantos segundos de fala foram
+    transcritos e quantos foram refeitos pelo modelo principal (e em quantos
+    trechos). Funciona também para resultados costurados de trechos e de
+    diários de retomada.
+    """
+    contadores = {"segundos_transcritos": 0.0, "segundos_refeitos": 0.0, "trechos_refeitos": 0}
+    anterior_refeito = False
+    for segmento in resultado["segments"]:
+        duracao = max(0.0, segmento["end"] - segmento["start"])
+        contadores["segundos_transcritos"] += duracao
+        refeito = segmento.get("modelo") not in (None, CASCATA_MODELO_RASCUNHO)
+        if refeito:
+            contadores["segundos_refeitos"] += duracao
+            if not anterior_refeito:
+                contadores["trechos_refeitos"] += 1
+        anterior_refeito = refeito
+    return contadores
+
+
+registrar_estatisticas = _estatisticas.registrar
+obter_estatisticas = _estatisticas.obter
+somar_estatisticas = _estatisticas.somar
+
+
+def exibir_resumo_arquivo(contadores, modelo_principal):
+    """
+    Mostra quanto da fala do arquivo precisou do modelo principal.
+    """
+    transcritos = contadores["segundos_transcritos"]
+    if transcritos <= 0:
+        return
+    refeitos = contadores["segundos_refeitos"]
+    if not refeitos:
+        print(f"🪜 Cascata: rascunho do modelo '{CASCATA_MODELO_RASCUNHO}' aceito por inteiro")
+        return
+    print(f"🪜 Cascata: {formatar_duracao(refeitos)} de {formatar_duracao(transcritos)} "
+          f"({refeitos / transcritos:.0%} da fala) refeitos com o modelo '{modelo_principal}' "
+          f"em {contadores['trechos_refeitos']} {plural(contadores['trechos_refeitos'], 'trecho', 'trechos')}")
+
+
+def exibir_relatorio_cascata(modelo_principal):
+    """
+    Mostra quanto da fala do lote precisou do modelo principal.
+    """
+    transcritos = _estatisticas["segundos_transcritos"]
+    if not cascata_ativa(modelo_principal) or transcritos <= 0:
+        return
+    refeitos = _estatisticas["segundos_refeitos"]
+    print(f"\n🪜 Cascata {CASCATA_MODELO_RASCUNHO} → {modelo_principal}: {formatar_duracao(refeitos)} de "
+          f"{formatar_duracao(transcritos)} ({refeitos / transcritos:.0%} da fala) refeitos com o modelo maior "
+          f"em {_estatisticas['trechos_refeitos']} {plural(_estatisticas['trechos_refeitos'], 'trecho', 'trechos')}")
@@ -0,0 +1,195 @@
+import json
+import os
+from pathlib import Path
+from src import arquivos_longos
+from src.utils import formatar_duracao
+
+
+# -------------------------------
+# Configurações dos checkpoints de transcrição
+# -------------------------------
+CHECKPOINT_ATIVADO = False  # Grava os segmentos em um diário parcial à medida que são decodificados (janelas independentes)
+
+CHECKPOINT_DURACAO_MINIMA = 10 * 60  # Áudios a partir desta duração (s) usam checkpoints
+
+CHECKPOINT_JANELA = 300.0  # Duração mínima (s) de cada janela gravada no diário
+
+CHECKPOINT_BUSCA_SILENCIO = 15.0  # Janela (s) após o mínimo onde se procura o ponto mais silencioso
+
+CHECKPOINT_CARACTERES_PROMPT = 800  # Final do texto anterior usado como prompt da janela seguinte
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_diario(nome_base):
+    """
+    Retorna o caminho do diário parcial: 'transcripts/{nome}.partial.jsonl'.
+    """
+    return obter_pasta_projeto() / "transcripts" / f"{Path(nome_base).stem}.partial.jsonl"
+
+
+def possui_diario(nome_base):
+    """
+    Indica se existe uma transcrição interrompida (diário pendente) para o arquivo.
+    """
+    return obter_caminho_diario(nome_base).exists()
+
+
+def descartar_diario(nome_base):
+    """
+    Remove o diário parcial depois que a transcrição completa foi salva.
+    """
+    obter_caminho_diario(nome_base).unlink(missing_ok=True)
+
+
+def obter_configuracao():
+    """
+    Retorna os parâmetros dos checkpoints que mudam o texto gerado (entram
+    na assinatura do cache de transcrições).
+    """
+    return {
+        "duracao_minima": CHECKPOINT_DURACAO_MINIMA,
+        "janela": CHECKPOINT_JANELA,
+        "busca_silencio": CHECKPOINT_BUSCA_SILENCIO,
+        "caracteres_prompt": CHECKPOINT_CARACTERES_PROMPT,
+    }
+
+
+def deve_usar_checkpoints(duracao_segundos):
+    """
+    Indica se um áudio com esta duração deve ser transcrito em janelas com diário.
+    """
+    return CHECKPOINT_ATIVADO and duracao_segundos >= CHECKPOINT_DURACAO_MINIMA
+
+
+def _ler_diario(caminho):
+    # Retorna (cabecalho, janelas); uma última linha truncada por queda é removida do arquivo
+    cabecalho = None
+    janelas = []
+    tamanho_valido = 0
+    with open(caminho, "rb") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                break
+            if not linha.endswith(b"\n"):
+                break
+            tamanho_valido += len(linha)
+            if registro.get("tipo") == "cabecalho":
+                cabecalho = registro["identificacao"]
+            elif registro.get("tipo") == "janela":
+                janelas.append(registro)
+    os.truncate(caminho, tamanho_valido)
+    return cabecalho, janelas
+
+
+def _gravar_registro(arquivo, registro):
+    # Cada janela concluída vai para o disco antes de decodificar a próxima
+    arquivo.write(json.dumps(registro, ensure_ascii=False, default=float) + "\n")
+    arquivo.flush()
+    os.fsync(arquivo.fileno())
+
+
+def _clips_da_janela(clip_timestamps, inicio, fim):
+    # Intersecta os trechos de fala do VAD com a janela, em tempo local (0 = início da janela)
+    if not clip_timestamps:
+        return [0.0, round(fim - inicio, 3)]
+    clips = []
+    for clip_inicio, clip_fim in zip(clip_timestamps[::2], clip_timestamps[1::2]):
+        clip_inicio = max(clip_inicio, inicio)
+        clip_fim = min(clip_fim, fim)
+        if clip_fim > clip_inicio:
+            clips.extend([round(clip_inicio - inicio, 3), round(clip_fim - inicio, 3)])
+    return clips
+
+
+def _prompt_da_janela(texto_anterior, parametros):
+    # Reproduz o condicionamento no texto anterior entre janelas independentes
+    if not parametros.get("condition_on_previous_text") or not texto_anterior.strip():
+        return parametros.get("initial_prompt")
+    return texto_anterior[-CHECKPOINT_CARACTERES_PROMPT:].strip()
+
+
+def transcrever_com_checkpoints(modelo, audio, nome_base, parametros, identificacao,
+                                verbose=False, taxa_amostragem=16000):
+    """
+    Transcreve o áudio em janelas cortadas em silêncios, gravando os
+    segmentos de cada janela no diário 'transcripts/{nome}.partial.jsonl'.
+
+    Se já houver um diário da mesma mídia e configuração ('identificacao'),
+    a transcrição é retomada a partir da última janela concluída, usando o
+    final do texto já transcrito como prompt.
+
+    Cada janela é transcrita a partir do seu próprio recorte do áudio (o
+    whisper calcula o espectrograma de toda a entrada a cada chamada), e os
+    tempos dos segmentos são levados de volta à linha do tempo original.
+
+    Retorna um dicionário no formato do whisper ("text", "segments", "language").
+    O diário só é removido por descartar_diario, depois de salvo o resultado.
+    """
+    caminho = obter_caminho_diario(nome_base)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    janelas_concluidas = []
+    if caminho.exists():
+        cabecalho, janelas_concluidas = _ler_diario(caminho)
+        if cabecalho != identificacao:
+            # Diário de outro conteúdo ou configuração: recomeça do zero
+            print("⚠️  Diário parcial de outra versão do arquivo, recomeçando")
+            janelas_concluidas = []
+            caminho.unlink()
+
+    cortes = arquivos_longos.calcular_pontos_de_corte(
+        audio, taxa_amostragem, CHECKPOINT_JANELA, CHECKPOINT_BUSCA_SILENCIO
+    )
+    offset = janelas_concluidas[-1]["fim"] if janelas_concluidas else 0.0
+    if janelas_concluidas:
+        print(f"⏯️  Retomando a partir de {formatar_duracao(offset)} "
+              f"({len(janelas_concluidas)} janelas já transcritas)")
+
+    segmentos = [segmento for janela in janelas_concluidas for segmento in janela["segmentos"]]
+    texto_anterior = "".join(segmento["text"] for segmento in segmentos)
+    clip_timestamps = parametros.get("clip_timestamps")
+
+    with open(caminho, "a", encoding="utf-8") as diario:
+        if not janelas_concluidas:
+            _gravar_registro(diario, {"tipo": "cabecalho", "identificacao": identificacao})
+
+        for inicio, fim in zip(cortes[:-1], cortes[1:]):
+            if fim <= offset:
+                continue
+            # Se os cortes recalculados diferirem dos gravados, a janela começa no último offset
+            inicio = max(inicio, offset)
+            clips = _clips_da_janela(clip_timestamps, inicio, fim)
+            segmentos_janela = []
+            if clips:
+                parametros_janela = dict(parametros)
+                parametros_janela["clip_timestamps"] = clips
+                parametros_janela["initial_prompt"] = _prompt_da_janela(texto_anterior, parametros)
+                recorte = audio[int(inicio * taxa_amostragem):int(fim * taxa_amostragem)]
+                resultado = modelo.transcribe(recorte, verbose=verbose, **parametros_janela)
+                segmentos_janela = [
+                    arquivos_longos.deslocar_segmento(segmento, inicio) for segmento in resultado["segments"]
+                ]
+            _gravar_registro(diario, {
+                "tipo": "janela",
+                "inicio": inicio,
+                "fim": fim,
+                "segmentos": segmentos_janela,
+            })
+            segmentos.extend(segmentos_janela)
+            texto_anterior += "".join(segmento["text"] for segmento in segmentos_janela)
+
+    for i, segmento in enumerate(segmentos):
+        segmento["id"] = i
+    return {
+        "text": "".join(segmento["text"] for segmento in segmentos),
+        "segments": segmentos,
+        "language": parametros.get("language"),
+    }
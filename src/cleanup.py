@@ -1,4 +1,7 @@
 from pathlib import Path
+from src import armazenamento_temp
+from src import cache_mel
+from src import checkpoints
 
 
 def limpar_audio(audio_path):
@@ -10,16 +13,30 @@ def limpar_audio(audio_path):
 
     Retorno:
       - True em caso de sucesso ou se 'audio_path' for None.
+
+    O áudio de uma transcrição interrompida (com diário parcial pendente)
+    é mantido para que a retomada não precise extraí-lo de novo.
     """
     if audio_path is None:
         return True
 
+    # Áudio mantido em memória (array NumPy) não possui arquivo para remover
+    if hasattr(audio_path, "dtype"):
+        return True
+
+    # Espectrograma em cache no lugar do áudio: nada foi extraído
+    if isinstance(audio_path, cache_mel.AudioEmCache):
+        return True
+
     if isinstance(audio_path, str):
         audio_path = Path(audio_path)
 
     if not isinstance(audio_path, Path):
         audio_path = Path(str(audio_path))
 
+    if checkpoints.possui_diario(audio_path.name):
+        return True
+
     try:
         # missing_ok evita erro se o arquivo não existir (Python 3.8+)
         audio_path.unlink(missing_ok=True)
@@ -31,21 +48,24 @@ def limpar_audio(audio_path):
 
 def limpar_temp_audios():
     """
-    Remove arquivos .wav dentro da pasta 'temp_audios' do projeto.
+    Remove os áudios extraídos (.wav, .flac e extrações incompletas) de
+    'temp_audios/' e da pasta de ARMAZENAMENTO_PASTA, exceto os de
+    transcrições interrompidas que ainda serão retomadas.
 
     Retorna o número de arquivos removidos.
     """
     try:
-        pasta_projeto = Path(__file__).parent.parent.absolute()
-        pasta_temp_audios = pasta_projeto / "temp_audios"
-        if not pasta_temp_audios.exists():
-            return 0
         arquivos_removidos = 0
-        for arquivo in pasta_temp_audios.glob("*.wav"):
-            if arquivo.is_file():
+        for pasta in armazenamento_temp.obter_pastas_para_limpeza():
+            for arquivo in armazenamento_temp.listar_audios(pasta):
+                if arquivo.suffix != ".tmp" and checkpoints.possui_diario(arquivo.name):
+                    continue
                 try:
                     arquivo.unlink()
                     arquivos_removidos += 1
+                except FileNotFoundError:
+                    # Já removido por outro processo
+                    pass
                 except Exception:
                     # Propaga exceção se não for possível remover um arquivo
                     raise
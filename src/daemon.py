@@ -0,0 +1,226 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from src import cache_transcricoes
+from src import formatos_saida
+from src import metricas
+from src import transcriber
+from src.list_videos import FORMATOS_VIDEO_SUPORTADOS
+from src.utils import formatar_duracao
+
+
+# -------------------------------
+# Configurações do modo daemon
+# -------------------------------
+DAEMON_TEMPO_ESTAVEL = 3.0  # Segundos sem mudança de tamanho/mtime para considerar a cópia concluída
+
+DAEMON_INTERVALO = 1.0  # Intervalo (s) entre verificações de estabilidade e do polling
+
+DAEMON_FORCAR_POLLING = False  # Ignora o inotify mesmo no Linux
+
+# Eventos do inotify (ver <sys/inotify.h>)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_CABECALHO_EVENTO = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+class _ObservadorInotify:
+    """
+    Observa uma pasta pelo inotify do Linux (via ctypes, sem dependências)
+    e devolve os nomes dos arquivos criados, gravados ou movidos para ela.
+    """
+
+    def __init__(self, pasta):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mascara = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(pasta), mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(erro, "inotify_add_watch falhou")
+
+    def aguardar(self, timeout):
+        nomes = set()
+        prontos, _, _ = select.select([self._fd], [], [], timeout)
+        if not prontos:
+            return nomes
+        while True:
+            try:
+                dados = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            posicao = 0
+            while posicao < len(dados):
+                _, _, _, tamanho = _CABECALHO_EVENTO.unpack_from(dados, posicao)
+                posicao += _CABECALHO_EVENTO.size
+                nome = dados[posicao:posicao + tamanho].rstrip(b"\0")
+                posicao += tamanho
+                if nome:
+                    nomes.add(os.fsdecode(nome))
+        return nomes
+
+    def fechar(self):
+        os.close(self._fd)
+
+
+class _ObservadorPolling:
+    """
+    Alternativa ao inotify: compara nome, tamanho e mtime das entradas da
+    pasta a cada intervalo e devolve os arquivos novos ou alterados.
+    """
+
+    def __init__(self, pasta):
+        self._pasta = pasta
+        self._estado = self._listar()
+
+    def _listar(self):
+        estado = {}
+        with os.scandir(self._pasta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file():
+                    info = entrada.stat()
+                    estado[entrada.name] = (info.st_size, info.st_mtime_ns)
+        return estado
+
+    def aguardar(self, timeout):
+        time.sleep(timeout)
+        estado = self._listar()
+        nomes = {nome for nome, chave in estado.items() if self._estado.get(nome) != chave}
+        self._estado = estado
+        return nomes
+
+    def fechar(self):
+        pass
+
+
+def criar_observador(pasta):
+    """
+    Retorna um observador inotify no Linux ou, se indisponível, um
+    observador por polling. Ambos expõem aguardar(timeout) e fechar().
+    """
+    if sys.platform.startswith("linux") and not DAEMON_FORCAR_POLLING:
+        try:
+            return _ObservadorInotify(pasta)
+        except (OSError, AttributeError):
+            # Limite de watches atingido ou libc sem inotify: usa polling
+            pass
+    return _ObservadorPolling(pasta)
+
+
+def _atualizar_pendentes(pendentes, pasta_videos, agora):
+    # Retorna os arquivos cujo tamanho e mtime ficaram estáveis por DAEMON_TEMPO_ESTAVEL
+    prontos = []
+    for nome, (tamanho, mtime_ns, desde, detectado) in list(pendentes.items()):
+        try:
+            info = (pasta_videos / nome).stat()
+        except FileNotFoundError:
+            del pendentes[nome]
+            continue
+        if (info.st_size, info.st_mtime_ns) != (tamanho, mtime_ns):
+            pendentes[nome] = (info.st_size, info.st_mtime_ns, agora, detectado)
+        elif info.st_size > 0 and agora - desde >= DAEMON_TEMPO_ESTAVEL:
+            prontos.append((nome, detectado))
+            del pendentes[nome]
+    return prontos
+
+
+def _processar_chegada(nome_video, detectado, assinatura):
+    # Transcreve um vídeo recém-chegado; retorna True/False ou None se já estava transcrito
+    status, origem = cache_transcricoes.consultar_status(nome_video, assinatura, formatos_saida.FORMATOS_SAIDA)
+    if status == cache_transcricoes.STATUS_TRANSCRITO:
+        transcriber.completar_saidas(nome_video)
+        return None
+    if status == cache_transcricoes.STATUS_REAPROVEITADO:
+        transcriber.completar_saidas(nome_video, origem)
+        print(f"♻️  {nome_video}: transcrição reaproveitada do mesmo conteúdo")
+        return None
+
+    print(f"\n🎬 Novo vídeo: {nome_video}")
+    try:
+        sucesso = transcriber.transcrever_video(nome_video)
+    except Exception as excecao:
+        # Um arquivo problemático não derruba o daemon
+        print(f"❌ {nome_video}: {type(excecao).__name__}: {excecao}")
+        sucesso = False
+    metricas.registrar_evento(
+        "daemon",
+        nome_video,
+        latencia_chegada=round(time.time() - detectado, 4),
+        sucesso=sucesso
+    )
+    if not sucesso:
+        print(f"❌ Falha ao transcrever: {nome_video}")
+    return sucesso
+
+
+def executar_daemon():
+    """
+    Modo sem interação: observa a pasta 'videos/' e transcreve cada vídeo
+    novo ou alterado assim que sua gravação termina, mantendo o modelo
+    carregado entre as chegadas. Encerra com Ctrl+C.
+
+    Na partida, os vídeos já presentes na pasta passam pela mesma
+    verificação do cache; depois, apenas os arquivos notificados são
+    examinados, sem varrer a pasta novamente.
+    """
+    pasta_videos = obter_pasta_projeto() / "videos"
+    pasta_videos.mkdir(parents=True, exist_ok=True)
+
+    transcriber.obter_modelo_transcricao()
+    assinatura = transcriber.obter_assinatura_configuracao()
+    observador = criar_observador(pasta_videos)
+    modo = "inotify" if isinstance(observador, _ObservadorInotify) else "polling"
+    print(f"👀 Observando 'videos/' ({modo}). Pressione Ctrl+C para encerrar.")
+
+    agora = time.time()
+    pendentes = {}
+    with os.scandir(pasta_videos) as entradas:
+        for entrada in entradas:
+            if entrada.is_file():
+                info = entrada.stat()
+                pendentes[entrada.name] = (info.st_size, info.st_mtime_ns, agora, agora)
+
+    transcritos = 0
+    falhas = 0
+    tempo_inicio = time.time()
+    try:
+        while True:
+            for nome in observador.aguardar(DAEMON_INTERVALO):
+                if Path(nome).suffix.lower() not in FORMATOS_VIDEO_SUPORTADOS:
+                    continue
+                if nome not in pendentes:
+                    # O tamanho inicial -1 força uma nova leitura antes de confiar na estabilidade
+                    pendentes[nome] = (-1, -1, time.time(), time.time())
+
+            for nome, detectado in _atualizar_pendentes(pendentes, pasta_videos, time.time()):
+                if Path(nome).suffix.lower() not in FORMATOS_VIDEO_SUPORTADOS:
+                    continue
+                sucesso = _processar_chegada(nome, detectado, assinatura)
+                if sucesso:
+                    transcritos += 1
+                elif sucesso is False:
+                    falhas += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observador.fechar()
+        print(f"\n🛑 Daemon encerrado após {formatar_duracao(time.time() - tempo_inicio)}: "
+              f"{transcritos} transcritos, {falhas} com falha")
+    return falhas == 0
@@ -0,0 +1,301 @@
+import time
+import numpy as np
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE
+from whisper.decoding import DecodingOptions
+from whisper.tokenizer import get_tokenizer
+from src import cache_mel
+from src import fallback
+from src import indice_midias
+from src import vad
+from src.utils import Estatisticas, formatar_duracao, plural
+
+
+# -------------------------------
+# Configurações da decodificação em lote
+# -------------------------------
+LOTE_ATIVADO = False  # Decodifica janelas de 30 s de vários arquivos juntas, em lotes no encoder/decoder
+
+LOTE_TAMANHO = 8  # Janelas de 30 s por lote (mais janelas aproveitam melhor a CPU, com mais memória)
+
+LOTE_ARQUIVOS = 4  # Áudios já extraídos reunidos em uma mesma rodada de decodificação do pipeline
+
+LOTE_JANELA_MINIMA = 20.0  # Duração mínima (s) de uma janela; o corte é feito no ponto mais silencioso até 30 s
+
+_DURACAO_JANELA = N_FRAMES * HOP_LENGTH / SAMPLE_RATE  # 30 s
+_PRECISAO_TEMPO = 2 * HOP_LENGTH / SAMPLE_RATE  # 0,02 s por token de tempo
+
+# Opções que precisam ser iguais em todas as janelas de um lote
+_CHAVES_LOTE = (
+    "language", "initial_prompt", "temperature", "beam_size", "best_of", "patience", "length_penalty",
+    "suppress_tokens", "suppress_blank", "max_initial_timestamp", "fp16",
+    "compression_ratio_threshold", "logprob_threshold", "no_speech_threshold",
+)
+
+# Totais acumulados no processo atual
+_estatisticas = Estatisticas({"segundos_audio": 0.0, "tempo_decodificacao": 0.0, "janelas": 0, "lotes": 0})
+
+
+def _calcular_energia(audio, n_mels, taxa_amostragem):
+    # Energia por quadro para escolher os cortes; com o espectrograma em cache
+    # (src/cache_mel.py), é a média do log-mel de cada quadro de 10 ms
+    mel = cache_mel.obter_mel(audio, n_mels)
+    if mel is None:
+        return vad.calcular_energia_db(audio, taxa_amostragem)
+    return mel.float().mean(dim=0).numpy(), HOP_LENGTH
+
+
+def planejar_janelas(audio, clip_timestamps=None, taxa_amostragem=16000, n_mels=80):
+    """
+    Divide o áudio (ou só os trechos de 'clip_timestamps', da detecção de
+    voz) em janelas de até 30 s, cortando no ponto de menor energia entre
+    LOTE_JANELA_MINIMA e 30 s para não partir palavras ao meio.
+
+    Retorna a lista de janelas (inicio, fim) em segundos.
+    """
+    duracao_total = len(audio) / taxa_amostragem
+    if clip_timestamps:
+        trechos = list(zip(clip_timestamps[::2], clip_timestamps[1::2]))
+        if len(clip_timestamps) % 2:
+            trechos.append((clip_timestamps[-1], duracao_total))
+    else:
+        trechos = [(0.0, duracao_total)]
+
+    energia_db, amostras_por_quadro = _calcular_energia(audio, n_mels, taxa_amostragem)
+    duracao_quadro = amostras_por_quadro / taxa_amostragem
+
+    janelas = []
+    for inicio, fim_trecho in trechos:
+        fim_trecho = min(fim_trecho, duracao_total)
+        while fim_trecho - inicio > _DURACAO_JANELA:
+            inicio_busca = int(np.ceil((inicio + LOTE_JANELA_MINIMA) / duracao_quadro))
+            fim_busca = int((inicio + _DURACAO_JANELA) / duracao_quadro)
+            busca = energia_db[inicio_busca:fim_busca]
+            if busca.size:
+                corte = (inicio_busca + int(np.argmin(busca))) * duracao_quadro
+            else:
+                corte = inicio + _DURACAO_JANELA
+            janelas.append((inicio, corte))
+            inicio = corte
+        if fim_trecho > inicio:
+            janelas.append((inicio, fim_trecho))
+    return janelas
+
+
+def _calcular_mel(audio, inicio, fim, n_mels, taxa_amostragem):
+    # Mesmo preparo do whisper.transcribe: mel com 30 s de silêncio no fim, cortado e completado até 3000 quadros
+    mel_completo = cache_mel.obter_mel(audio, n_mels)
+    if mel_completo is not None:
+        # Espectrograma em cache: a janela é recortada dele, como faz o whisper.transcribe
+        quadro_inicial = round(inicio * SAMPLE_RATE / HOP_LENGTH)
+        quadros = min(N_FRAMES, round((fim - inicio) * SAMPLE_RATE / HOP_LENGTH))
+        return whisper.pad_or_trim(mel_completo[:, quadro_inicial:quadro_inicial + quadros].float(), N_FRAMES)
+    trecho = np.ascontiguousarray(audio[int(inicio * taxa_amostragem):int(fim * taxa_amostragem)])
+    mel = whisper.log_mel_spectrogram(trecho, n_mels, padding=N_SAMPLES)
+    quadros = min(N_FRAMES, len(trecho) // HOP_LENGTH)
+    return whisper.pad_or_trim(mel[:, :quadros], N_FRAMES)
+
+
+def _criar_opcoes(parametros, temperatura):
+    # Mesmas regras do whisper.transcribe: busca em feixe só na temperatura 0, amostragem só acima dela
+    opcoes = {
+        "task": "transcribe",
+        "language": parametros.get("language"),
+        "temperature": temperatura,
+        "length_penalty": parametros.get("length_penalty"),
+        "prompt": parametros.get("initial_prompt"),
+        "suppress_tokens": parametros.get("suppress_tokens", "-1"),
+        "suppress_blank": parametros.get("suppress_blank", True),
+        "max_initial_timestamp": parametros.get("max_initial_timestamp", 1.0),
+        "fp16": parametros.get("fp16", False),
+    }
+    if temperatura > 0:
+        opcoes["best_of"] = parametros.get("best_of")
+    else:
+        opcoes["beam_size"] = parametros.get("beam_size")
+        opcoes["patience"] = parametros.get("patience")
+    return DecodingOptions(**opcoes)
+
+
+def _decodificar_lote(modelo, mels, parametros):
+    # Decodifica as janelas juntas; as que falham nos limiares voltam, também juntas, na temperatura seguinte
+    import torch
+
+    resultados = [None] * len(mels)
+    pendentes = list(range(len(mels)))
+    with torch.no_grad():
+        # O encoder roda uma única vez para o lote inteiro; o decoder recebe as características prontas
+        caracteristicas = modelo.embed_audio(torch.stack(mels).to(modelo.device))
+    for temperatura in fallback.escada(parametros):
+        opcoes = _criar_opcoes(parametros, temperatura)
+        if (opcoes.beam_size or opcoes.best_of or 1) > 1:
+            # O decode do whisper não replica as características por candidato quando
+            # há mais de uma janela: com feixe ou best_of, o decoder roda janela a janela
+            saidas = [modelo.decode(caracteristicas[i:i + 1], opcoes)[0] for i in pendentes]
+        else:
+            saidas = modelo.decode(caracteristicas[pendentes], opcoes)
+        for i, saida in zip(pendentes, saidas):
+            resultados[i] = saida
+        pendentes = [i for i in pendentes if fallback.obter_motivo_fallback(resultados[i], parametros) is not None]
+        if not pendentes:
+            break
+    return resultados
+
+
+def _sem_fala(resultado, parametros):
+    # Mesmo critério do whisper.transcribe para pular uma janela sem voz
+    limiar_sem_fala = parametros.get("no_speech_threshold")
+    limiar_logprob = parametros.get("logprob_threshold")
+    if limiar_sem_fala is None or resultado.no_speech_prob <= limiar_sem_fala:
+        return False
+    return limiar_logprob is None or resultado.avg_logprob <= limiar_logprob
+
+
+def _novo_segmento(tokens, inicio, fim, resultado, tokenizador, seek):
+    texto = tokenizador.decode([token for token in tokens if token < tokenizador.eot])
+    return {
+        "seek": seek,
+        "start": inicio,
+        "end": fim,
+        "text": texto,
+        "tokens": list(tokens),
+        "temperature": resultado.temperature,
+        "avg_logprob": resultado.avg_logprob,
+        "compression_ratio": resultado.compression_ratio,
+        "no_speech_prob": resultado.no_speech_prob,
+    }
+
+
+def extrair_segmentos(resultado, inicio, fim, tokenizador):
+    """
+    Converte a decodificação de uma janela (inicio, fim) em segmentos do
+    whisper, separados pelos pares de tokens de tempo.
+
+    Diferente do whisper.transcribe, que descarta o último segmento
+    incompleto e volta a decodificar a partir dele, aqui ele é mantido até o
+    fim da janela: as janelas já foram cortadas em pontos de silêncio.
+    """
+    tokens = list(resultado.tokens)
+    base = tokenizador.timestamp_begin
+    seek = round(inicio * SAMPLE_RATE / HOP_LENGTH)
+    limite = fim - inicio
+
+    def tempo(token):
+        return inicio + min(max(0, token - base) * _PRECISAO_TEMPO, limite)
+
+    eh_tempo = [token >= base for token in tokens]
+    cortes = [i for i in range(1, len(tokens)) if eh_tempo[i - 1] and eh_tempo[i]]
+    final_com_tempo = eh_tempo[-2:] == [False, True]
+    if final_com_tempo:
+        cortes.append(len(tokens))
+
+    segmentos = []
+    anterior = 0
+    for corte in cortes:
+        fatia = tokens[anterior:corte]
+        segmentos.append(_novo_segmento(fatia, tempo(fatia[0]), tempo(fatia[-1]), resultado, tokenizador, seek))
+        anterior = corte
+
+    restante = tokens[anterior:]
+    if any(not marcado for marcado in eh_tempo[anterior:]):
+        # Texto sem o token de tempo final: vai até o último tempo visto ou até o fim da janela
+        inicio_restante = tempo(restante[0]) if restante[0] >= base else inicio
+        tempos = [token for token in restante[1:] if token >= base]
+        fim_restante = tempo(tempos[-1]) if tempos and tempo(tempos[-1]) > inicio_restante else fim
+        segmentos.append(_novo_segmento(restante, inicio_restante, fim_restante, resultado, tokenizador, seek))
+    return [segmento for segmento in segmentos if segmento["text"].strip()]
+
+
+def _chave_lote(parametros):
+    return tuple(repr(parametros.get(chave)) for chave in _CHAVES_LOTE)
+
+
+def transcrever_em_lote(modelo, itens, taxa_amostragem=16000):
+    """
+    Transcreve vários áudios juntos: as janelas de 30 s de todos eles são
+    decodificadas em lotes de LOTE_TAMANHO no encoder e no decoder, e cada
+    saída volta para o arquivo de origem.
+
+    - itens: lista de (audio, parametros), com o idioma já definido nos
+      parâmetros; janelas com opções de decodificação diferentes não
+      dividem o mesmo lote
+    - taxa_amostragem: taxa dos arrays de áudio
+
+    Não há condicionamento no texto anterior (as janelas de um arquivo são
+    decodificadas ao mesmo tempo) nem tempos por palavra.
+
+    Retorna uma lista de resultados no formato do whisper, na ordem dos itens.
+    """
+    janelas = []
+    for indice, (audio, parametros) in enumerate(itens):
+        janelas_item = planejar_janelas(audio, parametros.get("clip_timestamps"), taxa_amostragem, modelo.dims.n_mels)
+        for inicio, fim in janelas_item:
+            janelas.append((indice, inicio, fim))
+
+    grupos = {}
+    for janela in janelas:
+        grupos.setdefault(_chave_lote(itens[janela[0]][1]), []).append(janela)
+
+    segmentos_por_item = [[] for _ in itens]
+    for janelas_grupo in grupos.values():
+        parametros = itens[janelas_grupo[0][0]][1]
+        tokenizador = get_tokenizer(
+            modelo.is_multilingual,
+            num_languages=modelo.num_languages,
+            language=parametros.get("language"),
+            task="transcribe"
+        )
+        for inicio_lote in range(0, len(janelas_grupo), max(1, LOTE_TAMANHO)):
+            lote = janelas_grupo[inicio_lote:inicio_lote + max(1, LOTE_TAMANHO)]
+            tempo_inicio = time.perf_counter()
+            mels = [
+                _calcular_mel(itens[indice][0], inicio, fim, modelo.dims.n_mels, taxa_amostragem)
+                for indice, inicio, fim in lote
+            ]
+            resultados = _decodificar_lote(modelo, mels, parametros)
+            for (indice, inicio, fim), resultado in zip(lote, resultados):
+                if _sem_fala(resultado, parametros):
+                    continue
+                segmentos_por_item[indice].extend(extrair_segmentos(resultado, inicio, fim, tokenizador))
+            _estatisticas["tempo_decodificacao"] += time.perf_counter() - tempo_inicio
+            _estatisticas["segundos_audio"] += sum(fim - inicio for _, inicio, fim in lote)
+            _estatisticas["janelas"] += len(lote)
+            _estatisticas["lotes"] += 1
+
+    saidas = []
+    for (_, parametros), segmentos in zip(itens, segmentos_por_item):
+        segmentos.sort(key=lambda segmento: segmento["start"])
+        for i, segmento in enumerate(segmentos):
+            segmento["id"] = i
+        saidas.append({
+            "text": "".join(segmento["text"] for segmento in segmentos),
+            "segments": segmentos,
+            "language": parametros.get("language"),
+        })
+    return saidas
+
+
+registrar_estatisticas = _estatisticas.registrar
+obter_estatisticas = _estatisticas.obter
+somar_estatisticas = _estatisticas.somar
+
+
+def exibir_relatorio_lote(modelo=None):
+    """
+    Mostra a vazão da decodificação em lote (horas de áudio por hora de
+    parede) e, havendo histórico nas métricas, a compara com a da
+    transcrição um arquivo por vez.
+    """
+    if not _estatisticas["lotes"] or _estatisticas["tempo_decodificacao"] <= 0:
+        return
+    vazao = _estatisticas["segundos_audio"] / _estatisticas["tempo_decodificacao"]
+    lotes = _estatisticas["lotes"]
+    print(f"\n📦 Decodificação em lote: {_estatisticas['janelas']} janelas em {lotes} "
+          f"{plural(lotes, 'lote', 'lotes')} ({formatar_duracao(_estatisticas['segundos_audio'])} de áudio "
+          f"em {formatar_duracao(_estatisticas['tempo_decodificacao'])})")
+    linha = f"   ⚡ Vazão: {vazao:.2f} h de áudio por hora"
+    fator_serial = indice_midias.obter_fator_tempo_real_historico(modelo, incluir_extracao=False, incluir_lote=False)
+    if fator_serial:
+        vazao_serial = 1 / fator_serial
+        linha += f" (um arquivo por vez: {vazao_serial:.2f} h/h, {vazao / vazao_serial:.1f}x)"
+    print(linha)
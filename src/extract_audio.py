@@ -1,13 +1,34 @@
+import json
 import subprocess
+import threading
+import wave
 from pathlib import Path
+import numpy as np
+from src import armazenamento_temp
+from src import checkpoints
+from src import indice_midias
+from src import metricas
 
 
 # Configurações de áudio usadas na extração
+# (pasta, formato e limite de espaço dos arquivos ficam em src/armazenamento_temp.py)
 AUDIO_SAMPLE_RATE = 16000  # taxa de amostragem (Hz)
 AUDIO_CHANNELS = 1         # mono
-AUDIO_FORMAT = "wav"     # formato do arquivo de saída
 AUDIO_CODEC = "pcm_s16le"  # codec para WAV PCM 16-bit
 
+# Tempo limite do FFmpeg proporcional à duração da mídia
+EXTRACAO_TEMPO_LIMITE_MINIMO = 120  # Segundos, para mídias curtas
+EXTRACAO_SEGUNDOS_POR_HORA = 300  # Segundos de limite acrescentados por hora de mídia
+EXTRACAO_TEMPO_LIMITE_PADRAO = 1800  # Segundos, quando a duração é desconhecida
+
+_CODECS = {"wav": AUDIO_CODEC, "flac": "flac"}
+
+# Modo em memória: lê o PCM direto da saída do FFmpeg, sem gravar o WAV temporário
+AUDIO_EM_MEMORIA = False
+AUDIO_FORMATO_MEMORIA = "f32le"  # formato bruto lido do stdout ("f32le" ou "s16le")
+
+_TAMANHO_LEITURA = 1024 * 1024  # bytes lidos por vez do stdout do FFmpeg
+
 
 def obter_pasta_projeto():
     """
@@ -16,27 +37,47 @@ def obter_pasta_projeto():
     return Path(__file__).parent.parent.absolute()
 
 
-def extrair_audio(video_path, audio_path):
+def calcular_tempo_limite(duracao):
+    """
+    Retorna o tempo máximo (s) de uma execução do FFmpeg para uma mídia de
+    'duracao' segundos (ou None, se desconhecida).
+    """
+    if not duracao:
+        return EXTRACAO_TEMPO_LIMITE_PADRAO
+    return max(EXTRACAO_TEMPO_LIMITE_MINIMO, duracao / 3600 * EXTRACAO_SEGUNDOS_POR_HORA)
+
+
+def extrair_audio(video_path, audio_path, duracao=None):
     """
     Usa o ffmpeg para extrair a faixa de áudio de um arquivo de vídeo.
 
     Parâmetros:
       - video_path: Path para o arquivo de vídeo de entrada.
-      - audio_path: Path para salvar o arquivo de áudio de saída.
+      - audio_path: Path para salvar o arquivo de áudio de saída; a extensão
+        (.wav ou .flac) define o formato.
+      - duracao: duração da mídia (s), usada para o tempo limite do FFmpeg.
+
+    O áudio é gravado em um arquivo temporário e renomeado ao final, então
+    'audio_path' só existe quando está completo.
 
     Retorna True se a extração for bem-sucedida e o arquivo gerado tiver conteúdo.
     """
     audio_path.parent.mkdir(parents=True, exist_ok=True)
-    
+    formato = audio_path.suffix.lstrip(".")
+    temporario = audio_path.with_name(f"{audio_path.name}.tmp")
+
     comando = [
         "ffmpeg",
+        "-nostdin",
         "-i", str(video_path),
         "-vn",  # desativa fluxo de vídeo
-        "-acodec", AUDIO_CODEC,
+        "-acodec", _CODECS[formato],
+        "-sample_fmt", "s16",
         "-ar", str(AUDIO_SAMPLE_RATE),
         "-ac", str(AUDIO_CHANNELS),
+        "-f", formato,
         "-y",  # sobrescreve sem perguntar
-        str(audio_path)
+        str(temporario)
     ]
 
     try:
@@ -44,38 +85,228 @@ def extrair_audio(video_path, audio_path):
             comando,
             capture_output=True,
             text=True,
-            timeout=600
+            timeout=calcular_tempo_limite(duracao)
         )
 
         # Verifica retorno do ffmpeg e se o arquivo foi criado com tamanho > 0
-        if resultado.returncode == 0:
-            if audio_path.exists() and audio_path.stat().st_size > 0:
-                return True
-            else:
-                return False
-        else:
-            return False
+        if resultado.returncode == 0 and temporario.exists() and temporario.stat().st_size > 0:
+            temporario.replace(audio_path)
+            return True
+        return False
     except Exception:
         # Propaga exceção para o chamador lidar com falhas inesperadas
         raise
+    finally:
+        temporario.unlink(missing_ok=True)
+
+
+def obter_duracao_midia(video_path):
+    """
+    Consulta a duração (em segundos) de um arquivo de mídia usando o ffprobe.
+
+    Retorna a duração como float ou None se não for possível determiná-la.
+    """
+    comando = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "json",
+        str(video_path)
+    ]
+    try:
+        resultado = subprocess.run(comando, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if resultado.returncode != 0:
+        return None
+    try:
+        duracao = float(json.loads(resultado.stdout)["format"]["duration"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    return duracao if duracao > 0 else None
+
+
+def extrair_audio_para_memoria(video_path, duracao=None):
+    """
+    Usa o ffmpeg para decodificar a faixa de áudio direto para um array NumPy.
+
+    O PCM é lido do stdout do ffmpeg para um buffer pré-alocado a partir da
+    duração informada pelo ffprobe, evitando o WAV em disco e a segunda
+    decodificação que o whisper faria ao abrir o arquivo.
+
+    Se a duração já tiver sido consultada, pode ser informada em 'duracao'.
+
+    Retorna um array float32 mono em AUDIO_SAMPLE_RATE ou None em caso de falha.
+    """
+    if AUDIO_FORMATO_MEMORIA == "s16le":
+        dtype = np.int16
+    else:
+        dtype = np.float32
+
+    comando = [
+        "ffmpeg",
+        "-nostdin",
+        "-i", str(video_path),
+        "-vn",
+        "-f", AUDIO_FORMATO_MEMORIA,
+        "-acodec", f"pcm_{AUDIO_FORMATO_MEMORIA}",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-ac", str(AUDIO_CHANNELS),
+        "-"
+    ]
+
+    # Pré-aloca o buffer com folga de 1 segundo; cresce se a duração for imprecisa
+    if duracao is None:
+        duracao = obter_duracao_midia(video_path)
+    amostras_previstas = int((duracao or 60.0) * AUDIO_SAMPLE_RATE) + AUDIO_SAMPLE_RATE
+    buffer = np.empty(amostras_previstas * AUDIO_CHANNELS, dtype=dtype)
+    bytes_lidos = 0
+
+    processo = subprocess.Popen(
+        comando,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    # Mesmo limite de tempo da extração em arquivo
+    temporizador = threading.Timer(calcular_tempo_limite(duracao), processo.kill)
+    temporizador.start()
+    try:
+        while True:
+            destino = memoryview(buffer).cast("B")
+            if bytes_lidos == destino.nbytes:
+                buffer = np.resize(buffer, buffer.size * 2)
+                destino = memoryview(buffer).cast("B")
+            lidos = processo.stdout.readinto(destino[bytes_lidos:bytes_lidos + _TAMANHO_LEITURA])
+            if not lidos:
+                break
+            bytes_lidos += lidos
+        processo.wait()
+    finally:
+        temporizador.cancel()
+        processo.stdout.close()
+        if processo.poll() is None:
+            processo.kill()
+            processo.wait()
+
+    if processo.returncode != 0:
+        return None
+
+    amostras = bytes_lidos // buffer.itemsize
+    if amostras == 0:
+        return None
+    audio = buffer[:amostras]
+    if dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio
+
+
+def carregar_wav(audio_path):
+    """
+    Lê um WAV PCM 16-bit gerado por extrair_audio para um array float32
+    no intervalo [-1, 1], sem chamar o ffmpeg novamente.
+    """
+    with wave.open(str(audio_path), "rb") as arquivo_wav:
+        quadros = arquivo_wav.readframes(arquivo_wav.getnframes())
+    return np.frombuffer(quadros, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def carregar_audio_extraido(audio_path):
+    """
+    Lê um áudio gravado por extrair_audio para um array float32: o WAV é lido
+    direto; o FLAC é decodificado pelo FFmpeg para a memória.
+
+    Lança RuntimeError se o FLAC não puder ser decodificado.
+    """
+    if audio_path.suffix == ".wav":
+        return carregar_wav(audio_path)
+    audio = extrair_audio_para_memoria(audio_path)
+    if audio is None:
+        raise RuntimeError(f"não foi possível decodificar {audio_path.name}")
+    return audio
+
+
+def audio_completo(audio_path):
+    """
+    Verifica se um áudio extraído foi gravado até o fim. Extrações atuais
+    só aparecem com o nome final quando concluídas; em WAVs antigos, o
+    FFmpeg só preenche o tamanho dos dados no cabeçalho ao concluir.
+    """
+    if audio_path.suffix != ".wav":
+        return audio_path.exists() and audio_path.stat().st_size > 0
+    try:
+        with wave.open(str(audio_path), "rb") as arquivo_wav:
+            bytes_dados = arquivo_wav.getnframes() * arquivo_wav.getsampwidth() * arquivo_wav.getnchannels()
+    except (OSError, EOFError, wave.Error):
+        return False
+    return 0 < bytes_dados <= audio_path.stat().st_size
+
+
+def obter_audio_do_video(nome_video, parada=None):
+    """
+    Extrai o áudio de um vídeo da pasta 'videos/' no modo configurado:
+    em memória (AUDIO_EM_MEMORIA) ou em arquivo no armazenamento temporário
+    (WAV ou FLAC, em 'temp_audios/' ou na pasta de ARMAZENAMENTO_PASTA).
+
+    O arquivo de uma transcrição interrompida (com diário parcial) é
+    reaproveitado. Antes de gravar, aguarda espaço no armazenamento
+    temporário (até 'parada', um threading.Event, ser acionada). As etapas
+    de consulta (ffprobe) e extração são registradas nas métricas.
+
+    Retorna (True, audio) onde 'audio' é um array NumPy ou o Path do arquivo,
+    ou (False, None) em falha.
+    """
+    video_path = obter_pasta_projeto() / "videos" / nome_video
+    if not video_path.exists():
+        return False, None
+
+    modo = "memoria" if AUDIO_EM_MEMORIA else armazenamento_temp.obter_formato()
+    audio_path = None if AUDIO_EM_MEMORIA else armazenamento_temp.obter_caminho_audio(nome_video)
+    if audio_path is not None and checkpoints.possui_diario(nome_video) and audio_completo(audio_path):
+        metricas.registrar_evento("extract", nome_video, modo=modo, reaproveitado=True,
+                                  bytes_temp=audio_path.stat().st_size)
+        return True, audio_path
+
+    # Duração pelo índice de mídias: define o tempo limite do FFmpeg,
+    # o buffer em memória e o espaço reservado no armazenamento
+    with metricas.medir_etapa("probe", nome_video) as dados:
+        duracao = indice_midias.obter_duracao(video_path)
+        dados["duracao_audio"] = duracao
+        dados["sucesso"] = duracao is not None
+
+    with metricas.medir_etapa("extract", nome_video, modo=modo, duracao_audio=duracao) as dados:
+        if AUDIO_EM_MEMORIA:
+            audio = extrair_audio_para_memoria(video_path, duracao)
+            sucesso = audio is not None
+            dados["bytes_temp"] = 0
+            dados["bytes_memoria"] = audio.nbytes if sucesso else 0
+        else:
+            with armazenamento_temp.reservar_espaco(armazenamento_temp.estimar_bytes(duracao), parada) as espera:
+                dados["espera_espaco"] = round(espera, 4)
+                sucesso = extrair_audio(video_path, audio_path, duracao)
+            audio = audio_path if sucesso else None
+            dados["bytes_temp"] = audio.stat().st_size if sucesso else 0
+            if sucesso and duracao is None and modo == "wav":
+                # Sem ffprobe: a duração sai do tamanho do PCM 16-bit gravado
+                dados["duracao_audio"] = dados["bytes_temp"] / (2 * AUDIO_CHANNELS * AUDIO_SAMPLE_RATE)
+        dados["sucesso"] = sucesso
+
+    if not sucesso:
+        return False, None
+    return True, audio
 
 
 def extrair_audio_do_video(nome_video):
     """
     Conveniência: recebe o nome do arquivo de vídeo na pasta 'videos/'
-    e tenta extrair o áudio para 'temp_audios/' retornando o caminho.
+    e tenta extrair o áudio para o armazenamento temporário retornando o caminho.
 
     Retorna (True, caminho_arquivo) em sucesso ou (False, None) em falha.
     """
-    pasta_projeto = obter_pasta_projeto()
-    pasta_videos = pasta_projeto / "videos"
-    pasta_audios = pasta_projeto / "temp_audios"
-    video_path = pasta_videos / nome_video
-    nome_base = Path(nome_video).stem
+    video_path = obter_pasta_projeto() / "videos" / nome_video
     if not video_path.exists():
         return False, None
-    audio_path = pasta_audios / f"{nome_base}.{AUDIO_FORMAT}"
-    sucesso = extrair_audio(video_path, audio_path)
+    audio_path = armazenamento_temp.obter_caminho_audio(nome_video)
+    sucesso = extrair_audio(video_path, audio_path, indice_midias.obter_duracao(video_path))
     if sucesso:
         return True, audio_path
     else:
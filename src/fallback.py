@@ -0,0 +1,323 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from src.utils import Estatisticas, formatar_duracao
+
+
+# -------------------------------
+# Configurações da telemetria e da política de fallback de temperatura
+# -------------------------------
+FALLBACK_ADAPTATIVO = False  # Ajusta escada de temperaturas e limiares pelo histórico gravado em 'cache/'
+
+FALLBACK_ORCAMENTO_POR_MINUTO = 20.0  # Modo adaptativo: segundos de decodificação por minuto de áudio
+
+FALLBACK_MIN_OBSERVACOES = 20  # Tentativas mínimas no histórico antes de ajustar algo
+
+FALLBACK_TAXA_MINIMA_RESGATE = 0.1  # Temperaturas/motivos que resgatam menos que isto são cortados/relaxados
+
+FALLBACK_PASSO_LOGPROB = 0.2  # Quanto o LOGPROB_THRESHOLD é relaxado a cada ajuste
+FALLBACK_LIMITE_LOGPROB = -1.5  # Valor mínimo que o ajuste pode atingir
+
+FALLBACK_PASSO_COMPRESSAO = 0.2  # Quanto o COMPRESSION_RATIO_THRESHOLD é relaxado a cada ajuste
+FALLBACK_LIMITE_COMPRESSAO = 2.8  # Valor máximo que o ajuste pode atingir
+
+# Totais acumulados no processo atual
+_estatisticas = Estatisticas({
+    "janelas": 0,
+    "recodificacoes": 0,
+    "recodificacoes_evitadas": 0,
+    "tempo_decodificacao": 0.0,
+    "tempo_recodificacoes": 0.0,
+})
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_historico():
+    """
+    Retorna o caminho do histórico de fallbacks (SQLite) dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "fallback.db"
+
+
+@contextmanager
+def _conectar():
+    # Abre o histórico criando a tabela na primeira execução; confirma e fecha ao sair
+    conexao = sqlite3.connect(obter_caminho_historico(), timeout=30)
+    try:
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS contadores ("
+            " grupo TEXT NOT NULL,"
+            " chave TEXT NOT NULL,"
+            " valor NUMERIC NOT NULL,"
+            " PRIMARY KEY (grupo, chave))"
+        )
+        yield conexao
+        conexao.commit()
+    finally:
+        conexao.close()
+
+
+def _chave_temperatura(temperatura):
+    return f"{float(temperatura):.2f}"
+
+
+def escada(parametros):
+    """Retorna as temperaturas de decodificação configuradas, em ordem."""
+    temperatura = parametros.get("temperature", 0.0)
+    if isinstance(temperatura, (int, float)):
+        return (float(temperatura),)
+    return tuple(float(t) for t in temperatura)
+
+
+def obter_motivo_fallback(resultado, parametros):
+    """
+    Aplica a uma decodificação o mesmo critério de needs_fallback do
+    whisper.transcribe. Retorna o motivo ("compressao" ou "logprob") ou None.
+    """
+    limiar_compressao = parametros.get("compression_ratio_threshold")
+    limiar_logprob = parametros.get("logprob_threshold")
+    limiar_sem_fala = parametros.get("no_speech_threshold")
+    motivo = None
+    if limiar_compressao is not None and resultado.compression_ratio > limiar_compressao:
+        motivo = "compressao"
+    elif limiar_logprob is not None and resultado.avg_logprob < limiar_logprob:
+        motivo = "logprob"
+    if (limiar_sem_fala is not None and limiar_logprob is not None
+            and resultado.no_speech_prob > limiar_sem_fala and resultado.avg_logprob < limiar_logprob):
+        motivo = None
+    return motivo
+
+
+def novos_contadores():
+    """
+    Retorna o dicionário de contadores de um arquivo.
+    """
+    return {
+        "janelas": 0,
+        "recodificacoes": 0,
+        "recodificacoes_evitadas": 0,
+        "tempo_decodificacao": 0.0,
+        "tempo_recodificacoes": 0.0,
+        "por_temperatura": {},
+        "motivos": {},
+        "resgates": {},
+        "resgates_por_motivo": {},
+        "orcamento_esgotado": False,
+    }
+
+
+def _somar(dicionario, chave, valor=1):
+    dicionario[chave] = dicionario.get(chave, 0) + valor
+
+
+@contextmanager
+def monitorar_decodificacao(modelo, parametros, orcamento_segundos=None):
+    """
+    Intercepta cada chamada de modelo.decode feita pelo whisper.transcribe
+    e conta janelas, recodificações por temperatura, seus motivos
+    (compressão ou logprob), quantas resgataram a janela e o tempo gasto.
+
+    Com 'orcamento_segundos', recodificações que estourariam o orçamento
+    de tempo do arquivo não são executadas: a tentativa anterior é
+    devolvida de novo e o whisper fica com ela.
+
+    Entrega o dicionário de contadores do arquivo.
+    """
+    contadores = novos_contadores()
+    primeira_temperatura = escada(parametros)[0]
+    decodificar = modelo.decode
+    estado = {"anterior": None, "motivo": None}
+
+    def decodificar_monitorado(segmento, opcoes):
+        recodificacao = opcoes.temperature != primeira_temperatura
+        if (recodificacao and orcamento_segundos is not None and estado["anterior"] is not None
+                and contadores["tempo_decodificacao"] >= orcamento_segundos):
+            contadores["orcamento_esgotado"] = True
+            contadores["recodificacoes_evitadas"] += 1
+            return estado["anterior"]
+
+        inicio = time.perf_counter()
+        resultado = decodificar(segmento, opcoes)
+        tempo = time.perf_counter() - inicio
+        if isinstance(resultado, list):
+            # Lote de janelas: fora do fluxo do transcribe, não contabiliza
+            return resultado
+
+        contadores["tempo_decodificacao"] += tempo
+        _somar(contadores["por_temperatura"], _chave_temperatura(opcoes.temperature))
+        motivo = obter_motivo_fallback(resultado, parametros)
+        if recodificacao:
+            contadores["recodificacoes"] += 1
+            contadores["tempo_recodificacoes"] += tempo
+            if motivo is None:
+                _somar(contadores["resgates"], _chave_temperatura(opcoes.temperature))
+                if estado["motivo"] is not None:
+                    _somar(contadores["resgates_por_motivo"], estado["motivo"])
+        else:
+            contadores["janelas"] += 1
+            if motivo is not None:
+                _somar(contadores["motivos"], motivo)
+                estado["motivo"] = motivo
+        estado["anterior"] = resultado
+        return resultado
+
+    modelo.decode = decodificar_monitorado
+    try:
+        yield contadores
+    finally:
+        # Remove o atributo da instância e volta ao método da classe
+        del modelo.decode
+
+
+def contar_pelos_segmentos(resultado, parametros):
+    """
+    Estima os contadores a partir dos segmentos (campos 'seek' e
+    'temperature'), quando a decodificação ocorreu em outros processos.
+    O tempo gasto não é conhecido nesse caso.
+    """
+    contadores = novos_contadores()
+    temperaturas = escada(parametros)
+    temperaturas_por_janela = {}
+    for segmento in resultado["segments"]:
+        temperaturas_por_janela[(segmento.get("seek"), segmento["start"] // 30)] = segmento.get("temperature", temperaturas[0])
+    for temperatura in temperaturas_por_janela.values():
+        contadores["janelas"] += 1
+        degrau = temperaturas.index(temperatura) if temperatura in temperaturas else 0
+        contadores["recodificacoes"] += degrau
+        if degrau:
+            _somar(contadores["por_temperatura"], _chave_temperatura(temperatura))
+    return contadores
+
+
+def _ler_historico():
+    # Monta o histórico como dicionário: contadores do grupo "" ficam no primeiro nível
+    historico = {}
+    try:
+        with _conectar() as conexao:
+            linhas = conexao.execute("SELECT grupo, chave, valor FROM contadores").fetchall()
+    except sqlite3.Error:
+        return historico
+    for grupo, chave, valor in linhas:
+        destino = historico.setdefault(grupo, {}) if grupo else historico
+        destino[chave] = valor
+    return historico
+
+
+def atualizar_historico(contadores):
+    """
+    Soma os contadores de um arquivo ao histórico em 'cache/fallback.db',
+    usado pela política adaptativa. Cada soma é feita pelo próprio SQLite,
+    então processos simultâneos não perdem as atualizações uns dos outros.
+    """
+    incrementos = [
+        (grupo, subchave, valor)
+        for grupo in ("por_temperatura", "motivos", "resgates", "resgates_por_motivo")
+        for subchave, valor in contadores[grupo].items()
+    ]
+    incrementos += [("", chave, contadores[chave]) for chave in ("janelas", "recodificacoes")]
+    with _conectar() as conexao:
+        conexao.executemany(
+            "INSERT INTO contadores (grupo, chave, valor) VALUES (?, ?, ?)"
+            " ON CONFLICT (grupo, chave) DO UPDATE SET valor = valor + excluded.valor",
+            incrementos
+        )
+
+
+def aplicar_politica(parametros):
+    """
+    Modo adaptativo: devolve uma cópia dos parâmetros de decodificação com
+    a escada de temperaturas e os limiares ajustados pelo histórico.
+
+      - temperaturas de fallback que quase nunca resgatam uma janela saem da escada
+      - o limiar cujo fallback quase nunca resgata é relaxado um passo
+
+    Sem FALLBACK_ADAPTATIVO (ou com pouco histórico) os parâmetros voltam inalterados.
+    """
+    if not FALLBACK_ADAPTATIVO:
+        return parametros
+    historico = _ler_historico()
+    parametros = dict(parametros)
+
+    temperaturas = escada(parametros)
+    mantidas = [temperaturas[0]]
+    for temperatura in temperaturas[1:]:
+        chave = _chave_temperatura(temperatura)
+        tentativas = historico.get("por_temperatura", {}).get(chave, 0)
+        resgates = historico.get("resgates", {}).get(chave, 0)
+        if tentativas >= FALLBACK_MIN_OBSERVACOES and resgates / tentativas < FALLBACK_TAXA_MINIMA_RESGATE:
+            continue
+        mantidas.append(temperatura)
+    parametros["temperature"] = tuple(mantidas)
+
+    motivos = historico.get("motivos", {})
+    resgates_por_motivo = historico.get("resgates_por_motivo", {})
+
+    def pouco_resgate(motivo):
+        ocorrencias = motivos.get(motivo, 0)
+        return (ocorrencias >= FALLBACK_MIN_OBSERVACOES
+                and resgates_por_motivo.get(motivo, 0) / ocorrencias < FALLBACK_TAXA_MINIMA_RESGATE)
+
+    if parametros.get("logprob_threshold") is not None and pouco_resgate("logprob"):
+        parametros["logprob_threshold"] = max(
+            FALLBACK_LIMITE_LOGPROB, parametros["logprob_threshold"] - FALLBACK_PASSO_LOGPROB
+        )
+    if parametros.get("compression_ratio_threshold") is not None and pouco_resgate("compressao"):
+        parametros["compression_ratio_threshold"] = min(
+            FALLBACK_LIMITE_COMPRESSAO, parametros["compression_ratio_threshold"] + FALLBACK_PASSO_COMPRESSAO
+        )
+    return parametros
+
+
+def calcular_orcamento(duracao_audio):
+    """
+    Retorna o tempo máximo de decodificação (s) de um arquivo no modo
+    adaptativo, ou None fora dele.
+    """
+    if not FALLBACK_ADAPTATIVO:
+        return None
+    return FALLBACK_ORCAMENTO_POR_MINUTO * duracao_audio / 60
+
+
+registrar_estatisticas = _estatisticas.registrar
+obter_estatisticas = _estatisticas.obter
+somar_estatisticas = _estatisticas.somar
+
+
+def exibir_resumo_arquivo(contadores):
+    """
+    Mostra quantas janelas precisaram ser recodificadas e quanto isso custou.
+    """
+    if not contadores["recodificacoes"] and not contadores["recodificacoes_evitadas"]:
+        return
+    linha = f"🔁 Fallback: {contadores['recodificacoes']} recodificações em {contadores['janelas']} janelas"
+    if contadores["tempo_decodificacao"] > 0:
+        fracao = contadores["tempo_recodificacoes"] / contadores["tempo_decodificacao"]
+        linha += f" ({formatar_duracao(contadores['tempo_recodificacoes'])}, {fracao:.0%} da decodificação)"
+    print(linha)
+    if contadores["orcamento_esgotado"]:
+        print(f"⏱️  Orçamento de tempo esgotado: {contadores['recodificacoes_evitadas']} recodificações evitadas")
+
+
+def exibir_relatorio_fallback():
+    """
+    Mostra o total de recodificações por temperatura do lote e o tempo gasto nelas.
+    """
+    if not _estatisticas["janelas"]:
+        return
+    recodificacoes = _estatisticas["recodificacoes"]
+    print(f"\n🔁 Fallback de temperatura: {recodificacoes} recodificações em {_estatisticas['janelas']} janelas")
+    if _estatisticas["tempo_decodificacao"] > 0:
+        fracao = _estatisticas["tempo_recodificacoes"] / _estatisticas["tempo_decodificacao"]
+        print(f"   ⏱️  Tempo em recodificações: {formatar_duracao(_estatisticas['tempo_recodificacoes'])} "
+              f"({fracao:.0%} da decodificação)")
+    if _estatisticas["recodificacoes_evitadas"]:
+        print(f"   ✂️  Evitadas pelo orçamento de tempo: {_estatisticas['recodificacoes_evitadas']}")
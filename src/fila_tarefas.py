@@ -0,0 +1,319 @@
+import os
+import platform
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# -------------------------------
+# Configurações da fila persistente de vídeos
+# -------------------------------
+FILA_MAX_TENTATIVAS = 3  # Tentativas por vídeo antes de desistir
+
+FILA_ESPERA_BASE = 30.0  # Segundos antes da 2ª tentativa; dobra a cada nova falha
+
+FILA_ESPERA_MAXIMA = 600.0  # Limite (s) da espera entre tentativas
+
+FILA_PRIORIDADE_NOVOS = 1  # Prioridade de vídeos sem transcrição (reprocessamentos usam 0)
+
+FILA_INTERVALO = 0.5  # Intervalo (s) entre consultas enquanto só há vídeos aguardando nova tentativa
+
+# Situações de um vídeo na fila
+ESTADO_PENDENTE = "pendente"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CONCLUIDO = "concluido"
+ESTADO_FALHOU = "falhou"
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_banco():
+    """
+    Retorna o caminho da fila SQLite dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "fila.db"
+
+
+def _obter_inicio_processo(pid):
+    # Instante de início do processo (tiques desde o boot, pelo /proc do Linux), ou "" sem /proc
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii", errors="replace") as f:
+            # O nome do processo, entre parênteses, pode conter espaços
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ""
+
+
+def _identificar_processo():
+    # Dono de uma reserva: máquina, PID e instante de início, para saber se o processo que a
+    # fez ainda existe mesmo com o PID reutilizado (ex.: contêiner reiniciado, sempre PID 1)
+    pid = os.getpid()
+    return f"{platform.node()}:{pid}:{_obter_inicio_processo(pid)}"
+
+
+@contextmanager
+def _conectar():
+    # Abre a fila em modo WAL (leitores não bloqueiam o gravador); confirma e fecha ao sair
+    conexao = sqlite3.connect(obter_caminho_banco(), timeout=30, isolation_level=None)
+    try:
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS tarefas ("
+            " nome_video TEXT PRIMARY KEY,"
+            " estado TEXT NOT NULL,"
+            " prioridade INTEGER NOT NULL DEFAULT 0,"
+            " ordem INTEGER NOT NULL,"
+            " tentativas INTEGER NOT NULL DEFAULT 0,"
+            " proxima_tentativa REAL NOT NULL DEFAULT 0,"
+            " dono TEXT,"
+            " ultimo_erro TEXT,"
+            " criado_em REAL NOT NULL,"
+            " iniciado_em REAL,"
+            " concluido_em REAL,"
+            " tempo_total REAL NOT NULL DEFAULT 0)"
+        )
+        conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tarefas_fila"
+            " ON tarefas (estado, prioridade DESC, ordem)"
+        )
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexao
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+    finally:
+        conexao.close()
+
+
+def enfileirar(nomes_videos, prioridade=0):
+    """
+    Coloca os vídeos na fila, na ordem recebida, como pendentes.
+
+    Vídeos já concluídos ou que falharam voltam a ficar pendentes com as
+    tentativas zeradas; os que já estão pendentes ou em execução ficam como
+    estão (apenas a prioridade pode subir).
+    """
+    agora = time.time()
+    with _conectar() as conexao:
+        proxima_ordem = conexao.execute("SELECT COALESCE(MAX(ordem), 0) + 1 FROM tarefas").fetchone()[0]
+        for nome_video in nomes_videos:
+            linha = conexao.execute(
+                "SELECT estado FROM tarefas WHERE nome_video = ?", (nome_video,)
+            ).fetchone()
+            if linha is None:
+                conexao.execute(
+                    "INSERT INTO tarefas (nome_video, estado, prioridade, ordem, criado_em) VALUES (?, ?, ?, ?, ?)",
+                    (nome_video, ESTADO_PENDENTE, prioridade, proxima_ordem, agora)
+                )
+            elif linha[0] in (ESTADO_CONCLUIDO, ESTADO_FALHOU):
+                conexao.execute(
+                    "UPDATE tarefas SET estado = ?, prioridade = ?, ordem = ?, tentativas = 0,"
+                    " proxima_tentativa = 0, dono = NULL, ultimo_erro = NULL, criado_em = ?,"
+                    " iniciado_em = NULL, concluido_em = NULL, tempo_total = 0"
+                    " WHERE nome_video = ?",
+                    (ESTADO_PENDENTE, prioridade, proxima_ordem, agora, nome_video)
+                )
+            else:
+                conexao.execute(
+                    "UPDATE tarefas SET prioridade = MAX(prioridade, ?) WHERE nome_video = ?",
+                    (prioridade, nome_video)
+                )
+            proxima_ordem += 1
+
+
+def _processo_ativo(dono):
+    # Só é possível verificar processos desta máquina; os de outras são considerados ativos.
+    # Donos sem o instante de início ("host:pid") são de versões anteriores da fila
+    host, pid, inicio = (dono.rsplit(":", 2) + [""])[:3]
+    if host != platform.node():
+        return True
+    try:
+        pid = int(pid)
+    except ValueError:
+        return True
+    if pid == os.getpid():
+        # Este processo acabou de começar e ainda não reservou nada: a reserva é de outra execução
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # PID ocupado por outro processo, iniciado depois do que fez a reserva
+    inicio_atual = _obter_inicio_processo(pid)
+    return not (inicio and inicio_atual and inicio_atual != inicio)
+
+
+def recuperar_interrompidas():
+    """
+    Devolve à fila os vídeos que estavam em execução por um processo desta
+    máquina que já não existe (queda, kill -9, falta de energia).
+
+    A tentativa interrompida conta: um vídeo que derruba o processo
+    repetidamente acaba marcado como falho. Deve ser chamada antes de
+    reservar qualquer vídeo: reservas com o PID deste processo são de uma
+    execução anterior. Retorna quantos foram recuperados.
+    """
+    with _conectar() as conexao:
+        linhas = conexao.execute(
+            "SELECT nome_video, dono, tentativas FROM tarefas WHERE estado = ?", (ESTADO_EXECUTANDO,)
+        ).fetchall()
+        recuperadas = 0
+        for nome_video, dono, tentativas in linhas:
+            if dono and _processo_ativo(dono):
+                continue
+            estado = ESTADO_FALHOU if tentativas >= FILA_MAX_TENTATIVAS else ESTADO_PENDENTE
+            conexao.execute(
+                "UPDATE tarefas SET estado = ?, dono = NULL, proxima_tentativa = 0,"
+                " ultimo_erro = 'processo interrompido' WHERE nome_video = ?",
+                (estado, nome_video)
+            )
+            recuperadas += 1
+    return recuperadas
+
+
+def descartar_ausentes(nomes_videos):
+    """
+    Remove da fila os vídeos pendentes que não estão em 'nomes_videos'
+    (apagados da pasta ou rejeitados pela verificação prévia).
+    """
+    existentes = set(nomes_videos)
+    with _conectar() as conexao:
+        pendentes = conexao.execute(
+            "SELECT nome_video FROM tarefas WHERE estado = ?", (ESTADO_PENDENTE,)
+        ).fetchall()
+        for (nome_video,) in pendentes:
+            if nome_video not in existentes:
+                conexao.execute("DELETE FROM tarefas WHERE nome_video = ?", (nome_video,))
+
+
+def listar_pendentes():
+    """
+    Retorna os vídeos pendentes na ordem em que serão processados.
+    """
+    with _conectar() as conexao:
+        linhas = conexao.execute(
+            "SELECT nome_video FROM tarefas WHERE estado = ? ORDER BY prioridade DESC, ordem",
+            (ESTADO_PENDENTE,)
+        ).fetchall()
+    return [nome_video for (nome_video,) in linhas]
+
+
+def reservar_proxima():
+    """
+    Marca como em execução (por este processo) o próximo vídeo pendente
+    liberado para tentativa: maior prioridade primeiro e, entre iguais, a
+    ordem de chegada. Retorna o nome do vídeo ou None.
+    """
+    agora = time.time()
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT nome_video FROM tarefas WHERE estado = ? AND proxima_tentativa <= ?"
+            " ORDER BY prioridade DESC, ordem LIMIT 1",
+            (ESTADO_PENDENTE, agora)
+        ).fetchone()
+        if linha is None:
+            return None
+        conexao.execute(
+            "UPDATE tarefas SET estado = ?, dono = ?, tentativas = tentativas + 1, iniciado_em = ?"
+            " WHERE nome_video = ?",
+            (ESTADO_EXECUTANDO, _identificar_processo(), agora, linha[0])
+        )
+    return linha[0]
+
+
+def concluir(nome_video, tempo):
+    """
+    Marca o vídeo como concluído, somando 'tempo' (s) ao tempo total gasto nele.
+    """
+    with _conectar() as conexao:
+        conexao.execute(
+            "UPDATE tarefas SET estado = ?, dono = NULL, ultimo_erro = NULL, concluido_em = ?,"
+            " tempo_total = tempo_total + ? WHERE nome_video = ?",
+            (ESTADO_CONCLUIDO, time.time(), tempo, nome_video)
+        )
+
+
+def registrar_falha(nome_video, erro, tempo):
+    """
+    Registra a falha de uma tentativa. Se ainda houver tentativas, o vídeo
+    volta à fila após uma espera que dobra a cada falha; senão é marcado
+    como falho.
+
+    Retorna os segundos até a nova tentativa, ou None se o vídeo desistiu.
+    """
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT tentativas FROM tarefas WHERE nome_video = ?", (nome_video,)
+        ).fetchone()
+        tentativas = linha[0] if linha is not None else FILA_MAX_TENTATIVAS
+        if tentativas >= FILA_MAX_TENTATIVAS:
+            espera = None
+            conexao.execute(
+                "UPDATE tarefas SET estado = ?, dono = NULL, ultimo_erro = ?, concluido_em = ?,"
+                " tempo_total = tempo_total + ? WHERE nome_video = ?",
+                (ESTADO_FALHOU, erro, time.time(), tempo, nome_video)
+            )
+        else:
+            espera = min(FILA_ESPERA_MAXIMA, FILA_ESPERA_BASE * 2 ** (tentativas - 1))
+            conexao.execute(
+                "UPDATE tarefas SET estado = ?, dono = NULL, ultimo_erro = ?, proxima_tentativa = ?,"
+                " tempo_total = tempo_total + ? WHERE nome_video = ?",
+                (ESTADO_PENDENTE, erro, time.time() + espera, tempo, nome_video)
+            )
+    return espera
+
+
+def liberar_reservas():
+    """
+    Devolve à fila, sem contar a tentativa, os vídeos em execução por este
+    processo (usado ao interromper com Ctrl+C).
+    """
+    with _conectar() as conexao:
+        conexao.execute(
+            "UPDATE tarefas SET estado = ?, dono = NULL, tentativas = MAX(0, tentativas - 1)"
+            " WHERE estado = ? AND dono = ?",
+            (ESTADO_PENDENTE, ESTADO_EXECUTANDO, _identificar_processo())
+        )
+
+
+def ha_trabalho():
+    """
+    Indica se ainda há vídeos pendentes (inclusive aguardando nova
+    tentativa) ou em execução por este processo.
+    """
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT 1 FROM tarefas WHERE estado = ? OR (estado = ? AND dono = ?) LIMIT 1",
+            (ESTADO_PENDENTE, ESTADO_EXECUTANDO, _identificar_processo())
+        ).fetchone()
+    return linha is not None
+
+
+def contar_pendentes():
+    """Retorna quantos vídeos estão pendentes (inclusive aguardando nova tentativa)."""
+    with _conectar() as conexao:
+        return conexao.execute(
+            "SELECT COUNT(*) FROM tarefas WHERE estado = ?", (ESTADO_PENDENTE,)
+        ).fetchone()[0]
+
+
+def obter_tentativas(nome_video):
+    """Retorna quantas tentativas o vídeo já teve (0 se não estiver na fila)."""
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT tentativas FROM tarefas WHERE nome_video = ?", (nome_video,)
+        ).fetchone()
+    return linha[0] if linha is not None else 0
@@ -0,0 +1,156 @@
+import json
+from pathlib import Path
+
+
+# -------------------------------
+# Configurações dos formatos de saída
+# -------------------------------
+# Formatos gravados em 'transcripts/' além do .txt (sempre gerado):
+# "srt", "vtt" (legendas por segmento) e "json" (segmentos com tempo de cada palavra)
+FORMATOS_SAIDA = ("txt",)
+
+FORMATOS_SUPORTADOS = ("txt", "srt", "vtt", "json")
+
+
+def analisar_formatos(texto):
+    """
+    Converte uma lista separada por vírgulas (ex.: "txt,srt,json") em uma
+    tupla de formatos, sempre incluindo "txt".
+
+    Lança ValueError se algum formato não for suportado.
+    """
+    formatos = [formato.strip().lower().lstrip(".") for formato in texto.split(",") if formato.strip()]
+    invalidos = [formato for formato in formatos if formato not in FORMATOS_SUPORTADOS]
+    if invalidos:
+        raise ValueError(f"formato não suportado: {', '.join(invalidos)} "
+                         f"(use {', '.join(FORMATOS_SUPORTADOS)})")
+    return tuple(formato for formato in FORMATOS_SUPORTADOS if formato == "txt" or formato in formatos)
+
+
+def requer_tempos_de_palavras(formatos=None):
+    """
+    Indica se algum formato pedido usa o tempo de cada palavra; só nesse
+    caso vale a pena executar o alinhamento (DTW) do whisper.
+    """
+    formatos = FORMATOS_SAIDA if formatos is None else formatos
+    return "json" in formatos
+
+
+def _formatar_tempo(segundos, separador_decimal):
+    milissegundos = int(round(max(0.0, segundos) * 1000))
+    horas, milissegundos = divmod(milissegundos, 3_600_000)
+    minutos, milissegundos = divmod(milissegundos, 60_000)
+    segundos, milissegundos = divmod(milissegundos, 1000)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d}{separador_decimal}{milissegundos:03d}"
+
+
+def gerar_srt(resultado):
+    """
+    Gera legendas SubRip (.srt) a partir dos segmentos do resultado do whisper.
+    """
+    blocos = []
+    for i, segmento in enumerate(resultado["segments"], 1):
+        inicio = _formatar_tempo(segmento["start"], ",")
+        fim = _formatar_tempo(segmento["end"], ",")
+        blocos.append(f"{i}\n{inicio} --> {fim}\n{segmento['text'].strip()}\n")
+    return "\n".join(blocos)
+
+
+def gerar_vtt(resultado):
+    """
+    Gera legendas WebVTT (.vtt) a partir dos segmentos do resultado do whisper.
+    """
+    blocos = ["WEBVTT\n"]
+    for segmento in resultado["segments"]:
+        inicio = _formatar_tempo(segmento["start"], ".")
+        fim = _formatar_tempo(segmento["end"], ".")
+        blocos.append(f"{inicio} --> {fim}\n{segmento['text'].strip()}\n")
+    return "\n".join(blocos)
+
+
+def gerar_json(resultado):
+    """
+    Gera um JSON com idioma, texto completo e segmentos; cada segmento
+    traz suas palavras com início, fim e probabilidade, quando disponíveis.
+    """
+    segmentos = []
+    for segmento in resultado["segments"]:
+        item = {
+            "id": segmento.get("id"),
+            "start": round(segmento["start"], 3),
+            "end": round(segmento["end"], 3),
+            "text": segmento["text"].strip(),
+        }
+        if "temperature" in segmento:
+            # Temperatura acima da primeira da escada indica janela recodificada (fallback)
+            item["temperature"] = segmento["temperature"]
+        if "words" in segmento:
+            item["words"] = [
+                {
+                    "word": palavra["word"],
+                    "start": round(palavra["start"], 3),
+                    "end": round(palavra["end"], 3),
+                    "probability": round(float(palavra["probability"]), 4),
+                }
+                for palavra in segmento["words"]
+            ]
+        segmentos.append(item)
+    dados = {
+        "language": resultado.get("language"),
+        "text": resultado["text"].strip(),
+        "segments": segmentos,
+    }
+    return json.dumps(dados, ensure_ascii=False, indent=2)
+
+
+_GERADORES = {
+    "txt": lambda resultado: resultado["text"].strip(),
+    "srt": gerar_srt,
+    "vtt": gerar_vtt,
+    "json": gerar_json,
+}
+
+
+def gravar_saidas(resultado, pasta_destino, nome_base, formatos=None):
+    """
+    Grava o resultado em cada formato pedido como
+    '{pasta_destino}/{nome_base}.{formato}'.
+
+    Retorna a lista de Paths gravados, com o .txt primeiro.
+    """
+    formatos = FORMATOS_SAIDA if formatos is None else formatos
+    pasta_destino = Path(pasta_destino)
+    pasta_destino.mkdir(parents=True, exist_ok=True)
+    nome_base_sem_ext = Path(nome_base).stem
+
+    arquivos = []
+    for formato in FORMATOS_SUPORTADOS:
+        if formato != "txt" and formato not in formatos:
+            continue
+        arquivo = pasta_destino / f"{nome_base_sem_ext}.{formato}"
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write(_GERADORES[formato](resultado))
+        arquivos.append(arquivo)
+    return arquivos
+
+
+def gravar_formatos_ausentes(resultado, pasta_destino, nome_base, formatos=None):
+    """
+    Grava, a partir de um resultado já existente, só os formatos pedidos
+    (além do .txt) cujo arquivo ainda não está em 'pasta_destino'.
+
+    Retorna a lista de Paths gravados.
+    """
+    formatos = FORMATOS_SAIDA if formatos is None else formatos
+    pasta_destino = Path(pasta_destino)
+    nome_base_sem_ext = Path(nome_base).stem
+
+    arquivos = []
+    for formato in FORMATOS_SUPORTADOS:
+        arquivo = pasta_destino / f"{nome_base_sem_ext}.{formato}"
+        if formato == "txt" or formato not in formatos or arquivo.exists():
+            continue
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write(_GERADORES[formato](resultado))
+        arquivos.append(arquivo)
+    return arquivos
@@ -0,0 +1,132 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# -------------------------------
+# Configurações da fixação de idioma por pasta
+# -------------------------------
+IDIOMA_FIXAR_POR_PASTA = False  # Reaproveita o idioma detectado nos primeiros arquivos de cada pasta de origem
+
+IDIOMA_AMOSTRAS = 3  # Detecções concordantes necessárias antes de fixar o idioma
+
+IDIOMA_CONFIANCA_MINIMA = 0.8  # Probabilidade média mínima para fixar (e manter) o idioma
+
+IDIOMA_REVERIFICAR_A_CADA = 20  # Após este número de arquivos com o idioma fixado, detecta de novo
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_banco():
+    """
+    Retorna o caminho do mapa pasta → idioma (SQLite) dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "idiomas.db"
+
+
+@contextmanager
+def _conectar():
+    # Cada consulta e atualização é uma transação exclusiva: processos de transcrição
+    # simultâneos (supervisionados ou --workers) não perdem as atualizações uns dos outros
+    conexao = sqlite3.connect(obter_caminho_banco(), timeout=30, isolation_level=None)
+    try:
+        conexao.execute("CREATE TABLE IF NOT EXISTS pastas (pasta TEXT PRIMARY KEY, dados TEXT NOT NULL)")
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexao
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+    finally:
+        conexao.close()
+
+
+def _ler_entrada(conexao, chave):
+    linha = conexao.execute("SELECT dados FROM pastas WHERE pasta = ?", (chave,)).fetchone()
+    return json.loads(linha[0]) if linha else None
+
+
+def _gravar_entrada(conexao, chave, entrada):
+    conexao.execute(
+        "INSERT OR REPLACE INTO pastas (pasta, dados) VALUES (?, ?)",
+        (chave, json.dumps(entrada, ensure_ascii=False))
+    )
+
+
+def _chave_pasta(nome_video):
+    # Pasta de origem real do arquivo: 'videos/' lista só arquivos, mas eles podem ser
+    # atalhos (links simbólicos) para bibliotecas em pastas diferentes
+    return str((obter_pasta_projeto() / "videos" / nome_video).resolve().parent)
+
+
+def _rotulo_pasta(chave):
+    pasta_videos = (obter_pasta_projeto() / "videos").resolve()
+    return "videos/" if Path(chave) == pasta_videos else f"{chave}/"
+
+
+def obter_idioma_fixado(nome_video):
+    """
+    Retorna o idioma fixado para a pasta do vídeo, ou None quando o idioma
+    ainda não foi fixado ou chegou a hora de reverificá-lo (nesses casos o
+    chamador deve detectar e informar o resultado em registrar_deteccao).
+    """
+    if not IDIOMA_FIXAR_POR_PASTA:
+        return None
+    chave = _chave_pasta(nome_video)
+    with _conectar() as conexao:
+        entrada = _ler_entrada(conexao, chave)
+        if not entrada or not entrada.get("idioma"):
+            return None
+        if entrada.get("usos_desde_verificacao", 0) >= IDIOMA_REVERIFICAR_A_CADA:
+            return None
+        entrada["usos_desde_verificacao"] = entrada.get("usos_desde_verificacao", 0) + 1
+        _gravar_entrada(conexao, chave, entrada)
+        return entrada["idioma"]
+
+
+def registrar_deteccao(nome_video, idioma, probabilidade):
+    """
+    Registra uma detecção de idioma para a pasta do vídeo.
+
+    - Sem idioma fixado: guarda a amostra e fixa o idioma quando as últimas
+      IDIOMA_AMOSTRAS detecções concordam com confiança média suficiente.
+    - Com idioma fixado (reverificação): mantém se a detecção confirmar;
+      caso contrário desfaz a fixação e volta a amostrar.
+
+    Retorna o idioma fixado para a pasta após a atualização (ou None).
+    """
+    if not IDIOMA_FIXAR_POR_PASTA:
+        return None
+    chave = _chave_pasta(nome_video)
+    with _conectar() as conexao:
+        entrada = _ler_entrada(conexao, chave) or {"idioma": None, "amostras": []}
+        fixado = entrada.get("idioma")
+
+        if fixado is not None:
+            if idioma == fixado and probabilidade >= IDIOMA_CONFIANCA_MINIMA:
+                entrada["confianca"] = round(probabilidade, 4)
+                entrada["usos_desde_verificacao"] = 0
+                _gravar_entrada(conexao, chave, entrada)
+                return fixado
+            print(f"🌐 Idioma de '{_rotulo_pasta(chave)}' deixou de ser confiável ({fixado} → {idioma} "
+                  f"{probabilidade:.0%}), voltando a detectar")
+            entrada.update({"idioma": None, "confianca": None, "amostras": []})
+
+        entrada["amostras"] = (entrada.get("amostras", []) + [[idioma, round(probabilidade, 4)]])[-IDIOMA_AMOSTRAS:]
+        amostras = entrada["amostras"]
+        if len(amostras) >= IDIOMA_AMOSTRAS and len({amostra[0] for amostra in amostras}) == 1:
+            confianca = sum(amostra[1] for amostra in amostras) / len(amostras)
+            if confianca >= IDIOMA_CONFIANCA_MINIMA:
+                entrada.update({"idioma": idioma, "confianca": round(confianca, 4), "usos_desde_verificacao": 0})
+                print(f"📌 Idioma '{idioma}' fixado para a pasta '{_rotulo_pasta(chave)}' ({confianca:.0%} de confiança média)")
+        _gravar_entrada(conexao, chave, entrada)
+        return entrada.get("idioma")
@@ -0,0 +1,203 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src import cache_transcricoes
+
+
+# -------------------------------
+# Configurações da impressão acústica (detecção de áudio duplicado)
+# -------------------------------
+IMPRESSAO_ATIVADA = True  # Compara o áudio extraído com o índice antes de transcrever
+
+IMPRESSAO_LIMIAR_ERRO = 0.15  # Fração máxima de bits diferentes para considerar o mesmo áudio
+
+IMPRESSAO_TOLERANCIA_DURACAO = 2.0  # Diferença máxima de duração (s) entre candidatos
+
+IMPRESSAO_DESLOCAMENTO_MAXIMO = 2.0  # Atraso máximo (s) de um áudio em relação ao outro
+
+IMPRESSAO_DURACAO_MINIMA = 10.0  # Áudios mais curtos não são comparados
+
+# Quadros de 256 ms a cada 32 ms (sobreposição de 7/8); 33 bandas logarítmicas entre 300 e 2000 Hz
+# geram uma palavra de 32 bits por quadro (esquema de Haitsma e Kalker)
+_JANELA = 4096
+_PASSO = 512
+_BANDAS = 33
+_FREQUENCIA_MINIMA = 300.0
+_FREQUENCIA_MAXIMA = 2000.0
+_QUADROS_POR_BLOCO = 1024  # Limita a memória da FFT em áudios longos
+
+_RMS_MINIMO = 1e-4  # Abaixo disto o áudio é tratado como silêncio (sem impressão)
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_banco():
+    """
+    Retorna o caminho do índice de impressões dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "impressoes.db"
+
+
+@contextmanager
+def _conectar():
+    # Abre o índice criando a tabela na primeira execução; confirma e fecha ao sair
+    conexao = sqlite3.connect(obter_caminho_banco(), timeout=30)
+    try:
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS impressoes ("
+            " hash_midia TEXT PRIMARY KEY,"
+            " nome_video TEXT NOT NULL,"
+            " duracao REAL NOT NULL,"
+            " impressao BLOB NOT NULL)"
+        )
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_impressoes_duracao ON impressoes (duracao)")
+        yield conexao
+        conexao.commit()
+    finally:
+        conexao.close()
+
+
+def calcular_impressao(audio, taxa_amostragem=16000):
+    """
+    Calcula a impressão acústica de um áudio mono float32: uma palavra de
+    32 bits por quadro, cada bit indicando se a diferença de energia entre
+    duas bandas vizinhas cresceu ou diminuiu em relação ao quadro anterior.
+
+    O resultado não muda com o volume e quase não muda com a recodificação
+    (outro contêiner, codec ou taxa de bits). Retorna um array uint32, ou
+    None para áudio curto demais ou silencioso.
+    """
+    if len(audio) < IMPRESSAO_DURACAO_MINIMA * taxa_amostragem:
+        return None
+    audio = np.asarray(audio, dtype=np.float32)
+    if float(np.sqrt(np.mean(np.square(audio[::16], dtype=np.float64)))) < _RMS_MINIMO:
+        return None
+
+    bordas = np.geomspace(_FREQUENCIA_MINIMA, _FREQUENCIA_MAXIMA, _BANDAS + 1)
+    bordas = np.round(bordas * _JANELA / taxa_amostragem).astype(int)
+    janela = np.hanning(_JANELA).astype(np.float32)
+
+    quadros = sliding_window_view(audio, _JANELA)[::_PASSO]
+    energias = np.empty((len(quadros), _BANDAS), dtype=np.float32)
+    for inicio in range(0, len(quadros), _QUADROS_POR_BLOCO):
+        bloco = quadros[inicio:inicio + _QUADROS_POR_BLOCO] * janela
+        espectro = np.abs(np.fft.rfft(bloco, axis=1)[:, :bordas[-1]]) ** 2
+        energias[inicio:inicio + len(bloco)] = np.add.reduceat(espectro, bordas[:-1], axis=1)
+
+    diferencas = energias[:, :-1] - energias[:, 1:]
+    bits = (diferencas[1:] - diferencas[:-1]) > 0
+    return np.packbits(bits, axis=1, bitorder="little").view("<u4").ravel().copy()
+
+
+def calcular_taxa_erro(impressao_a, impressao_b, deslocamento_maximo):
+    """
+    Retorna a menor fração de bits diferentes entre duas impressões,
+    testando atrasos de até 'deslocamento_maximo' quadros em cada sentido.
+    """
+    sobreposicao_minima = min(len(impressao_a), len(impressao_b)) // 2
+    melhor = 1.0
+    for deslocamento in range(-deslocamento_maximo, deslocamento_maximo + 1):
+        a = impressao_a[max(0, deslocamento):]
+        b = impressao_b[max(0, -deslocamento):]
+        tamanho = min(len(a), len(b))
+        if tamanho == 0 or tamanho < sobreposicao_minima:
+            continue
+        diferentes = np.unpackbits(np.bitwise_xor(a[:tamanho], b[:tamanho]).view(np.uint8)).sum()
+        melhor = min(melhor, diferentes / (32 * tamanho))
+    return melhor
+
+
+def _obter_ou_calcular(hash_midia, nome_video, audio, taxa_amostragem):
+    # A impressão de um conteúdo é calculada uma vez e guardada pelo hash do arquivo
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT impressao FROM impressoes WHERE hash_midia = ?", (hash_midia,)
+        ).fetchone()
+    if linha is not None:
+        return np.frombuffer(linha[0], dtype="<u4")
+
+    impressao = calcular_impressao(audio, taxa_amostragem)
+    if impressao is None:
+        return None
+    with _conectar() as conexao:
+        conexao.execute(
+            "INSERT OR REPLACE INTO impressoes (hash_midia, nome_video, duracao, impressao) VALUES (?, ?, ?, ?)",
+            (hash_midia, nome_video, len(audio) / taxa_amostragem, impressao.tobytes())
+        )
+    return impressao
+
+
+def dispensa_audio(hash_midia, duracao):
+    """
+    Indica se a busca por áudio repetido de um conteúdo pode rodar sem as
+    amostras: impressão desativada, áudio curto demais para ser comparado
+    ou impressão já guardada no índice.
+    """
+    if not IMPRESSAO_ATIVADA or duracao < IMPRESSAO_DURACAO_MINIMA:
+        return True
+    with _conectar() as conexao:
+        linha = conexao.execute(
+            "SELECT 1 FROM impressoes WHERE hash_midia = ?", (hash_midia,)
+        ).fetchone()
+    return linha is not None
+
+
+def buscar_semelhantes(hash_midia, duracao, impressao, taxa_amostragem=16000):
+    """
+    Procura no índice áudios de outros conteúdos com duração parecida e
+    impressão dentro de IMPRESSAO_LIMIAR_ERRO.
+
+    Retorna uma lista de (hash_midia, nome_video, taxa_erro), da mais
+    parecida para a menos parecida.
+    """
+    with _conectar() as conexao:
+        candidatos = conexao.execute(
+            "SELECT hash_midia, nome_video, impressao FROM impressoes"
+            " WHERE hash_midia != ? AND duracao BETWEEN ? AND ?",
+            (hash_midia, duracao - IMPRESSAO_TOLERANCIA_DURACAO, duracao + IMPRESSAO_TOLERANCIA_DURACAO)
+        ).fetchall()
+
+    deslocamento_maximo = int(IMPRESSAO_DESLOCAMENTO_MAXIMO * taxa_amostragem / _PASSO)
+    semelhantes = []
+    for hash_candidato, nome_candidato, dados in candidatos:
+        taxa_erro = calcular_taxa_erro(impressao, np.frombuffer(dados, dtype="<u4"), deslocamento_maximo)
+        if taxa_erro <= IMPRESSAO_LIMIAR_ERRO:
+            semelhantes.append((hash_candidato, nome_candidato, taxa_erro))
+    return sorted(semelhantes, key=lambda item: item[2])
+
+
+def procurar_transcricao_equivalente(nome_video, audio, assinatura, taxa_amostragem=16000):
+    """
+    Registra a impressão do áudio de 'videos/{nome_video}' e, se outro
+    vídeo com o mesmo áudio já tiver transcrição feita com a configuração
+    'assinatura', copia essa transcrição para 'transcripts/'.
+
+    Retorna (nome_video_original, taxa_erro, caminho_txt) ou None.
+    """
+    if not IMPRESSAO_ATIVADA:
+        return None
+    try:
+        hash_midia = cache_transcricoes.obter_hash_video(nome_video)
+    except FileNotFoundError:
+        return None
+
+    impressao = _obter_ou_calcular(hash_midia, nome_video, audio, taxa_amostragem)
+    if impressao is None:
+        return None
+
+    duracao = len(audio) / taxa_amostragem
+    semelhantes = buscar_semelhantes(hash_midia, duracao, impressao, taxa_amostragem)
+    for hash_candidato, nome_candidato, taxa_erro in semelhantes:
+        arquivo = cache_transcricoes.reaproveitar_transcricao(nome_video, hash_candidato, assinatura)
+        if arquivo is not None:
+            return nome_candidato, taxa_erro, arquivo
+    return None
@@ -0,0 +1,246 @@
+import json
+import sqlite3
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from src import metricas
+from src.utils import formatar_duracao
+
+
+# -------------------------------
+# Configurações do índice de mídias (ffprobe)
+# -------------------------------
+INDICE_PROBES_SIMULTANEOS = 8  # Consultas ao ffprobe em paralelo
+
+INDICE_AMOSTRAS_HISTORICO = 50  # Transcrições recentes usadas para estimar o fator de tempo real
+
+_LEITURA_HISTORICO = 1024 * 1024  # Bytes lidos do final do log de métricas
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_caminho_banco():
+    """
+    Retorna o caminho do índice SQLite dentro de 'cache/'.
+    """
+    pasta_cache = obter_pasta_projeto() / "cache"
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    return pasta_cache / "indice_midias.db"
+
+
+@contextmanager
+def _conectar():
+    # Abre o índice criando a tabela na primeira execução; confirma e fecha ao sair
+    conexao = sqlite3.connect(obter_caminho_banco(), timeout=30)
+    try:
+        conexao.execute(
+            "CREATE TABLE IF NOT EXISTS midias ("
+            " caminho TEXT PRIMARY KEY,"
+            " tamanho INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " info TEXT NOT NULL)"
+        )
+        yield conexao
+        conexao.commit()
+    finally:
+        conexao.close()
+
+
+def sondar_midia(caminho):
+    """
+    Consulta o ffprobe sobre um arquivo de mídia.
+
+    Retorna um dicionário com 'duracao', 'streams_audio', 'codec',
+    'taxa_amostragem' e 'erro' (None quando o arquivo é processável), ou
+    None se o ffprobe não estiver disponível.
+    """
+    comando = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,codec_name,sample_rate,channels",
+        "-of", "json",
+        str(caminho)
+    ]
+    try:
+        resultado = subprocess.run(comando, capture_output=True, text=True, timeout=60)
+    except FileNotFoundError:
+        return None
+    except subprocess.TimeoutExpired:
+        return {"duracao": None, "streams_audio": 0, "codec": None, "taxa_amostragem": None,
+                "erro": "ffprobe não respondeu"}
+
+    info = {"duracao": None, "streams_audio": 0, "codec": None, "taxa_amostragem": None, "erro": None}
+    try:
+        dados = json.loads(resultado.stdout or "{}")
+    except ValueError:
+        dados = {}
+    if resultado.returncode != 0 or not dados:
+        mensagem = (resultado.stderr or "").strip().splitlines()
+        detalhe = mensagem[-1].replace(f"{caminho}: ", "") if mensagem else None
+        info["erro"] = f"arquivo ilegível ({detalhe})" if detalhe else "arquivo ilegível"
+        return info
+
+    streams_audio = [stream for stream in dados.get("streams", []) if stream.get("codec_type") == "audio"]
+    info["streams_audio"] = len(streams_audio)
+    if streams_audio:
+        info["codec"] = streams_audio[0].get("codec_name")
+        try:
+            info["taxa_amostragem"] = int(streams_audio[0].get("sample_rate"))
+        except (TypeError, ValueError):
+            pass
+    try:
+        duracao = float(dados.get("format", {}).get("duration"))
+        info["duracao"] = duracao if duracao > 0 else None
+    except (TypeError, ValueError):
+        pass
+
+    if not streams_audio:
+        info["erro"] = "sem faixa de áudio"
+    return info
+
+
+def indexar(caminhos):
+    """
+    Retorna {caminho: info} para os arquivos, consultando o ffprobe em
+    paralelo apenas para os que não estão no índice ou cujo tamanho/mtime
+    mudou. 'info' é None quando o ffprobe não está disponível.
+    """
+    caminhos = [Path(caminho) for caminho in caminhos]
+    resultado = {}
+    pendentes = []
+    with _conectar() as conexao:
+        for caminho in caminhos:
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                resultado[caminho] = {"duracao": None, "streams_audio": 0, "codec": None,
+                                      "taxa_amostragem": None, "erro": "arquivo não encontrado"}
+                continue
+            linha = conexao.execute(
+                "SELECT tamanho, mtime_ns, info FROM midias WHERE caminho = ?",
+                (str(caminho),)
+            ).fetchone()
+            if linha is not None and linha[0] == estado.st_size and linha[1] == estado.st_mtime_ns:
+                resultado[caminho] = json.loads(linha[2])
+            else:
+                pendentes.append((caminho, estado))
+
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=INDICE_PROBES_SIMULTANEOS) as executor:
+            infos = list(executor.map(lambda par: sondar_midia(par[0]), pendentes))
+        with _conectar() as conexao:
+            for (caminho, estado), info in zip(pendentes, infos):
+                resultado[caminho] = info
+                if info is None:
+                    continue
+                conexao.execute(
+                    "INSERT OR REPLACE INTO midias (caminho, tamanho, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                    (str(caminho), estado.st_size, estado.st_mtime_ns, json.dumps(info))
+                )
+    return resultado
+
+
+def indexar_videos(nomes_videos):
+    """
+    Conveniência: indexa vídeos da pasta 'videos/' e retorna {nome: info}.
+    """
+    pasta_videos = obter_pasta_projeto() / "videos"
+    infos = indexar([pasta_videos / nome for nome in nomes_videos])
+    return {nome: infos[pasta_videos / nome] for nome in nomes_videos}
+
+
+def obter_duracao(caminho):
+    """
+    Retorna a duração (s) de um arquivo pelo índice (ou None se desconhecida).
+    """
+    info = indexar([caminho])[Path(caminho)]
+    return info["duracao"] if info else None
+
+
+def separar_processaveis(nomes_videos):
+    """
+    Separa os vídeos que podem ser transcritos dos que seriam rejeitados
+    pelo FFmpeg (contêiner corrompido ou sem faixa de áudio).
+
+    Retorna (processaveis, rejeitados, infos), onde 'rejeitados' é uma lista
+    de tuplas (nome, motivo). Sem ffprobe, nada é rejeitado.
+    """
+    infos = indexar_videos(nomes_videos)
+    processaveis = []
+    rejeitados = []
+    for nome in nomes_videos:
+        info = infos[nome]
+        if info is not None and info["erro"]:
+            rejeitados.append((nome, info["erro"]))
+        else:
+            processaveis.append(nome)
+    return processaveis, rejeitados, infos
+
+
+def obter_fator_tempo_real_historico(modelo=None, incluir_extracao=True, incluir_lote=True):
+    """
+    Estima o fator de tempo real (tempo de processamento ÷ duração do
+    áudio) pela mediana das últimas transcrições registradas em
+    'logs/metricas.jsonl', somando extração e transcrição (ou só a
+    transcrição, com incluir_extracao=False). Com incluir_lote=False, só
+    valem as transcrições feitas sem a decodificação em lote.
+
+    Retorna None se não houver histórico.
+    """
+    if not metricas.METRICAS_ARQUIVO:
+        return None
+    caminho = obter_pasta_projeto() / metricas.METRICAS_ARQUIVO
+    try:
+        with open(caminho, "rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - _LEITURA_HISTORICO))
+            linhas = f.read().decode("utf-8", errors="ignore").splitlines()
+    except OSError:
+        return None
+
+    fatores = {"extract": [], "transcribe": []}
+    for linha in reversed(linhas):
+        try:
+            evento = json.loads(linha)
+        except ValueError:
+            continue
+        etapa = evento.get("etapa")
+        if etapa not in fatores or not evento.get("sucesso") or not evento.get("fator_tempo_real"):
+            continue
+        if etapa == "transcribe" and modelo is not None and evento.get("modelo") != modelo:
+            continue
+        if etapa == "transcribe" and not incluir_lote and evento.get("modo") == "lote":
+            continue
+        if len(fatores[etapa]) < INDICE_AMOSTRAS_HISTORICO:
+            fatores[etapa].append(evento["fator_tempo_real"])
+    if not fatores["transcribe"]:
+        return None
+    fator_extracao = statistics.median(fatores["extract"]) if fatores["extract"] and incluir_extracao else 0.0
+    return statistics.median(fatores["transcribe"]) + fator_extracao
+
+
+def exibir_estimativa(nomes_videos, infos, modelo=None, num_workers=1, rotulo="Áudio a transcrever"):
+    """
+    Mostra a duração total de áudio dos vídeos e, havendo histórico, o tempo
+    estimado de processamento.
+    """
+    duracoes = [infos[nome]["duracao"] for nome in nomes_videos if infos.get(nome) and infos[nome]["duracao"]]
+    if not duracoes:
+        return
+    total = sum(duracoes)
+    desconhecidas = len(nomes_videos) - len(duracoes)
+    linha = f"⏳ {rotulo}: {formatar_duracao(total)}"
+    if desconhecidas:
+        linha += f" (+{desconhecidas} sem duração conhecida)"
+    fator = obter_fator_tempo_real_historico(modelo)
+    if fator is not None:
+        estimativa = total * fator / max(1, min(num_workers, len(nomes_videos)))
+        linha += f" | Estimativa: ~{formatar_duracao(estimativa)} (fator de tempo real {fator:.2f})"
+    print(linha)
@@ -1,4 +1,7 @@
 from pathlib import Path
+from src import cache_transcricoes
+from src import formatos_saida
+from src import transcriber
 from src.utils import confirmar_acao
 
 
@@ -51,23 +54,56 @@ def obter_nomes_videos():
 
 def analisar_status_videos(nomes_videos):
     """
-    Para cada vídeo da lista, verifica se já existe um arquivo
-    de transcrição correspondente em 'transcripts/'.
+    Para cada vídeo da lista, consulta o cache de transcrições (hash do
+    conteúdo + modelo + parâmetros de decodificação) para saber se já existe
+    uma transcrição válida em 'transcripts/'.
 
-    Retorna duas listas: (nao_transcritos, ja_transcritos)
-    contendo os nomes dos arquivos.
+    Vídeos renomeados reaproveitam a transcrição existente; transcrições de
+    um conteúdo substituído ou de outra configuração contam como não
+    transcritas. Nada é gravado em 'transcripts/' aqui: as cópias ficam para
+    completar_ja_transcritos, depois da confirmação.
+
+    Retorna (nao_transcritos, ja_transcritos, reaproveitados): duas listas
+    com os nomes dos arquivos e um dicionário {nome_video: transcrição de origem}.
     """
-    pasta_transcripts = obter_pasta_projeto() / "transcripts"
+    assinatura = transcriber.obter_assinatura_configuracao()
     nao_transcritos = []
     ja_transcritos = []
+    reaproveitados = {}
+    desatualizados = []
     for nome_video in nomes_videos:
-        nome_base = Path(nome_video).stem
-        arquivo_transcricao = pasta_transcripts / f"{nome_base}.txt"
-        if arquivo_transcricao.exists():
+        status, origem = cache_transcricoes.consultar_status(nome_video, assinatura, formatos_saida.FORMATOS_SAIDA)
+        if status in (cache_transcricoes.STATUS_TRANSCRITO, cache_transcricoes.STATUS_REAPROVEITADO):
             ja_transcritos.append(nome_video)
+            if status == cache_transcricoes.STATUS_REAPROVEITADO:
+                reaproveitados[nome_video] = origem
         else:
             nao_transcritos.append(nome_video)
-    return nao_transcritos, ja_transcritos
+            if status == cache_transcricoes.STATUS_DESATUALIZADO:
+                desatualizados.append(nome_video)
+    if reaproveitados:
+        print(f"♻️  Transcrição do mesmo conteúdo a reaproveitar ({len(reaproveitados)}):")
+        for nome, origem in reaproveitados.items():
+            print(f"   • {nome} ← {origem.name}")
+        print()
+    if desatualizados:
+        print(f"⚠️  Transcrição desatualizada (vídeo, configuração ou formatos mudaram) ({len(desatualizados)}):")
+        for nome in desatualizados:
+            print(f"   • {nome}")
+        print()
+    return nao_transcritos, ja_transcritos, reaproveitados
+
+
+def completar_ja_transcritos(ja_transcritos, reaproveitados):
+    """
+    Depois da confirmação, e quando os vídeos já transcritos não serão
+    reprocessados: copia as transcrições reaproveitadas de vídeos renomeados
+    e gera os formatos de saída que faltam a partir do resultado guardado.
+    """
+    for nome_video in ja_transcritos:
+        arquivos = transcriber.completar_saidas(nome_video, reaproveitados.get(nome_video))
+        if arquivos:
+            print(f"♻️  {nome_video}: {', '.join(arquivo.name for arquivo in arquivos)}")
 
 
 def confirmar_processamento_inteligente(videos_nao_transcritos, videos_ja_transcritos):
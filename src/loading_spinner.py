@@ -13,9 +13,12 @@ class SpinnerCarregamento:
       spinner.start()
       ... operação demorada ...
       spinner.stop()
+
+    Com silencioso=True (carregamentos em segundo plano), não escreve nada.
     """
-    def __init__(self, mensagem):
+    def __init__(self, mensagem, silencioso=False):
         self.mensagem = mensagem
+        self.silencioso = silencioso
         # Sequência de caracteres usados para criar o efeito de spinner
         self.spinner_chars = "⠋⠙⠹⠸⠼⠴⠦⠧"
         self.running = False
@@ -33,6 +36,8 @@ class SpinnerCarregamento:
 
     def start(self):
         # Inicia a thread do spinner
+        if self.silencioso:
+            return
         self.running = True
         self.thread = threading.Thread(target=self._spin)
         self.thread.daemon = True
@@ -40,6 +45,8 @@ class SpinnerCarregamento:
 
     def stop(self):
         # Para o spinner e limpa a linha no terminal
+        if self.silencioso:
+            return
         self.running = False
         if self.thread:
             self.thread.join()
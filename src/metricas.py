@@ -0,0 +1,152 @@
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from src.utils import obter_memoria_atual_mb
+
+
+# -------------------------------
+# Configurações das métricas estruturadas
+# -------------------------------
+METRICAS_ATIVADAS = True  # Emite um evento JSON por etapa de cada vídeo
+
+METRICAS_ARQUIVO = "logs/metricas.jsonl"  # Caminho (relativo ao projeto) do log JSON Lines; None desativa
+
+METRICAS_SOCKET = None  # Destino UDP "host:porta" para enviar cada evento; None desativa
+
+METRICAS_INTERVALO_MEMORIA = 0.05  # Intervalo (s) entre leituras da memória residente durante as etapas
+
+_trava_escrita = threading.Lock()
+_socket_udp = None
+
+# Pico de memória (MB) de cada etapa aberta, atualizado pela thread de amostragem
+_trava_amostragem = threading.Lock()
+_picos_abertos = {}
+_amostrador = None
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def _enviar_udp(linha):
+    # Envia o evento sem bloquear; falhas de rede não interrompem a transcrição
+    global _socket_udp
+    host, _, porta = METRICAS_SOCKET.rpartition(":")
+    try:
+        if _socket_udp is None:
+            _socket_udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _socket_udp.sendto(linha.encode("utf-8"), (host, int(porta)))
+    except (OSError, ValueError):
+        pass
+
+
+def registrar_evento(etapa, video=None, **campos):
+    """
+    Grava um evento estruturado (uma linha JSON) no arquivo de métricas
+    e/ou envia ao socket configurado.
+    """
+    if not METRICAS_ATIVADAS:
+        return None
+    evento = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+        "pid": os.getpid(),
+        "etapa": etapa,
+        "video": video,
+        **campos,
+    }
+    linha = json.dumps(evento, ensure_ascii=False, default=str)
+
+    if METRICAS_ARQUIVO:
+        caminho = obter_pasta_projeto() / METRICAS_ARQUIVO
+        with _trava_escrita:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            # Linhas curtas em modo append não se misturam entre processos
+            with open(caminho, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+    if METRICAS_SOCKET:
+        _enviar_udp(linha)
+    return evento
+
+
+def _amostrar_memoria():
+    # Thread de fundo: enquanto houver etapas abertas, lê a memória residente e atualiza o pico de cada uma
+    global _amostrador
+    while True:
+        memoria = obter_memoria_atual_mb()
+        with _trava_amostragem:
+            if not _picos_abertos:
+                _amostrador = None
+                return
+            if memoria is not None:
+                for etapa_aberta, pico in _picos_abertos.items():
+                    _picos_abertos[etapa_aberta] = max(pico, memoria)
+        time.sleep(METRICAS_INTERVALO_MEMORIA)
+
+
+def _abrir_pico(memoria_inicio):
+    # Passa a acompanhar o pico de uma etapa; a thread de amostragem é criada sob demanda
+    global _amostrador
+    etapa_aberta = object()
+    with _trava_amostragem:
+        _picos_abertos[etapa_aberta] = memoria_inicio
+        if _amostrador is None:
+            _amostrador = threading.Thread(target=_amostrar_memoria, daemon=True)
+            _amostrador.start()
+    return etapa_aberta
+
+
+def _fechar_pico(etapa_aberta):
+    # Retorna o pico observado desde _abrir_pico e deixa de acompanhar a etapa
+    with _trava_amostragem:
+        return _picos_abertos.pop(etapa_aberta)
+
+
+@contextmanager
+def medir_etapa(etapa, video=None, **campos):
+    """
+    Mede tempo de parede, tempo de CPU e memória residente de um bloco e
+    registra o evento ao final (inclusive em caso de erro).
+
+    A memória é lida no início e no fim da etapa e, enquanto ela corre, a
+    cada METRICAS_INTERVALO_MEMORIA segundos: 'pico_memoria_mb' é o maior
+    valor do processo durante a etapa, mesmo que a memória tenha sido
+    liberada antes do fim. Sem o /proc do Linux, os campos de memória
+    ficam de fora.
+
+    O dicionário entregue pelo 'with' pode receber campos extras, como
+    'duracao_audio' (que gera o fator de tempo real), 'bytes_temp' ou
+    'sucesso' = False para etapas que falham sem exceção.
+    """
+    dados = dict(campos)
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    memoria_inicio = obter_memoria_atual_mb()
+    etapa_aberta = _abrir_pico(memoria_inicio) if memoria_inicio is not None else None
+    sucesso = False
+    try:
+        yield dados
+        sucesso = True
+    finally:
+        tempo_parede = time.perf_counter() - inicio_parede
+        dados["tempo_parede"] = round(tempo_parede, 4)
+        dados["tempo_cpu"] = round(time.process_time() - inicio_cpu, 4)
+        if etapa_aberta is not None:
+            pico = _fechar_pico(etapa_aberta)
+            memoria_fim = obter_memoria_atual_mb()
+            dados["memoria_inicio_mb"] = round(memoria_inicio, 1)
+            if memoria_fim is not None:
+                dados["memoria_fim_mb"] = round(memoria_fim, 1)
+                pico = max(pico, memoria_fim)
+            dados["pico_memoria_mb"] = round(pico, 1)
+        duracao_audio = dados.get("duracao_audio")
+        if duracao_audio:
+            dados["fator_tempo_real"] = round(tempo_parede / duracao_audio, 4)
+        dados["sucesso"] = sucesso and dados.get("sucesso", True)
+        registrar_evento(etapa, video, **dados)
@@ -0,0 +1,355 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src import armazenamento_temp
+from src import cache_mel
+from src import calibracao
+from src import cleanup
+from src import decodificacao_lote
+from src import extract_audio
+from src import fila_tarefas
+from src import formatos_saida
+from src import indice_midias
+from src import supervisor
+from src import transcriber
+from src import workers
+from src.utils import exibir_cabecalho, formatar_duracao
+
+
+# -------------------------------
+# Configurações do pipeline extração/transcrição
+# -------------------------------
+PIPELINE_PROFUNDIDADE_FILA = 2  # Quantos áudios extraídos podem aguardar a transcrição
+
+PIPELINE_EXTRATORES = 2  # Processos do FFmpeg rodando em segundo plano ao mesmo tempo
+
+
+def _extrair_em_segundo_plano(nome_video, evento_parada):
+    """
+    Executa a extração de um vídeo em uma thread de fundo.
+
+    Um áudio extraído em memória é contado no limite do armazenamento
+    temporário (src/armazenamento_temp.py) até ser liberado; os arquivos
+    em disco já entram na conta pela própria pasta.
+
+    Retorna (sucesso, caminho_audio, bytes_memoria, tempo_extracao).
+    """
+    tempo_inicio = time.time()
+    # Com o espectrograma em cache (src/cache_mel.py), a transcrição dispensa o áudio
+    caminho_audio = transcriber.obter_audio_em_cache(nome_video)
+    if caminho_audio is not None:
+        return True, caminho_audio, 0, time.time() - tempo_inicio
+    sucesso, caminho_audio = extract_audio.obter_audio_do_video(nome_video, evento_parada)
+    tempo_extracao = time.time() - tempo_inicio
+    bytes_memoria = 0
+    if sucesso and hasattr(caminho_audio, "nbytes"):
+        bytes_memoria = caminho_audio.nbytes
+        armazenamento_temp.registrar_em_memoria(bytes_memoria)
+    return sucesso, caminho_audio, bytes_memoria, tempo_extracao
+
+
+def _produzir(executor, fila, evento_parada):
+    # Agenda as extrações na ordem da fila persistente; a fila limitada e o limite do
+    # armazenamento temporário seguram o produtor. Termina quando não há pendentes
+    # nem vídeos em execução que possam voltar para nova tentativa
+    while not evento_parada.is_set():
+        armazenamento_temp.aguardar_espaco(evento_parada)
+        if evento_parada.is_set():
+            break
+        nome_video = fila_tarefas.reservar_proxima()
+        if nome_video is None:
+            if not fila_tarefas.ha_trabalho():
+                break
+            evento_parada.wait(fila_tarefas.FILA_INTERVALO)
+            continue
+        futuro = executor.submit(_extrair_em_segundo_plano, nome_video, evento_parada)
+        while True:
+            try:
+                fila.put((nome_video, futuro), timeout=0.5)
+                break
+            except queue.Full:
+                if evento_parada.is_set():
+                    # Extração já iniciada ou concluída: o áudio é apagado assim que ficar pronto
+                    if not futuro.cancel():
+                        futuro.add_done_callback(_descartar_resultado)
+                    return
+    fila.put(None)
+
+
+def _descartar_resultado(futuro):
+    # Apaga o áudio de uma extração que não será transcrita e libera seu espaço no limite
+    try:
+        sucesso, caminho_audio, bytes_memoria, _ = futuro.result()
+    except Exception:
+        return
+    if sucesso:
+        _ = cleanup.limpar_audio(caminho_audio)
+    armazenamento_temp.liberar_em_memoria(bytes_memoria)
+
+
+def _descartar_pendentes(fila):
+    # Esvazia a fila removendo áudios já extraídos que não serão transcritos
+    while True:
+        try:
+            item = fila.get_nowait()
+        except queue.Empty:
+            return
+        if item is None:
+            continue
+        _, futuro = item
+        if not futuro.cancel():
+            _descartar_resultado(futuro)
+
+
+def executar_pipeline(grupo=None):
+    """
+    Processa os vídeos da fila persistente (src/fila_tarefas.py) sobrepondo
+    a extração de áudio (FFmpeg) dos próximos vídeos com a transcrição
+    (Whisper) do vídeo atual.
+
+    A extração roda em PIPELINE_EXTRATORES threads de fundo e entrega os áudios
+    por uma fila limitada a PIPELINE_PROFUNDIDADE_FILA itens; o espaço ocupado
+    pelos áudios aguardando, em disco ou memória, respeita o limite do
+    armazenamento temporário (ARMAZENAMENTO_LIMITE_BYTES).
+
+    Com SUPERVISOR_ATIVADO, a transcrição de cada vídeo roda em um processo
+    supervisionado, encerrado e substituído se passar do limite de memória
+    ou de tempo. Um vídeo com falha volta à fila para nova tentativa
+    enquanto os demais seguem; com Ctrl+C, os vídeos em andamento voltam a
+    ficar pendentes.
+
+    Com LOTE_ATIVADO (src/decodificacao_lote.py), os vídeos já extraídos que
+    aguardam na fila (até LOTE_ARQUIVOS) são transcritos juntos, com as
+    janelas de 30 s de todos decodificadas nos mesmos lotes.
+
+    'grupo' é um GrupoSupervisionado já criado (pelo pré-carregamento em
+    src/precarregamento.py), usado no lugar de um novo e encerrado ao fim.
+
+    Retorna (sucessos, estatisticas) onde 'estatisticas' é um dicionário com
+    os tempos acumulados de cada etapa, o tempo total de parede e a lista de
+    falhas definitivas como tuplas (nome_video, motivo).
+    """
+    # Com a decodificação em lote, a fila comporta um grupo inteiro de vídeos
+    profundidade = PIPELINE_PROFUNDIDADE_FILA
+    if decodificacao_lote.LOTE_ATIVADO:
+        profundidade = max(profundidade, decodificacao_lote.LOTE_ARQUIVOS)
+    fila = queue.Queue(maxsize=max(1, profundidade))
+    evento_parada = threading.Event()
+    estatisticas = {
+        "tempo_extracao": 0.0,
+        "tempo_transcricao": 0.0,
+        "tempo_espera_extracao": 0.0,
+        "tempo_total": 0.0,
+        "falhas": [],
+    }
+    sucessos = 0
+    total = fila_tarefas.contar_pendentes()
+    tempo_inicio = time.time()
+
+    if grupo is None and supervisor.SUPERVISOR_ATIVADO:
+        grupo = _criar_grupo_supervisionado()
+    executor = ThreadPoolExecutor(max_workers=max(1, PIPELINE_EXTRATORES))
+    produtor = threading.Thread(
+        target=_produzir,
+        args=(executor, fila, evento_parada),
+        daemon=True
+    )
+    produtor.start()
+
+    try:
+        i = 0
+        fim = False
+        while not fim:
+            itens, fim = _obter_proximos(fila)
+            extraidos = []
+            for nome_video, futuro in itens:
+                tentativa = fila_tarefas.obter_tentativas(nome_video)
+                if tentativa > 1:
+                    exibir_cabecalho(f"🔁 NOVA TENTATIVA ({tentativa}/{fila_tarefas.FILA_MAX_TENTATIVAS}) - {nome_video}")
+                else:
+                    i += 1
+                    exibir_cabecalho(f"🔄 VÍDEO {i}/{max(i, total)} - {nome_video}")
+                print("\n🎵 [1/2] EXTRAINDO ÁUDIO")
+
+                # Tempo em que o Whisper ficou ocioso aguardando o FFmpeg
+                tempo_espera_inicio = time.time()
+                try:
+                    sucesso_extracao, caminho_audio, bytes_memoria, tempo_extracao = futuro.result()
+                except Exception as excecao:
+                    sucesso_extracao, caminho_audio, bytes_memoria, tempo_extracao = False, None, 0, 0.0
+                    motivo = f"{type(excecao).__name__}: {excecao}"
+                else:
+                    motivo = "falha na extração do áudio"
+                estatisticas["tempo_espera_extracao"] += time.time() - tempo_espera_inicio
+                estatisticas["tempo_extracao"] += tempo_extracao
+
+                if not sucesso_extracao:
+                    _registrar_falha(nome_video, motivo, tempo_extracao, estatisticas)
+                    continue
+                if isinstance(caminho_audio, cache_mel.AudioEmCache):
+                    print(f"♻️  Espectrograma em cache, extração dispensada\n")
+                else:
+                    print(f"✅ Áudio extraído com sucesso\n")
+                extraidos.append((nome_video, caminho_audio, bytes_memoria, tempo_extracao))
+            if not extraidos:
+                continue
+
+            tempo_transcricao_inicio = time.time()
+            try:
+                situacoes = _transcrever_extraidos(grupo, extraidos)
+            except Exception as excecao:
+                if grupo is not None and grupo.erro is not None:
+                    # Sem processos de transcrição (falha ao iniciar) o lote não tem como seguir;
+                    # os vídeos reservados voltam a ficar pendentes
+                    for _, caminho_audio, _, _ in extraidos:
+                        cleanup.limpar_audio(caminho_audio)
+                    raise
+                # Um vídeo problemático não interrompe o lote: volta à fila para nova tentativa
+                motivo = f"{type(excecao).__name__}: {excecao}"
+                situacoes = {nome_video: (False, motivo) for nome_video, _, _, _ in extraidos}
+            finally:
+                tempo_transcricao = time.time() - tempo_transcricao_inicio
+                estatisticas["tempo_transcricao"] += tempo_transcricao
+                for _, _, bytes_memoria, _ in extraidos:
+                    armazenamento_temp.liberar_em_memoria(bytes_memoria)
+
+            # Decodificados juntos, os vídeos dividem o tempo da transcrição
+            tempo_por_video = tempo_transcricao / len(extraidos)
+            for nome_video, _, _, tempo_extracao in extraidos:
+                sucesso, motivo = situacoes.get(nome_video, (False, "falha na transcrição"))
+                if sucesso:
+                    sucessos += 1
+                    fila_tarefas.concluir(nome_video, tempo_extracao + tempo_por_video)
+                else:
+                    _registrar_falha(nome_video, motivo or "falha na transcrição",
+                                     tempo_extracao + tempo_por_video, estatisticas)
+    finally:
+        evento_parada.set()
+        _descartar_pendentes(fila)
+        produtor.join()
+        _descartar_pendentes(fila)
+        executor.shutdown(wait=True, cancel_futures=True)
+        _descartar_pendentes(fila)
+        if grupo is not None:
+            grupo.encerrar()
+        # Vídeos reservados e não concluídos (Ctrl+C) ficam para a próxima execução
+        fila_tarefas.liberar_reservas()
+        estatisticas["tempo_total"] = time.time() - tempo_inicio
+
+    return sucessos, estatisticas
+
+
+def _criar_grupo_supervisionado():
+    # Um processo de transcrição (mais a reserva aquecida) com todas as threads da máquina;
+    # o download, se necessário, acontece aqui, antes de os processos carregarem o modelo
+    transcriber.baixar_modelos()
+    calibracao.aplicar_calibracao()
+    return supervisor.GrupoSupervisionado(
+        1,
+        transcriber.inicializar_processo_worker,
+        (workers.dividir_threads(1), formatos_saida.FORMATOS_SAIDA)
+    )
+
+
+def _obter_proximos(fila):
+    # Aguarda o próximo vídeo e, com a decodificação em lote, junta os que já estão na fila
+    # (até LOTE_ARQUIVOS). Retorna (itens, fim), com fim=True quando a fila foi encerrada
+    item = fila.get()
+    if item is None:
+        return [], True
+    itens = [item]
+    limite = decodificacao_lote.LOTE_ARQUIVOS if decodificacao_lote.LOTE_ATIVADO else 1
+    while len(itens) < limite:
+        try:
+            item = fila.get_nowait()
+        except queue.Empty:
+            break
+        if item is None:
+            return itens, True
+        itens.append(item)
+    return itens, False
+
+
+def _transcrever_extraidos(grupo, extraidos):
+    # Transcreve os áudios já extraídos, um a um ou juntos em lote; retorna {nome_video: (sucesso, motivo)}
+    if len(extraidos) == 1:
+        nome_video, caminho_audio, _, _ = extraidos[0]
+        if grupo is not None:
+            return {nome_video: _transcrever_supervisionado(grupo, caminho_audio, nome_video)}
+        sucesso = transcriber.concluir_transcricao(caminho_audio, nome_video)
+        return {nome_video: (sucesso, None if sucesso else "falha na transcrição")}
+
+    itens = [(nome_video, caminho_audio) for nome_video, caminho_audio, _, _ in extraidos]
+    if grupo is None:
+        return transcriber.concluir_transcricoes_em_lote(
+            [(caminho_audio, nome_video) for nome_video, caminho_audio in itens]
+        )
+    return _transcrever_lote_supervisionado(grupo, itens)
+
+
+def _calcular_tempo_limite(nome_video):
+    # Tempo limite do processo supervisionado, proporcional à duração do vídeo
+    info = indice_midias.indexar_videos([nome_video])[nome_video]
+    return supervisor.calcular_tempo_limite(info["duracao"] if info else None, transcriber.MODEL_SIZE)
+
+
+def _transcrever_supervisionado(grupo, caminho_audio, nome_video):
+    # Transcreve o áudio já extraído em um processo supervisionado; retorna (sucesso, motivo)
+    sucesso, resultado = grupo.executar(
+        workers.processar_no_worker, (nome_video, caminho_audio), _calcular_tempo_limite(nome_video), nome_video
+    )
+    if not sucesso:
+        # O processo foi encerrado antes de remover o próprio áudio temporário
+        cleanup.limpar_audio(caminho_audio)
+        return False, resultado
+    _, sucesso, erro, _, estatisticas_video = resultado
+    workers.somar_estatisticas_modulos(estatisticas_video)
+    return sucesso, erro
+
+
+def _transcrever_lote_supervisionado(grupo, itens):
+    # Transcreve vários áudios juntos em um processo supervisionado, com a soma dos tempos limite
+    limite_tempo = sum(_calcular_tempo_limite(nome_video) for nome_video, _ in itens)
+    sucesso, resultado = grupo.executar(
+        workers.processar_lote_no_worker, (itens,), limite_tempo, ", ".join(nome for nome, _ in itens)
+    )
+    if not sucesso:
+        for _, caminho_audio in itens:
+            cleanup.limpar_audio(caminho_audio)
+        return {nome_video: (False, resultado) for nome_video, _ in itens}
+    situacoes, estatisticas_lote = resultado
+    workers.somar_estatisticas_modulos(estatisticas_lote)
+    return situacoes
+
+
+def _registrar_falha(nome_video, motivo, tempo, estatisticas):
+    # Agenda nova tentativa ou, esgotadas as tentativas, conta como falha definitiva
+    espera = fila_tarefas.registrar_falha(nome_video, motivo, tempo)
+    if espera is None:
+        print(f"❌ {nome_video}: {motivo} (sem novas tentativas)")
+        estatisticas["falhas"].append((nome_video, motivo))
+    else:
+        print(f"🔁 {nome_video}: {motivo}; nova tentativa em {formatar_duracao(espera)}")
+
+
+def exibir_relatorio_sobreposicao(estatisticas):
+    """
+    Mostra quanto tempo cada etapa consumiu e quanto foi economizado
+    executando a extração em paralelo com a transcrição.
+    """
+    tempo_extracao = estatisticas["tempo_extracao"]
+    tempo_transcricao = estatisticas["tempo_transcricao"]
+    tempo_espera = estatisticas["tempo_espera_extracao"]
+    tempo_total = estatisticas["tempo_total"]
+
+    # Parte da extração que ficou escondida atrás da transcrição
+    extracao_sobreposta = max(0.0, tempo_extracao - tempo_espera)
+    ganho = max(0.0, tempo_extracao + tempo_transcricao - tempo_total)
+
+    print(f"\n⚙️  Etapas do pipeline:")
+    print(f"   🎵 Extração: {formatar_duracao(tempo_extracao)} "
+          f"({formatar_duracao(extracao_sobreposta)} em paralelo com a transcrição)")
+    print(f"   📝 Transcrição: {formatar_duracao(tempo_transcricao)}")
+    print(f"   ⏳ Espera pelo FFmpeg: {formatar_duracao(tempo_espera)}")
+    print(f"   ⏩ Tempo economizado pela sobreposição: {formatar_duracao(ganho)}")
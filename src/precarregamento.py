@@ -0,0 +1,79 @@
+import threading
+from src import calibracao
+from src import formatos_saida
+from src import supervisor
+from src import transcriber
+from src import workers
+
+
+# -------------------------------
+# Configurações do pré-carregamento do modelo
+# -------------------------------
+PRECARREGAMENTO_ATIVADO = True  # Carrega o modelo em segundo plano enquanto os vídeos são listados e o usuário responde
+
+PRECARREGAMENTO_AQUECIMENTO = True  # Faz também uma decodificação curta, para a primeira transcrição não pagar a inicialização
+
+# Acionado com Ctrl+C ou cancelamento: a thread de pré-carregamento para na próxima etapa
+_cancelamento = threading.Event()
+
+# Grupo de processos já criado (com SUPERVISOR_ATIVADO ou --workers), entregue à transcrição
+_grupo = None
+
+
+def iniciar(num_workers=1):
+    """
+    Começa a carregar o modelo sem bloquear o programa, logo após a
+    verificação de pré-requisitos: a busca dos vídeos, o ffprobe, a
+    confirmação e a primeira extração correm enquanto isso.
+
+    Com processos supervisionados (ou --workers), os processos de
+    transcrição são criados agora e carregam o modelo cada um por si;
+    sem eles, uma thread de fundo o carrega no próprio processo, e a
+    transcrição espera por ela se ainda não terminou.
+
+    Nada é feito se os modelos ainda precisam ser baixados: o download
+    mostra o progresso e acontece só se houver o que transcrever.
+    Retorna True se o pré-carregamento começou.
+    """
+    global _grupo
+    if not PRECARREGAMENTO_ATIVADO or not transcriber.modelos_disponiveis():
+        return False
+    _cancelamento.clear()
+    if supervisor.SUPERVISOR_ATIVADO or num_workers > 1:
+        # A afinidade calibrada é herdada pelos processos criados a seguir
+        calibracao.aplicar_calibracao()
+        _grupo = supervisor.GrupoSupervisionado(
+            num_workers,
+            transcriber.inicializar_processo_worker,
+            (workers.dividir_threads(num_workers), formatos_saida.FORMATOS_SAIDA, PRECARREGAMENTO_AQUECIMENTO),
+            silencioso=True
+        )
+        return True
+    threading.Thread(
+        target=transcriber.precarregar_modelos,
+        args=(_cancelamento, PRECARREGAMENTO_AQUECIMENTO),
+        daemon=True
+    ).start()
+    return True
+
+
+def retirar_grupo():
+    """
+    Entrega o grupo de processos criado por iniciar (ou None), que passa
+    a ser encerrado por quem o recebeu.
+    """
+    global _grupo
+    grupo, _grupo = _grupo, None
+    return grupo
+
+
+def cancelar():
+    """
+    Interrompe o pré-carregamento (Ctrl+C ou nada a transcrever): a thread
+    para antes da próxima etapa e os processos ainda não entregues à
+    transcrição são encerrados.
+    """
+    _cancelamento.set()
+    grupo = retirar_grupo()
+    if grupo is not None:
+        grupo.encerrar()
@@ -0,0 +1,187 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from src.utils import formatar_duracao, obter_pico_memoria_mb
+
+
+def obter_caminho_modelo_quantizado(pasta_models, tamanho_modelo):
+    """
+    Retorna o caminho do modelo quantizado (int8) guardado em 'models/'.
+    """
+    return Path(pasta_models) / f"{tamanho_modelo}.int8.pt"
+
+
+def quantizar_modelo(modelo):
+    """
+    Aplica quantização dinâmica int8 às camadas lineares do modelo (no lugar).
+
+    O whisper usa uma subclasse própria de nn.Linear que apenas converte o
+    tipo dos pesos; em fp32 ela equivale à nn.Linear, então a classe é
+    trocada para que o PyTorch reconheça as camadas a quantizar.
+    """
+    import torch
+    from whisper.model import Linear as LinearWhisper
+
+    for modulo in modelo.modules():
+        if type(modulo) is LinearWhisper:
+            modulo.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(
+        modelo,
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+        inplace=True
+    )
+
+
+def salvar_modelo_quantizado(modelo, caminho):
+    """
+    Grava o modelo quantizado inteiro para não precisar quantizar de novo.
+    A gravação usa um arquivo temporário renomeado ao final.
+    """
+    import torch
+
+    caminho = Path(caminho)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    try:
+        torch.save(modelo, temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+
+def carregar_modelo_quantizado(caminho):
+    """
+    Carrega um modelo gravado por salvar_modelo_quantizado.
+    """
+    import torch
+
+    # O arquivo contém o módulo completo (gerado localmente), não só tensores
+    return torch.load(caminho, map_location="cpu", weights_only=False).eval()
+
+
+def calcular_tamanho_modelo(modelo):
+    """
+    Retorna o tamanho (bytes) dos pesos do modelo quando serializados.
+    """
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(modelo.state_dict(), buffer)
+    return buffer.tell()
+
+
+def calcular_taxa_erro_palavras(referencia, hipotese):
+    """
+    Calcula a taxa de erro de palavras (WER) de 'hipotese' em relação a
+    'referencia', usando distância de edição entre as sequências de palavras.
+    """
+    palavras_ref = referencia.lower().split()
+    palavras_hip = hipotese.lower().split()
+    if not palavras_ref:
+        return 0.0 if not palavras_hip else 1.0
+
+    anterior = list(range(len(palavras_hip) + 1))
+    for i, palavra_ref in enumerate(palavras_ref, 1):
+        atual = [i] + [0] * len(palavras_hip)
+        for j, palavra_hip in enumerate(palavras_hip, 1):
+            custo = 0 if palavra_ref == palavra_hip else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+        anterior = atual
+    return anterior[-1] / len(palavras_ref)
+
+
+def _medir_transcricao(modelo, audio, parametros):
+    # Retorna (texto, segundos) de uma transcrição do clipe de referência
+    tempo_inicio = time.time()
+    resultado = modelo.transcribe(audio, verbose=None, **parametros)
+    return resultado["text"].strip(), time.time() - tempo_inicio
+
+
+def _caminho_int8():
+    from src import transcriber
+    return obter_caminho_modelo_quantizado(transcriber.configurar_diretorio_modelo(), transcriber.MODEL_SIZE)
+
+
+def _preparar_int8():
+    # Quantiza o modelo e o guarda em 'models/' (feito em um processo à parte,
+    # para que o fp32 carregado aqui não entre na medida de memória do int8)
+    from src import transcriber
+    salvar_modelo_quantizado(quantizar_modelo(transcriber.carregar_modelo_fp32()), _caminho_int8())
+
+
+def _medir_variante(variante, audio, parametros):
+    # Executada em um processo novo: carrega só a variante pedida, de modo que o
+    # pico de memória do processo é o dela. Retorna (texto, segundos, bytes, pico_mb)
+    from src import transcriber
+    if variante == "int8":
+        modelo = carregar_modelo_quantizado(_caminho_int8())
+    else:
+        modelo = transcriber.carregar_modelo_fp32()
+    texto, tempo = _medir_transcricao(modelo, audio, parametros)
+    return texto, tempo, calcular_tamanho_modelo(modelo), obter_pico_memoria_mb()
+
+
+def _em_processo_novo(funcao, *argumentos):
+    # Cada chamada ganha um processo próprio, sem nada carregado por medidas anteriores
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(funcao, *argumentos).result()
+
+
+def comparar_quantizacao(caminho_clipe):
+    """
+    Compara o modelo fp32 com a versão int8 em um clipe de referência:
+    tempo de transcrição, tamanho dos pesos, pico de memória e diferença
+    entre os textos (WER do int8 tomando o fp32 como referência).
+
+    Cada variante é medida em um processo novo: o pico de memória de um
+    processo nunca diminui, e medir as duas no mesmo processo tornaria o
+    valor do int8 sempre maior ou igual ao do fp32.
+
+    Retorna um dicionário com as medidas e exibe um resumo.
+    """
+    from src import extract_audio
+    from src import transcriber
+
+    audio = extract_audio.extrair_audio_para_memoria(Path(caminho_clipe))
+    if audio is None:
+        print(f"❌ Não foi possível extrair o áudio de: {caminho_clipe}")
+        return None
+    duracao_audio = len(audio) / extract_audio.AUDIO_SAMPLE_RATE
+    parametros = transcriber.obter_parametros_decodificacao()
+
+    print(f"🔬 Comparando fp32 × int8 em {Path(caminho_clipe).name} ({formatar_duracao(duracao_audio)})")
+
+    if not _caminho_int8().exists():
+        _em_processo_novo(_preparar_int8)
+    texto_fp32, tempo_fp32, tamanho_fp32, pico_fp32 = _em_processo_novo(_medir_variante, "fp32", audio, parametros)
+    texto_int8, tempo_int8, tamanho_int8, pico_int8 = _em_processo_novo(_medir_variante, "int8", audio, parametros)
+
+    medidas = {
+        "duracao_audio": duracao_audio,
+        "tempo_fp32": tempo_fp32,
+        "tempo_int8": tempo_int8,
+        "aceleracao": tempo_fp32 / tempo_int8 if tempo_int8 > 0 else None,
+        "bytes_fp32": tamanho_fp32,
+        "bytes_int8": tamanho_int8,
+        "pico_memoria_mb_fp32": pico_fp32,
+        "pico_memoria_mb_int8": pico_int8,
+        "wer_int8": calcular_taxa_erro_palavras(texto_fp32, texto_int8),
+    }
+
+    print(f"   ⏱️  fp32: {tempo_fp32:.1f}s | int8: {tempo_int8:.1f}s", end="")
+    if medidas["aceleracao"] is not None:
+        print(f" ({medidas['aceleracao']:.2f}x)")
+    else:
+        print()
+    economia = 1 - tamanho_int8 / tamanho_fp32 if tamanho_fp32 else 0.0
+    print(f"   💾 Pesos: {tamanho_fp32 / 1024 ** 2:.0f} MB → {tamanho_int8 / 1024 ** 2:.0f} MB "
+          f"({economia:.0%} menor)")
+    if pico_fp32 is not None and pico_int8 is not None:
+        print(f"   📈 Pico de memória (processo próprio de cada variante): "
+              f"{pico_fp32:.0f} MB (fp32) | {pico_int8:.0f} MB (int8)")
+    print(f"   📝 Diferença no texto (WER): {medidas['wer_int8']:.1%}")
+    return medidas
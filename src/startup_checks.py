@@ -66,6 +66,8 @@ def verificar_prerequisitos():
         "models": pasta_projeto / "models",
         "transcripts": pasta_projeto / "transcripts",
         "temp_audios": pasta_projeto / "temp_audios",
+        "cache": pasta_projeto / "cache",
+        "logs": pasta_projeto / "logs",
     }
 
     for nome, pasta in pastas_essenciais.items():
@@ -93,6 +95,12 @@ def verificar_prerequisitos():
             "\n"
             "videos/*\n"
             "!videos/.gitkeep\n"
+            "\n"
+            "cache/*\n"
+            "!cache/.gitkeep\n"
+            "\n"
+            "logs/*\n"
+            "!logs/.gitkeep\n"
         )
         _criar_e_ocultar(gitignore_path, gitignore_content)
     except Exception:
@@ -0,0 +1,397 @@
+import contextlib
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from src import indice_midias
+from src import metricas
+
+
+# -------------------------------
+# Configurações dos processos supervisionados
+# -------------------------------
+SUPERVISOR_ATIVADO = True  # Transcreve cada vídeo em um processo separado, vigiado pelo principal
+
+SUPERVISOR_LIMITE_MEMORIA_MB = None  # Memória própria (RSS anônimo) máxima por processo e seus filhos; None = automático
+
+SUPERVISOR_FRACAO_MEMORIA = 0.8  # Modo automático: fração da RAM da máquina dividida entre os processos
+
+SUPERVISOR_TEMPO_MINIMO = 300  # Tempo limite (s) mínimo de um vídeo
+
+SUPERVISOR_FATOR_TEMPO = 3.0  # Sem histórico: segundos de processamento permitidos por segundo de áudio
+
+SUPERVISOR_MARGEM_HISTORICO = 4.0  # Com histórico: múltiplo do fator de tempo real medido nas métricas
+
+SUPERVISOR_TEMPO_SEM_DURACAO = 6 * 3600  # Tempo limite (s) quando a duração do vídeo é desconhecida
+
+SUPERVISOR_RESERVA_AQUECIDA = False  # Mantém um processo extra com o modelo carregado para substituir um encerrado (mais um modelo na memória)
+
+_INTERVALO_VERIFICACAO = 0.5  # Segundos entre verificações de memória e tempo
+
+# Estados de um processo supervisionado
+_INICIANDO = "iniciando"
+_LIVRE = "livre"
+_OCUPADO = "ocupado"
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def obter_memoria_total_mb():
+    """
+    Retorna a memória física da máquina (MB), ou None se não for possível saber.
+    """
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def obter_memoria_processo_mb(pid):
+    """
+    Retorna a memória própria (MB) de um processo pelo /proc do Linux.
+
+    Usa o RSS anônimo quando disponível: páginas do modelo mapeado em
+    memória (MODELO_MMAP) são do arquivo, compartilhadas entre processos,
+    e não contam para o limite. Fora do Linux retorna None.
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            campos = dict(linha.split(":", 1) for linha in f if ":" in linha)
+    except OSError:
+        return None
+    valor = campos.get("RssAnon") or campos.get("VmRSS")
+    if valor is None:
+        return None
+    return int(valor.split()[0]) / 1024
+
+
+def _listar_descendentes(pid):
+    # Processos criados por 'pid' (e pelos filhos deles), pelo PPid de cada entrada do /proc
+    filhos = {}
+    try:
+        entradas = os.listdir("/proc")
+    except OSError:
+        return []
+    for entrada in entradas:
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat", encoding="ascii", errors="replace") as f:
+                # O nome do processo, entre parênteses, pode conter espaços
+                campos = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        filhos.setdefault(int(campos[1]), []).append(int(entrada))
+    descendentes = []
+    pendentes = [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        for filho in filhos.get(atual, []):
+            descendentes.append(filho)
+            pendentes.append(filho)
+    return descendentes
+
+
+def obter_memoria_arvore_mb(pid):
+    """
+    Retorna a memória própria (MB) de um processo somada à de todos os seus
+    descendentes (os processos dos trechos de arquivos longos, por exemplo).
+    Fora do Linux retorna None.
+    """
+    total = obter_memoria_processo_mb(pid)
+    if total is None:
+        return None
+    for descendente in _listar_descendentes(pid):
+        total += obter_memoria_processo_mb(descendente) or 0.0
+    return total
+
+
+def calcular_limite_memoria(num_processos):
+    """
+    Retorna o limite de memória (MB) de cada processo, ou None sem limite.
+    """
+    if SUPERVISOR_LIMITE_MEMORIA_MB is not None:
+        return SUPERVISOR_LIMITE_MEMORIA_MB
+    total = obter_memoria_total_mb()
+    if total is None:
+        return None
+    return total * SUPERVISOR_FRACAO_MEMORIA / max(1, num_processos)
+
+
+def calcular_tempo_limite(duracao, modelo=None):
+    """
+    Retorna o tempo máximo (s) para processar um vídeo de 'duracao'
+    segundos: um múltiplo do fator de tempo real histórico (métricas) ou,
+    sem histórico, SUPERVISOR_FATOR_TEMPO por segundo de áudio.
+    """
+    if not duracao:
+        return SUPERVISOR_TEMPO_SEM_DURACAO
+    fator = indice_midias.obter_fator_tempo_real_historico(modelo)
+    if fator is not None:
+        fator = max(fator * SUPERVISOR_MARGEM_HISTORICO, 0.1)
+    else:
+        fator = SUPERVISOR_FATOR_TEMPO
+    return max(SUPERVISOR_TEMPO_MINIMO, duracao * fator)
+
+
+def _laco_processo(conexao, inicializador, argumentos_inicializador, silencioso):
+    # Corpo do processo filho: carrega o modelo uma vez e executa tarefas até receber None.
+    # Ctrl+C é tratado pelo processo principal, que encerra os filhos; o grupo de processos
+    # próprio permite encerrar junto os processos que este criar (trechos de arquivos longos)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    if inicializador is not None:
+        if silencioso:
+            # Processos de reserva carregam o modelo em segundo plano, sem disputar o terminal
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                inicializador(*argumentos_inicializador)
+        else:
+            inicializador(*argumentos_inicializador)
+    conexao.send(("pronto", None))
+    while True:
+        try:
+            mensagem = conexao.recv()
+        except EOFError:
+            # Processo principal encerrado
+            return
+        if mensagem is None:
+            return
+        tarefa, argumentos = mensagem
+        try:
+            conexao.send(("ok", tarefa(*argumentos)))
+        except Exception as excecao:
+            conexao.send(("erro", f"{type(excecao).__name__}: {excecao}"))
+
+
+class _Processo:
+    """
+    Um processo filho e o estado da tarefa que ele executa.
+    """
+
+    def __init__(self, contexto, inicializador, argumentos_inicializador, silencioso=False):
+        self.conexao, conexao_filho = contexto.Pipe()
+        self.processo = contexto.Process(
+            target=_laco_processo,
+            args=(conexao_filho, inicializador, argumentos_inicializador, silencioso)
+        )
+        self.processo.start()
+        conexao_filho.close()
+        self.estado = _INICIANDO
+        self.identificador = None
+        self.rotulo = None
+        self.inicio = None
+        self.limite_tempo = None
+
+    def _matar(self):
+        # Mata o processo e seus descendentes; o grupo só existe depois que o filho chamou setpgrp
+        try:
+            os.killpg(self.processo.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            self.processo.kill()
+
+    def encerrar(self, forcar=False):
+        if forcar:
+            self._matar()
+        else:
+            try:
+                self.conexao.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.processo.join(timeout=None if forcar else 5)
+        if self.processo.is_alive():
+            self._matar()
+            self.processo.join()
+        self.conexao.close()
+
+
+class GrupoSupervisionado:
+    """
+    Conjunto de processos que executam tarefas isoladas (um vídeo por vez
+    em cada processo) sob vigilância do processo principal.
+
+    Um processo que passa do limite de memória (somada à dos processos que
+    ele criou) ou de tempo da sua tarefa é encerrado e substituído; a tarefa é devolvida como falha com o motivo,
+    e as demais continuam. Com SUPERVISOR_RESERVA_AQUECIDA, um processo
+    extra já com o modelo carregado assume no lugar do encerrado; ele só é
+    criado depois que o primeiro processo fica pronto, para não disputar
+    com ele a leitura do modelo.
+
+    Com silencioso=True (grupo criado pelo pré-carregamento, enquanto o
+    usuário responde às perguntas), nenhum processo escreve ao carregar o modelo.
+
+    Um processo que morre ainda iniciando (ex.: falha ao carregar o modelo)
+    encerra o grupo inteiro: 'erro' guarda o motivo, e qualquer chamada
+    seguinte lança RuntimeError em vez de esperar por processos que não existem.
+    """
+
+    def __init__(self, num_processos, inicializador=None, argumentos_inicializador=(), silencioso=False):
+        self.num_processos = max(1, num_processos)
+        self.limite_memoria_mb = calcular_limite_memoria(self.num_processos)
+        # "spawn" em vez do fork padrão do Linux: os substitutos são criados com o pipeline em
+        # andamento (threads de extração, ffprobe, métricas), e um fork herdaria travas presas
+        self._contexto = multiprocessing.get_context("spawn")
+        self._inicializador = inicializador
+        self._argumentos_inicializador = argumentos_inicializador
+        self._proximo_identificador = 0
+        self.erro = None
+        self._processos = [self._criar_processo(silencioso) for _ in range(self.num_processos)]
+        self._reserva_pendente = SUPERVISOR_RESERVA_AQUECIDA
+
+    def _criar_processo(self, silencioso=False):
+        return _Processo(self._contexto, self._inicializador, self._argumentos_inicializador, silencioso)
+
+    def _verificar_erro(self):
+        # Grupo encerrado por um processo que morreu ao iniciar: não há mais quem execute tarefas
+        if self.erro is not None:
+            raise RuntimeError(self.erro)
+
+    def livres(self):
+        """
+        Retorna quantas tarefas podem ser enviadas agora: processos prontos,
+        respeitando o máximo de num_processos tarefas simultâneas.
+
+        Lança RuntimeError se o grupo foi encerrado por falha ao iniciar.
+        """
+        self._verificar_erro()
+        ocupados = sum(1 for processo in self._processos if processo.estado == _OCUPADO)
+        prontos = sum(1 for processo in self._processos if processo.estado == _LIVRE)
+        return max(0, min(prontos, self.num_processos - ocupados))
+
+    def enviar(self, tarefa, argumentos, limite_tempo=None, rotulo=None):
+        """
+        Envia uma tarefa (função de módulo e seus argumentos) a um processo
+        livre. Retorna o identificador usado em aguardar().
+
+        Lança RuntimeError se nenhum processo estiver livre.
+        """
+        if self.livres() == 0:
+            raise RuntimeError("nenhum processo livre para a tarefa")
+        processo = next(processo for processo in self._processos if processo.estado == _LIVRE)
+        self._proximo_identificador += 1
+        processo.identificador = self._proximo_identificador
+        processo.rotulo = rotulo
+        processo.inicio = time.time()
+        processo.limite_tempo = limite_tempo
+        processo.estado = _OCUPADO
+        processo.conexao.send((tarefa, argumentos))
+        return processo.identificador
+
+    def _substituir(self, processo, motivo, **campos):
+        # Encerra o processo, registra o motivo e coloca um novo no lugar
+        processo.encerrar(forcar=True)
+        metricas.registrar_evento(
+            "supervisor",
+            processo.rotulo,
+            motivo=motivo,
+            tempo_parede=round(time.time() - processo.inicio, 4) if processo.inicio else None,
+            **campos
+        )
+        self._processos[self._processos.index(processo)] = self._criar_processo(silencioso=True)
+
+    def aguardar(self, timeout=None):
+        """
+        Espera até 'timeout' segundos por tarefas concluídas, vigiando a
+        memória e o tempo dos processos ocupados.
+
+        Retorna uma lista de (identificador, sucesso, resultado): em sucesso,
+        'resultado' é o retorno da tarefa; em falha, o motivo (texto).
+        Lança RuntimeError se um processo morrer antes de ficar pronto
+        (ex.: falha ao carregar o modelo), nesta chamada ou em uma anterior.
+        """
+        self._verificar_erro()
+        limite_espera = None if timeout is None else time.time() + timeout
+        concluidos = []
+        while True:
+            espera = _INTERVALO_VERIFICACAO
+            if limite_espera is not None:
+                espera = max(0.0, min(espera, limite_espera - time.time()))
+            objetos = {}
+            for processo in self._processos:
+                objetos[processo.conexao] = processo
+                objetos[processo.processo.sentinel] = processo
+            prontos = wait(list(objetos), timeout=espera)
+
+            for processo in {objetos[objeto] for objeto in prontos}:
+                if processo not in self._processos:
+                    continue
+                self._receber(processo, concluidos)
+            self._verificar_limites(concluidos)
+
+            if concluidos or (limite_espera is not None and time.time() >= limite_espera):
+                return concluidos
+
+    def _receber(self, processo, concluidos):
+        # Lê a mensagem do processo ou trata sua morte inesperada
+        try:
+            if processo.conexao.poll():
+                tipo, valor = processo.conexao.recv()
+                if tipo == "pronto":
+                    processo.estado = _LIVRE
+                    if self._reserva_pendente:
+                        self._reserva_pendente = False
+                        self._processos.append(self._criar_processo(silencioso=True))
+                else:
+                    concluidos.append((processo.identificador, tipo == "ok", valor))
+                    processo.estado = _LIVRE
+                    processo.identificador = None
+                return
+        except (EOFError, OSError):
+            pass
+        if processo.processo.is_alive():
+            return
+        codigo = processo.processo.exitcode
+        if processo.estado == _INICIANDO:
+            self.encerrar()
+            self.erro = f"processo de transcrição encerrado ao iniciar (código {codigo})"
+            raise RuntimeError(self.erro)
+        motivo = f"processo encerrado inesperadamente (código {codigo})"
+        if processo.estado == _OCUPADO:
+            concluidos.append((processo.identificador, False, motivo))
+        self._substituir(processo, motivo, codigo=codigo)
+
+    def _verificar_limites(self, concluidos):
+        # Encerra processos ocupados acima do limite de memória ou de tempo
+        for processo in list(self._processos):
+            if processo.estado != _OCUPADO:
+                continue
+            decorrido = time.time() - processo.inicio
+            memoria = obter_memoria_arvore_mb(processo.processo.pid)
+            if self.limite_memoria_mb is not None and memoria is not None and memoria > self.limite_memoria_mb:
+                motivo = f"limite de memória excedido ({memoria:.0f} MB de {self.limite_memoria_mb:.0f} MB)"
+            elif processo.limite_tempo is not None and decorrido > processo.limite_tempo:
+                motivo = f"tempo limite excedido ({decorrido:.0f}s de {processo.limite_tempo:.0f}s)"
+            else:
+                continue
+            print(f"🛑 {processo.rotulo or 'Tarefa'}: {motivo}; processo substituído")
+            concluidos.append((processo.identificador, False, motivo))
+            self._substituir(processo, motivo, memoria_mb=round(memoria, 1) if memoria is not None else None)
+
+    def executar(self, tarefa, argumentos, limite_tempo=None, rotulo=None):
+        """
+        Conveniência: aguarda um processo livre, executa uma tarefa e
+        retorna (sucesso, resultado) como em aguardar().
+        """
+        while self.livres() == 0:
+            self.aguardar(_INTERVALO_VERIFICACAO)
+        identificador = self.enviar(tarefa, argumentos, limite_tempo, rotulo)
+        while True:
+            for concluido, sucesso, resultado in self.aguardar():
+                if concluido == identificador:
+                    return sucesso, resultado
+
+    def encerrar(self):
+        """
+        Encerra todos os processos: os livres terminam normalmente e os
+        ocupados, ou ainda carregando o modelo, são interrompidos.
+        """
+        for processo in self._processos:
+            processo.encerrar(forcar=processo.estado != _LIVRE)
+        self._processos = []
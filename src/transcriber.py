@@ -3,11 +3,30 @@ import whisper
 import warnings
 import sys
 import gc
+import os
+import threading
+from dataclasses import asdict
 from pathlib import Path
+import numpy as np
+from whisper.audio import HOP_LENGTH, N_FRAMES
 from .loading_spinner import SpinnerCarregamento
 from .utils import plural, formatar_duracao
 from src import extract_audio
+from src import vad
+from src import arquivos_longos
+from src import cache_transcricoes
 from src import cleanup
+from src import quantizacao
+from src import metricas
+from src import checkpoints
+from src import formatos_saida
+from src import idiomas
+from src import fallback
+from src import calibracao
+from src import impressao_acustica
+from src import cascata
+from src import decodificacao_lote
+from src import cache_mel
 
 # Suprime avisos do módulo whisper para manter a saída limpa
 warnings.filterwarnings("ignore", category=UserWarning, module="whisper")
@@ -40,12 +59,27 @@ SUPPRESS_TOKENS = "-1"
 SUPPRESS_BLANK = True
 MAX_INITIAL_TIMESTAMP = 1.0
 
+# Alinhamento palavra a palavra; só é executado quando algum formato de
+# saída usa os tempos das palavras (ver src/formatos_saida.py)
 WORD_TIMESTAMPS = True
 VERBOSE = False
 FP16 = False
 
-# Variável que guarda o modelo carregado em memória
-_modelo_carregado = None
+# Converte o checkpoint em 'models/' para um arquivo mapeável em memória:
+# pesos carregados sob demanda e páginas compartilhadas entre processos
+MODELO_MMAP = True
+
+# Quantização dinâmica int8 das camadas lineares (modelo guardado em 'models/')
+QUANTIZACAO_INT8 = False
+
+# Modelos carregados em memória, por nome (o principal e, na cascata, o de rascunho)
+_modelos_carregados = {}
+
+# Quem pede um modelo durante o pré-carregamento em segundo plano espera por ele
+_trava_modelos = threading.Lock()
+
+# Marca a thread do pré-carregamento, cujos carregamentos não escrevem no terminal
+_contexto_thread = threading.local()
 
 
 def obter_pasta_projeto():
@@ -70,151 +104,819 @@ def configurar_diretorio_modelo():
 
 def limpar_modelo():
     """
-    Libera o modelo carregado da memória, se existir.
+    Libera os modelos carregados da memória, se existirem.
     Útil para liberar RAM/VRAM entre execuções.
     """
-    global _modelo_carregado
-
-    if _modelo_carregado is None:
+    if not _modelos_carregados:
         return True
 
-    del _modelo_carregado
-    _modelo_carregado = None
+    _modelos_carregados.clear()
     import gc
     gc.collect()
     return True
 
 
 def obter_modelo():
-    """Retorna o objeto do modelo já carregado (ou None)."""
-    global _modelo_carregado
-    return _modelo_carregado
+    """Retorna o objeto do modelo principal já carregado (ou None)."""
+    return _modelos_carregados.get(MODEL_SIZE)
 
 
-def carregar_modelo():
+def obter_caminho_modelo_mmap(pasta_models, nome_modelo=None):
+    """
+    Retorna o caminho do checkpoint convertido para carregamento mapeado.
     """
-    Carrega (ou retorna) o modelo do whisper configurado em MODEL_SIZE.
+    return Path(pasta_models) / f"{nome_modelo or MODEL_SIZE}.mmap.pt"
 
-    Se o modelo já estiver carregado, retorna imediatamente. Caso contrário,
-    tenta carregar da pasta 'models' e exibe um spinner enquanto carrega.
+
+def converter_modelo_mmap(modelo, caminho_mmap):
     """
-    global _modelo_carregado
-    
-    if _modelo_carregado is not None:
-        return _modelo_carregado
+    Grava os pesos de um modelo já carregado em um checkpoint no formato zip
+    do PyTorch, com tensores contíguos, que pode ser aberto com mmap=True.
 
+    A gravação usa um arquivo temporário e é renomeada no final, então
+    processos concorrentes nunca leem um arquivo pela metade.
+    """
+    import torch
+
+    estado = {nome: tensor.contiguous() for nome, tensor in modelo.state_dict().items()}
+    temporario = caminho_mmap.with_name(f"{caminho_mmap.name}.{os.getpid()}.tmp")
+    try:
+        torch.save({"dims": asdict(modelo.dims), "model_state_dict": estado}, temporario)
+        os.replace(temporario, caminho_mmap)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+
+def _carregar_modelo_mmap(caminho_mmap, nome_modelo):
+    # Monta o modelo sem alocar pesos ("meta") e associa os tensores mapeados do arquivo
+    import torch
+    from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+    checkpoint = torch.load(caminho_mmap, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+
+    # Equivalente a Whisper(dims), mas com encoder/decoder criados em "meta":
+    # evita alocar e inicializar pesos aleatórios que seriam descartados
+    modelo = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(modelo)
+    modelo.dims = dims
+    with torch.device("meta"):
+        modelo.encoder = AudioEncoder(
+            dims.n_mels, dims.n_audio_ctx, dims.n_audio_state, dims.n_audio_head, dims.n_audio_layer
+        )
+        modelo.decoder = TextDecoder(
+            dims.n_vocab, dims.n_text_ctx, dims.n_text_state, dims.n_text_head, dims.n_text_layer
+        )
+    modelo.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    # Buffers não persistentes não fazem parte do checkpoint: recria na CPU
+    mascara = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    modelo.decoder.register_buffer("mask", mascara, persistent=False)
+    cabecas_alinhamento = getattr(whisper, "_ALIGNMENT_HEADS", {}).get(nome_modelo)
+    if cabecas_alinhamento is not None:
+        modelo.set_alignment_heads(cabecas_alinhamento)
+    else:
+        todas = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+        todas[dims.n_text_layer // 2:] = True
+        modelo.register_buffer("alignment_heads", todas.to_sparse(), persistent=False)
+    return modelo.eval()
+
+
+def _em_silencio():
+    # Verdadeiro na thread do pré-carregamento (ver precarregar_modelos)
+    return getattr(_contexto_thread, "silencioso", False)
+
+
+def _informar(mensagem=""):
+    # print dos carregamentos: cala-se em segundo plano, enquanto a thread principal faz as perguntas
+    if not _em_silencio():
+        print(mensagem)
+
+
+def carregar_modelo_fp32(nome_modelo=None):
+    """
+    Carrega o modelo do whisper 'nome_modelo' (padrão: MODEL_SIZE) em precisão fp32,
+    da pasta 'models' (exibindo um spinner) ou baixando-o se necessário.
+
+    Com MODELO_MMAP, o checkpoint é convertido na primeira carga e as
+    seguintes mapeiam os pesos direto do disco; se a versão mapeada falhar,
+    volta ao carregamento normal (e ao download, se necessário).
+    """
+    nome_modelo = nome_modelo or MODEL_SIZE
     pasta_models = configurar_diretorio_modelo()
 
-    caminho_modelo_pt = Path(pasta_models) / f"{MODEL_SIZE}.pt"
+    caminho_modelo_pt = Path(pasta_models) / f"{nome_modelo}.pt"
+    caminho_modelo_mmap = obter_caminho_modelo_mmap(pasta_models, nome_modelo)
 
     try:
-        if caminho_modelo_pt.exists():
-            print("📦 Modelo encontrado")
-            spinner = SpinnerCarregamento("🤖 Carregando modelo...")
+        modelo = None
+        if MODELO_MMAP and caminho_modelo_mmap.exists():
+            _informar("📦 Modelo encontrado (mapeado em memória)")
+            spinner = SpinnerCarregamento("🤖 Carregando modelo...", silencioso=_em_silencio())
+            spinner.start()
+            try:
+                modelo = _carregar_modelo_mmap(caminho_modelo_mmap, nome_modelo)
+            except Exception:
+                # Arquivo convertido inválido ou incompatível: refaz a partir do .pt
+                caminho_modelo_mmap.unlink(missing_ok=True)
+            spinner.stop()
+            if modelo is not None:
+                _informar("✅ Modelo carregado\n")
+            else:
+                _informar("⚠️  Modelo mapeado inválido, usando o checkpoint original")
+
+        if modelo is None and caminho_modelo_pt.exists():
+            _informar("📦 Modelo encontrado")
+            spinner = SpinnerCarregamento("🤖 Carregando modelo...", silencioso=_em_silencio())
             spinner.start()
 
             modelo = whisper.load_model(
-                MODEL_SIZE,
+                nome_modelo,
                 device="cpu",
                 download_root=pasta_models
             )
 
             spinner.stop()
-            print("✅ Modelo carregado\n")
-        else:
+            _informar("✅ Modelo carregado\n")
+        elif modelo is None:
             # Se o arquivo do modelo não existir, o whisper fará o download
-            print("🔎 Modelo não encontrado. Baixando...")
+            _informar("🔎 Modelo não encontrado. Baixando...")
             modelo = whisper.load_model(
-                MODEL_SIZE,
+                nome_modelo,
                 device="cpu",
                 download_root=pasta_models
             )
-            print("✅ Download concluído")
-            print("✅ Modelo carregado\n")
+            _informar("✅ Download concluído")
+            _informar("✅ Modelo carregado\n")
+
+        if MODELO_MMAP and not caminho_modelo_mmap.exists():
+            spinner = SpinnerCarregamento("🗜️  Convertendo modelo para carregamento mapeado...", silencioso=_em_silencio())
+            spinner.start()
+            converter_modelo_mmap(modelo, caminho_modelo_mmap)
+            spinner.stop()
+            _informar("✅ Modelo convertido\n")
 
-        _modelo_carregado = modelo
         return modelo
-    except KeyboardInterrupt:
-        # Garante parada limpa do spinner em caso de interrupção do usuário
+    except BaseException:
+        # Garante parada limpa do spinner em caso de erro ou interrupção do usuário
         if 'spinner' in locals():
             spinner.stop()
         raise
-    except Exception:
+
+
+def _carregar_modelo_int8(nome_modelo):
+    # Usa o modelo int8 guardado em 'models/' ou quantiza o fp32 e o guarda
+    pasta_models = configurar_diretorio_modelo()
+    caminho_int8 = quantizacao.obter_caminho_modelo_quantizado(pasta_models, nome_modelo)
+    modelo = None
+    try:
+        if caminho_int8.exists():
+            _informar("📦 Modelo quantizado (int8) encontrado")
+            spinner = SpinnerCarregamento("🤖 Carregando modelo...", silencioso=_em_silencio())
+            spinner.start()
+            try:
+                modelo = quantizacao.carregar_modelo_quantizado(caminho_int8)
+            except Exception:
+                # Arquivo de outra versão do PyTorch/whisper: quantiza de novo
+                caminho_int8.unlink(missing_ok=True)
+            spinner.stop()
+            if modelo is not None:
+                _informar("✅ Modelo carregado\n")
+                return modelo
+
+        modelo = carregar_modelo_fp32(nome_modelo)
+        spinner = SpinnerCarregamento("🗜️  Quantizando modelo (int8)...", silencioso=_em_silencio())
+        spinner.start()
+        modelo = quantizacao.quantizar_modelo(modelo)
+        quantizacao.salvar_modelo_quantizado(modelo, caminho_int8)
+        spinner.stop()
+        _informar("✅ Modelo quantizado\n")
+        return modelo
+    except BaseException:
         if 'spinner' in locals():
             spinner.stop()
-        _modelo_carregado = None
         raise
 
 
-def transcrever_audio(audio_path, nome_base):
+def carregar_modelo(nome_modelo=None, aquecer=False):
+    """
+    Carrega (ou retorna) o modelo do whisper 'nome_modelo' (padrão: o
+    configurado em MODEL_SIZE).
+
+    Se o modelo já estiver carregado, retorna imediatamente; se estiver
+    sendo carregado pelo pré-carregamento em segundo plano, espera por ele.
+    Caso contrário, aplica a calibração de threads/afinidade desta máquina
+    (se houver) e carrega a versão fp32 ou, com QUANTIZACAO_INT8, a versão
+    quantizada.
+
+    Com 'aquecer', o modelo faz uma decodificação (aquecer_modelo) antes de
+    ficar disponível: o whisper instala ganchos no decoder a cada decode, e
+    duas decodificações simultâneas no mesmo modelo se corromperiam.
+    """
+    nome_modelo = nome_modelo or MODEL_SIZE
+    with _trava_modelos:
+        if nome_modelo in _modelos_carregados:
+            return _modelos_carregados[nome_modelo]
+
+        calibracao.aplicar_calibracao()
+
+        if nome_modelo != MODEL_SIZE:
+            _informar(f"🪜 Modelo de rascunho: {nome_modelo}")
+        with metricas.medir_etapa("model_load", modelo=nome_modelo, int8=QUANTIZACAO_INT8, mmap=MODELO_MMAP):
+            if QUANTIZACAO_INT8:
+                modelo = _carregar_modelo_int8(nome_modelo)
+            else:
+                modelo = carregar_modelo_fp32(nome_modelo)
+
+        if aquecer:
+            try:
+                aquecer_modelo(modelo)
+            except Exception:
+                # O aquecimento só adianta trabalho: uma falha não impede a transcrição
+                pass
+
+        _modelos_carregados[nome_modelo] = modelo
+        return modelo
+
+
+def obter_modelos_necessarios():
     """
-    Executa a transcrição de um arquivo de áudio usando o modelo carregado.
+    Retorna os nomes dos modelos usados na transcrição: MODEL_SIZE e, com a
+    cascata ativada, o modelo de rascunho.
+    """
+    if cascata.cascata_ativa(MODEL_SIZE):
+        return [cascata.CASCATA_MODELO_RASCUNHO, MODEL_SIZE]
+    return [MODEL_SIZE]
 
-    - audio_path: Path para o arquivo .wav
-    - nome_base: nome do vídeo/arquivo de origem (usado para salvar o .txt)
+
+def obter_modelo_transcricao():
+    """
+    Retorna o modelo usado nas chamadas a transcribe: o modelo principal ou,
+    com a cascata ativada, o par rascunho + principal (src/cascata.py).
     """
     modelo = carregar_modelo()
+    if not cascata.cascata_ativa(MODEL_SIZE):
+        return modelo
+    rascunho = carregar_modelo(cascata.CASCATA_MODELO_RASCUNHO)
+    return cascata.ModeloCascata(rascunho, modelo, cascata.CASCATA_MODELO_RASCUNHO, MODEL_SIZE)
 
-    print(f"📝 Transcrevendo: {audio_path.name}")
 
-    tempo_inicio = time.time()
+def modelos_disponiveis():
+    """
+    Indica se os modelos da transcrição já estão em 'models/', ou seja, se
+    carregá-los não vai exigir download.
+    """
+    pasta_models = Path(configurar_diretorio_modelo())
+    return all(
+        (pasta_models / f"{nome_modelo}.pt").exists()
+        or obter_caminho_modelo_mmap(pasta_models, nome_modelo).exists()
+        for nome_modelo in obter_modelos_necessarios()
+    )
+
+
+def baixar_modelos():
+    """
+    Baixa para 'models/' os modelos da transcrição que ainda não estão lá.
+
+    Chamada no processo principal antes de criar processos de transcrição:
+    cada um carregaria o modelo por conta própria, e vários downloads
+    simultâneos para o mesmo arquivo o corromperiam.
+    """
+    if modelos_disponiveis():
+        return
+    pasta_models = Path(configurar_diretorio_modelo())
+    for nome_modelo in obter_modelos_necessarios():
+        if not (pasta_models / f"{nome_modelo}.pt").exists():
+            carregar_modelo(nome_modelo)
+            limpar_modelo()
+
+
+def aquecer_modelo(modelo):
+    """
+    Decodifica um token sobre 30 s de silêncio: a primeira transcrição não
+    paga a inicialização dos operadores do PyTorch nem a leitura dos pesos
+    mapeados do disco (MODELO_MMAP).
+    """
+    import torch
+
+    mel = torch.zeros(1, modelo.dims.n_mels, N_FRAMES, device=modelo.device)
+    opcoes = whisper.DecodingOptions(language="en", without_timestamps=True, sample_len=1, fp16=False)
+    with torch.no_grad():
+        modelo.decode(mel, opcoes)
+
+
+def precarregar_modelos(cancelamento, aquecer=True):
+    """
+    Carrega, sem escrever no terminal, os modelos da transcrição e os
+    aquece (ver carregar_modelo). Feito para uma thread de fundo: para
+    entre os modelos quando 'cancelamento' (threading.Event) é acionado.
+
+    Uma falha é ignorada: a transcrição carrega o modelo de novo e mostra o erro.
+    """
+    _contexto_thread.silencioso = True
+    try:
+        for nome_modelo in obter_modelos_necessarios():
+            if cancelamento.is_set():
+                return
+            carregar_modelo(nome_modelo, aquecer)
+    except Exception:
+        pass
+
 
-    resultado = modelo.transcribe(
-        str(audio_path),
-        language=LANGUAGE,
-        temperature=TEMPERATURE,
-        no_speech_threshold=NO_SPEECH_THRESHOLD,
-        logprob_threshold=LOGPROB_THRESHOLD,
-        compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD,
-        condition_on_previous_text=CONDITION_ON_PREVIOUS_TEXT,
-        initial_prompt=INITIAL_PROMPT,
-        hallucination_silence_threshold=HALLUCINATION_SILENCE_THRESHOLD,
-        word_timestamps=WORD_TIMESTAMPS,
-        verbose=VERBOSE,
-        beam_size=BEAM_SIZE,
-        best_of=BEST_OF,
-        patience=PATIENCE,
-        length_penalty=LENGTH_PENALTY,
-        suppress_tokens=SUPPRESS_TOKENS,
-        suppress_blank=SUPPRESS_BLANK,
-        max_initial_timestamp=MAX_INITIAL_TIMESTAMP,
-        fp16=FP16
+def inicializar_processo_worker(num_threads, formatos=None, aquecer=False):
+    """
+    Prepara um processo auxiliar (modo --workers ou trechos de arquivos
+    longos): limita as threads do PyTorch e carrega o modelo uma única vez.
+
+    'formatos' repassa os formatos de saída escolhidos no processo principal;
+    com 'aquecer', o modelo já faz uma decodificação (ver carregar_modelo).
+    """
+    import torch
+    calibracao.marcar_processo_auxiliar()
+    if formatos is not None:
+        formatos_saida.FORMATOS_SAIDA = tuple(formatos)
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Só pode ser definido antes de qualquer trabalho paralelo no processo
+        pass
+    for nome_modelo in obter_modelos_necessarios():
+        carregar_modelo(nome_modelo, aquecer)
+
+
+def transcrever_trecho(audio, parametros):
+    """
+    Transcreve um trecho de áudio (array) em um processo auxiliar e
+    retorna o resultado bruto do whisper.
+    """
+    modelo = obter_modelo_transcricao()
+    return modelo.transcribe(audio, verbose=None, **parametros)
+
+
+def obter_parametros_decodificacao():
+    """
+    Reúne as opções de decodificação repassadas ao modelo.transcribe.
+
+    O alinhamento de palavras fica desligado quando só texto corrido é
+    gravado, exceto se HALLUCINATION_SILENCE_THRESHOLD (que depende dele)
+    estiver definido.
+    """
+    tempos_de_palavras = WORD_TIMESTAMPS and (
+        formatos_saida.requer_tempos_de_palavras() or HALLUCINATION_SILENCE_THRESHOLD is not None
     )
+    return {
+        "language": LANGUAGE,
+        "temperature": TEMPERATURE,
+        "no_speech_threshold": NO_SPEECH_THRESHOLD,
+        "logprob_threshold": LOGPROB_THRESHOLD,
+        "compression_ratio_threshold": COMPRESSION_RATIO_THRESHOLD,
+        "condition_on_previous_text": CONDITION_ON_PREVIOUS_TEXT,
+        "initial_prompt": INITIAL_PROMPT,
+        "hallucination_silence_threshold": HALLUCINATION_SILENCE_THRESHOLD,
+        "word_timestamps": tempos_de_palavras,
+        "beam_size": BEAM_SIZE,
+        "best_of": BEST_OF,
+        "patience": PATIENCE,
+        "length_penalty": LENGTH_PENALTY,
+        "suppress_tokens": SUPPRESS_TOKENS,
+        "suppress_blank": SUPPRESS_BLANK,
+        "max_initial_timestamp": MAX_INITIAL_TIMESTAMP,
+        "fp16": FP16,
+    }
+
+
+def obter_assinatura_configuracao():
+    """
+    Retorna a assinatura do modelo + parâmetros de decodificação atuais,
+    usada pelo cache para detectar transcrições geradas com outra configuração.
 
-    tempo_total = time.time() - tempo_inicio
-    tempo_formatado = formatar_duracao(tempo_total)
+    Os formatos de saída ficam de fora (os que faltarem são gerados do
+    resultado guardado, ver completar_saidas); só o .json, que precisa do
+    tempo de cada palavra, muda os parâmetros de decodificação.
+    """
+    configuracao = {"modelo": MODEL_SIZE, **obter_parametros_decodificacao()}
+    if QUANTIZACAO_INT8:
+        configuracao["int8"] = True
+    if fallback.FALLBACK_ADAPTATIVO:
+        configuracao["fallback_adaptativo"] = True
+    if vad.VAD_ATIVADO:
+        configuracao["vad"] = (vad.VAD_LIMIAR_DB, vad.VAD_ENERGIA_MINIMA_DB, vad.VAD_MARGEM)
+    if cascata.cascata_ativa(MODEL_SIZE):
+        configuracao["cascata"] = cascata.obter_configuracao()
+    if checkpoints.CHECKPOINT_ATIVADO:
+        configuracao["checkpoints"] = checkpoints.obter_configuracao()
+    if cache_mel.MEL_CACHE_ATIVADO and cache_mel.MEL_CACHE_FLOAT16:
+        configuracao["mel_float16"] = True
+    return cache_transcricoes.calcular_assinatura(configuracao)
+
+
+def detectar_trechos_de_fala(audio):
+    """
+    Executa a detecção de voz sobre o áudio (array float32 a 16 kHz),
+    exibe e acumula a fração de silêncio que deixará de ser decodificada.
 
-    texto_transcrito = resultado["text"].strip()
-    print(f"🕒 Tempo da transcrição: {tempo_formatado}")
+    Retorna a lista de trechos (inicio, fim) em segundos.
+    """
+    duracao_total = len(audio) / extract_audio.AUDIO_SAMPLE_RATE
+    trechos = vad.detectar_fala(audio, extract_audio.AUDIO_SAMPLE_RATE)
+    duracao_fala = sum(fim - inicio for inicio, fim in trechos)
+    duracao_ignorada = max(0.0, duracao_total - duracao_fala)
+    vad.registrar_estatisticas({"segundos_total": duracao_total, "segundos_ignorados": duracao_ignorada})
+    if duracao_total > 0:
+        print(f"🔇 Silêncio ignorado: {formatar_duracao(duracao_ignorada)} "
+              f"({duracao_ignorada / duracao_total:.0%} do áudio)")
+    return trechos
+
+
+def detectar_idioma(modelo, audio, inicio=0.0):
+    """
+    Detecta o idioma nos primeiros 30 segundos de fala a partir de 'inicio' (s).
 
-    # Salva o texto transcrito em 'transcripts/{nome_base}.txt'
-    pasta_transcripts = obter_pasta_projeto() / "transcripts"
-    pasta_transcripts.mkdir(parents=True, exist_ok=True)
-    nome_base_sem_ext = Path(nome_base).stem
-    arquivo_resultado = pasta_transcripts / f"{nome_base_sem_ext}.txt"
+    Retorna (idioma, probabilidade). Modelos só de inglês retornam ("en", 1.0).
+    """
+    if not modelo.is_multilingual:
+        return "en", 1.0
+    mel_completo = cache_mel.obter_mel(audio, modelo.dims.n_mels)
+    if mel_completo is not None:
+        # Espectrograma em cache: os 30 s são recortados dele, sem recalcular
+        quadro_inicial = round(inicio * extract_audio.AUDIO_SAMPLE_RATE / HOP_LENGTH)
+        trecho = mel_completo[:, quadro_inicial:quadro_inicial + N_FRAMES].float()
+        mel = whisper.pad_or_trim(trecho, N_FRAMES).to(modelo.device)
+    else:
+        amostra_inicial = int(inicio * extract_audio.AUDIO_SAMPLE_RATE)
+        trecho = whisper.pad_or_trim(audio[amostra_inicial:])
+        mel = whisper.log_mel_spectrogram(trecho, modelo.dims.n_mels).to(modelo.device)
+    _, probabilidades = modelo.detect_language(mel)
+    idioma = max(probabilidades, key=probabilidades.get)
+    return idioma, float(probabilidades[idioma])
+
+
+def _obter_hash_midia(nome_base):
+    # Hash do conteúdo de 'videos/{nome_base}' (None para arquivos fora da pasta)
+    try:
+        return cache_transcricoes.obter_hash_video(nome_base)
+    except FileNotFoundError:
+        return None
+
+
+def _identificar_midia(nome_base, assinatura, duracao_audio):
+    # Identifica conteúdo + configuração para validar um diário parcial na retomada
+    return {"assinatura": assinatura, "hash_midia": _obter_hash_midia(nome_base), "duracao": round(duracao_audio, 2)}
+
+
+def obter_audio_em_cache(nome_base):
+    """
+    Com MEL_CACHE_ATIVADO, verifica se a extração do áudio de um vídeo pode
+    ser dispensada: o espectrograma de cada modelo usado está no cache
+    (src/cache_mel.py) e nenhuma etapa precisa das amostras (detecção de
+    voz, impressão acústica ainda não calculada, arquivos longos em trechos
+    ou com checkpoints).
 
-    with open(arquivo_resultado, "w", encoding="utf-8") as f:
-        f.write(texto_transcrito)
+    Retorna um cache_mel.AudioEmCache para usar no lugar do áudio, ou None.
+    """
+    if not cache_mel.MEL_CACHE_ATIVADO or vad.VAD_ATIVADO:
+        return None
+    hash_midia = _obter_hash_midia(nome_base)
+    if hash_midia is None:
+        return None
+    bandas = {cache_mel.obter_n_mels(nome_modelo) for nome_modelo in obter_modelos_necessarios()}
+    amostras = cache_mel.obter_amostras_em_cache(hash_midia, bandas)
+    if amostras is None:
+        return None
+    duracao = amostras / extract_audio.AUDIO_SAMPLE_RATE
+    if arquivos_longos.deve_dividir(duracao) or checkpoints.deve_usar_checkpoints(duracao):
+        return None
+    if not impressao_acustica.dispensa_audio(hash_midia, duracao):
+        return None
+    return cache_mel.AudioEmCache(hash_midia, amostras)
+
+
+def _preparar_transcricao(audio, nome_base):
+    """
+    Etapas de um arquivo antes da decodificação: leitura do áudio, busca de
+    áudio repetido, detecção de voz, idioma e política de fallback.
+
+    Retorna o contexto da decodificação (dicionário) ou None se o arquivo
+    já foi resolvido sem o modelo (mesmo áudio de outro vídeo ou sem fala).
+    """
+    modelo = carregar_modelo()
 
-    print(f"💾 Transcrição salva: {arquivo_resultado.name}")
+    if isinstance(audio, Path):
+        print(f"📝 Transcrevendo: {audio.name}")
+        # O WAV é lido direto, sem nova decodificação pelo ffmpeg do whisper
+        entrada = extract_audio.carregar_audio_extraido(audio)
+    elif isinstance(audio, cache_mel.AudioEmCache):
+        # Sem amostras: o modelo recebe o espectrograma guardado
+        print(f"📝 Transcrevendo: {nome_base} (espectrograma em cache)")
+        entrada = audio
+    else:
+        # Array em memória é repassado direto, sem nova decodificação pelo whisper
+        print(f"📝 Transcrevendo: {nome_base} (em memória)")
+        entrada = audio
+    duracao_audio = len(entrada) / extract_audio.AUDIO_SAMPLE_RATE
+
+    parametros = obter_parametros_decodificacao()
+    assinatura = obter_assinatura_configuracao()
+
+    if impressao_acustica.IMPRESSAO_ATIVADA:
+        # Mesmo áudio com outro nome/contêiner: reaproveita a transcrição existente
+        with metricas.medir_etapa("fingerprint", nome_base, duracao_audio=duracao_audio) as dados:
+            equivalente = impressao_acustica.procurar_transcricao_equivalente(
+                nome_base, entrada, assinatura, extract_audio.AUDIO_SAMPLE_RATE
+            )
+            dados["duplicata"] = equivalente is not None
+            if equivalente is not None:
+                dados["original"] = equivalente[0]
+        if equivalente is not None:
+            origem, taxa_erro, arquivo = equivalente
+            print(f"🧬 Mesmo áudio de '{origem}' ({1 - taxa_erro:.0%} de semelhança), transcrição reaproveitada")
+            arquivos = [arquivo] + completar_saidas(nome_base)
+            print(f"💾 Transcrição salva: {', '.join(arquivo.name for arquivo in arquivos)}")
+            return None
+
+    if vad.VAD_ATIVADO:
+        trechos = detectar_trechos_de_fala(entrada)
+        if not trechos:
+            # Nenhuma fala: grava transcrição vazia sem gastar o modelo
+            print("🔇 Nenhuma fala detectada, transcrição ignorada")
+            arquivos = salvar_transcricao({"text": "", "segments": [], "language": None}, nome_base)
+            print(f"💾 Transcrição salva: {', '.join(arquivo.name for arquivo in arquivos)}")
+            return None
+        parametros["clip_timestamps"] = vad.converter_para_clip_timestamps(trechos)
+
+    if parametros["language"] is None:
+        # Detecta uma vez e fixa o idioma, inclusive para os trechos de arquivos longos;
+        # pastas com idioma já fixado pulam a detecção
+        idioma = idiomas.obter_idioma_fixado(nome_base)
+        if idioma is not None:
+            print(f"🌐 Idioma: {idioma} (fixado para a pasta)")
+            metricas.registrar_evento("language_detect", nome_base, idioma=idioma, fonte="fixado")
+        else:
+            inicio_fala = parametros["clip_timestamps"][0] if "clip_timestamps" in parametros else 0.0
+            with metricas.medir_etapa("language_detect", nome_base, assinatura=assinatura, fonte="modelo") as dados:
+                idioma, probabilidade = detectar_idioma(modelo, entrada, inicio_fala)
+                dados["idioma"] = idioma
+                dados["probabilidade"] = round(probabilidade, 4)
+            print(f"🌐 Idioma detectado: {idioma} ({probabilidade:.0%})")
+            idiomas.registrar_deteccao(nome_base, idioma, probabilidade)
+        parametros["language"] = idioma
+
+    # Modo adaptativo: escada de temperaturas e limiares ajustados pelo histórico
+    parametros = fallback.aplicar_politica(parametros)
+    return {
+        "nome_base": nome_base,
+        "entrada": entrada,
+        "duracao_audio": duracao_audio,
+        "parametros": parametros,
+        "assinatura": assinatura,
+        "hash_midia": _obter_hash_midia(nome_base),
+    }
+
+
+def pode_decodificar_em_lote(contexto):
+    """
+    Indica se um arquivo preparado pode entrar na decodificação em lote:
+    com LOTE_ATIVADO, sem tempos por palavra e curto o bastante para não
+    usar trechos em paralelo nem checkpoints.
+    """
+    parametros = contexto["parametros"]
+    return (
+        decodificacao_lote.LOTE_ATIVADO
+        and not parametros["word_timestamps"]
+        and parametros["hallucination_silence_threshold"] is None
+        and not arquivos_longos.deve_dividir(contexto["duracao_audio"])
+        and not checkpoints.deve_usar_checkpoints(contexto["duracao_audio"])
+    )
+
+
+def _decodificar(contexto):
+    # Decodifica um arquivo preparado pelo caminho adequado à sua duração; retorna (resultado, contadores_fallback)
+    nome_base = contexto["nome_base"]
+    entrada = contexto["entrada"]
+    duracao_audio = contexto["duracao_audio"]
+    parametros = contexto["parametros"]
+    assinatura = contexto["assinatura"]
+    transcritor = obter_modelo_transcricao()
+    usa_cascata = isinstance(transcritor, cascata.ModeloCascata)
+
+    configuracao = {chave: valor for chave, valor in parametros.items() if chave != "clip_timestamps"}
+    with cache_mel.associar([(entrada, contexto["hash_midia"])]), metricas.medir_etapa(
+        "transcribe",
+        nome_base,
+        duracao_audio=duracao_audio,
+        modelo=MODEL_SIZE,
+        assinatura=assinatura,
+        configuracao=configuracao,
+        cascata=cascata.CASCATA_MODELO_RASCUNHO if usa_cascata else None
+    ) as dados:
+        if arquivos_longos.deve_dividir(duracao_audio):
+            # Áudio longo: trechos independentes transcritos em vários processos
+            dados["modo"] = "trechos"
+            resultado = arquivos_longos.transcrever_em_trechos(
+                entrada,
+                parametros,
+                tarefa=transcrever_trecho,
+                inicializador=inicializar_processo_worker,
+                taxa_amostragem=extract_audio.AUDIO_SAMPLE_RATE
+            )
+            contadores_fallback = fallback.contar_pelos_segmentos(resultado, parametros)
+        elif pode_decodificar_em_lote(contexto):
+            # Janelas do próprio arquivo decodificadas juntas
+            dados["modo"] = "lote"
+            resultado = _decodificar_em_lote([contexto])[0]
+            contadores_fallback = fallback.contar_pelos_segmentos(resultado, parametros)
+        else:
+            orcamento = fallback.calcular_orcamento(duracao_audio)
+            # Na cascata, o rascunho decodifica todas as janelas: é ele que o fallback acompanha
+            modelo_monitorado = transcritor.rascunho if usa_cascata else transcritor
+            with fallback.monitorar_decodificacao(modelo_monitorado, parametros, orcamento) as contadores_fallback:
+                if checkpoints.deve_usar_checkpoints(duracao_audio):
+                    # Áudio longo em um único processo: janelas gravadas em diário para retomada
+                    dados["modo"] = "checkpoints"
+                    resultado = checkpoints.transcrever_com_checkpoints(
+                        transcritor,
+                        entrada,
+                        nome_base,
+                        parametros,
+                        identificacao=_identificar_midia(nome_base, assinatura, duracao_audio),
+                        verbose=VERBOSE,
+                        taxa_amostragem=extract_audio.AUDIO_SAMPLE_RATE
+                    )
+                else:
+                    resultado = transcritor.transcribe(
+                        entrada,
+                        verbose=VERBOSE,
+                        **parametros
+                    )
+        dados["segmentos"] = len(resultado["segments"])
+        dados["recodificacoes"] = contadores_fallback["recodificacoes"]
+        if usa_cascata:
+            dados["segundos_refeitos"] = round(cascata.contar_pelos_segmentos(resultado)["segundos_refeitos"], 2)
+    return resultado, contadores_fallback
+
+
+def _decodificar_em_lote(contextos):
+    # Decodifica juntos os arquivos preparados; na cascata, o lote é o rascunho e cada arquivo é revisado depois
+    transcritor = obter_modelo_transcricao()
+    usa_cascata = isinstance(transcritor, cascata.ModeloCascata)
+    modelo_lote = transcritor.rascunho if usa_cascata else transcritor
+    with cache_mel.associar([(contexto["entrada"], contexto["hash_midia"]) for contexto in contextos]):
+        resultados = decodificacao_lote.transcrever_em_lote(
+            modelo_lote,
+            [(contexto["entrada"], contexto["parametros"]) for contexto in contextos],
+            taxa_amostragem=extract_audio.AUDIO_SAMPLE_RATE
+        )
+        if usa_cascata:
+            resultados = [
+                transcritor.revisar(contexto["entrada"], resultado, contexto["parametros"])
+                for contexto, resultado in zip(contextos, resultados)
+            ]
+    return resultados
+
+
+def _finalizar_transcricao(contexto, resultado, contadores_fallback):
+    # Registra as estatísticas do arquivo e grava a transcrição em 'transcripts/'
+    nome_base = contexto["nome_base"]
+    metricas.registrar_evento("fallback", nome_base, duracao_audio=contexto["duracao_audio"], **contadores_fallback)
+    fallback.registrar_estatisticas(contadores_fallback)
+    fallback.atualizar_historico(contadores_fallback)
+    fallback.exibir_resumo_arquivo(contadores_fallback)
+    if cascata.cascata_ativa(MODEL_SIZE):
+        contadores_cascata = cascata.contar_pelos_segmentos(resultado)
+        metricas.registrar_evento("cascade", nome_base, rascunho=cascata.CASCATA_MODELO_RASCUNHO,
+                                  modelo=MODEL_SIZE, **contadores_cascata)
+        cascata.registrar_estatisticas(contadores_cascata)
+        cascata.exibir_resumo_arquivo(contadores_cascata, MODEL_SIZE)
+
+    with metricas.medir_etapa("write", nome_base, assinatura=contexto["assinatura"]) as dados:
+        arquivos = salvar_transcricao(resultado, nome_base)
+        dados["formatos"] = [arquivo.suffix.lstrip(".") for arquivo in arquivos]
+        dados["bytes_escritos"] = sum(arquivo.stat().st_size for arquivo in arquivos)
+    checkpoints.descartar_diario(nome_base)
+    print(f"💾 Transcrição salva: {', '.join(arquivo.name for arquivo in arquivos)}")
+
+
+def transcrever_audio(audio, nome_base):
+    """
+    Executa a transcrição de um áudio usando o modelo carregado.
+
+    - audio: Path para o arquivo .wav/.flac ou array NumPy float32 a 16 kHz
+    - nome_base: nome do vídeo/arquivo de origem (usado para salvar o .txt)
+
+    Cada etapa (detecção de idioma, transcrição e gravação) é registrada
+    nas métricas estruturadas. Com a cascata ativada, um modelo menor faz o
+    rascunho e o modelo principal refaz só os trechos duvidosos.
+    """
+    contexto = _preparar_transcricao(audio, nome_base)
+    if contexto is None:
+        return True
+
+    tempo_inicio = time.time()
+    resultado, contadores_fallback = _decodificar(contexto)
+    print(f"🕒 Tempo da transcrição: {formatar_duracao(time.time() - tempo_inicio)}")
+    _finalizar_transcricao(contexto, resultado, contadores_fallback)
     return True
 
 
-def transcrever_video(nome_base):
+def transcrever_audios_em_lote(itens):
     """
-    Fluxo de transcrição para um vídeo:
-      1) extrai áudio para 'temp_audios/'
-      2) transcreve o áudio
-      3) remove o arquivo de áudio temporário
+    Transcreve vários áudios de uma vez (src/decodificacao_lote.py): cada
+    um passa pelas etapas próprias (áudio repetido, voz, idioma) e os que
+    podem ser decodificados em lote dividem os mesmos lotes de janelas; os
+    demais são transcritos um a um.
+
+    - itens: lista de (audio, nome_base), como em transcrever_audio
+
+    Retorna {nome_base: (sucesso, erro)}; a falha de um arquivo na
+    preparação não afeta os demais, mas uma falha no lote afeta todo ele.
+    """
+    situacoes = {}
+    contextos = []
+    for audio, nome_base in itens:
+        try:
+            contexto = _preparar_transcricao(audio, nome_base)
+        except Exception as excecao:
+            situacoes[nome_base] = (False, f"{type(excecao).__name__}: {excecao}")
+            continue
+        if contexto is None:
+            situacoes[nome_base] = (True, None)
+        elif pode_decodificar_em_lote(contexto):
+            contextos.append(contexto)
+        else:
+            try:
+                resultado, contadores_fallback = _decodificar(contexto)
+                _finalizar_transcricao(contexto, resultado, contadores_fallback)
+                situacoes[nome_base] = (True, None)
+            except Exception as excecao:
+                situacoes[nome_base] = (False, f"{type(excecao).__name__}: {excecao}")
+
+    if contextos:
+        tempo_inicio = time.time()
+        with metricas.medir_etapa(
+            "transcribe_batch",
+            arquivos=[contexto["nome_base"] for contexto in contextos],
+            duracao_audio=sum(contexto["duracao_audio"] for contexto in contextos),
+            modelo=MODEL_SIZE,
+            tamanho_lote=decodificacao_lote.LOTE_TAMANHO
+        ):
+            resultados = _decodificar_em_lote(contextos)
+        print(f"🕒 Tempo da transcrição em lote ({len(contextos)} {plural(len(contextos), 'arquivo', 'arquivos')}): "
+              f"{formatar_duracao(time.time() - tempo_inicio)}")
+        for contexto, resultado in zip(contextos, resultados):
+            try:
+                contadores_fallback = fallback.contar_pelos_segmentos(resultado, contexto["parametros"])
+                _finalizar_transcricao(contexto, resultado, contadores_fallback)
+                situacoes[contexto["nome_base"]] = (True, None)
+            except Exception as excecao:
+                situacoes[contexto["nome_base"]] = (False, f"{type(excecao).__name__}: {excecao}")
+    return situacoes
+
+
+def salvar_transcricao(resultado, nome_base):
+    """
+    Salva o resultado do whisper em 'transcripts/{nome_base}.txt' e nos
+    demais formatos de FORMATOS_SAIDA (.srt, .vtt, .json), registrando o
+    .txt no cache de transcrições.
+
+    Retorna a lista de Paths gravados (o .txt primeiro).
+    """
+    pasta_transcripts = obter_pasta_projeto() / "transcripts"
+    arquivos = formatos_saida.gravar_saidas(resultado, pasta_transcripts, nome_base)
+
+    cache_transcricoes.registrar_transcricao(nome_base, arquivos[0], obter_assinatura_configuracao(), resultado)
+    return arquivos
+
+
+def completar_saidas(nome_base, origem=None):
+    """
+    Completa em 'transcripts/' a transcrição de um vídeo que não precisa
+    ser transcrito de novo: copia a de outro arquivo com o mesmo conteúdo
+    ('origem', vídeo renomeado) e grava, a partir do resultado guardado no
+    cache, os formatos de FORMATOS_SAIDA que ainda faltam.
+
+    Retorna a lista de Paths gravados.
+    """
+    assinatura = obter_assinatura_configuracao()
+    pasta_transcripts = obter_pasta_projeto() / "transcripts"
+    arquivos = []
+    if origem is not None:
+        arquivos.append(cache_transcricoes.copiar_transcricao(nome_base, origem, assinatura))
+    stem = Path(nome_base).stem
+    if any(not (pasta_transcripts / f"{stem}.{formato}").exists() for formato in formatos_saida.FORMATOS_SAIDA):
+        resultado = cache_transcricoes.obter_resultado(nome_base, assinatura)
+        if resultado is not None:
+            arquivos.extend(formatos_saida.gravar_formatos_ausentes(resultado, pasta_transcripts, nome_base))
+    return arquivos
+
+
+def concluir_transcricao(caminho_audio, nome_base):
+    """
+    Etapa final do fluxo de um vídeo cujo áudio já foi extraído:
+      1) transcreve o áudio (arquivo WAV ou array em memória)
+      2) remove o arquivo de áudio temporário, se houver
     """
-    print("\n🎵 [1/2] EXTRAINDO ÁUDIO")
-    sucesso_extracao, caminho_audio = extract_audio.extrair_audio_do_video(nome_base)
-    
-    if not sucesso_extracao:
-        return False
-    
-    print(f"✅ Áudio extraído com sucesso\n")
-    
     try:
         print("📝 [2/2] TRANSCREVENDO ÁUDIO")
         sucesso_transcricao = transcrever_audio(caminho_audio, nome_base)
@@ -229,7 +931,55 @@ def transcrever_video(nome_base):
     finally:
         # Garante remoção do arquivo temporário mesmo em caso de erro
         try:
-            if 'caminho_audio' in locals() and caminho_audio is not None:
+            if caminho_audio is not None:
                 _ = cleanup.limpar_audio(caminho_audio)
         except Exception:
             raise
+
+
+def concluir_transcricoes_em_lote(itens):
+    """
+    Etapa final de vários vídeos cujos áudios já foram extraídos:
+      1) transcreve os áudios juntos (transcrever_audios_em_lote)
+      2) remove os arquivos de áudio temporários
+
+    - itens: lista de (caminho_audio, nome_base)
+
+    Retorna {nome_base: (sucesso, erro)}.
+    """
+    try:
+        print(f"📝 [2/2] TRANSCREVENDO ÁUDIO ({len(itens)} {plural(len(itens), 'arquivo', 'arquivos')} em lote)")
+        situacoes = transcrever_audios_em_lote(itens)
+        for nome_base, (sucesso, _) in situacoes.items():
+            if sucesso:
+                print(f"✅ {nome_base}: transcrição concluída com sucesso")
+        print()
+        return situacoes
+    finally:
+        # Garante remoção dos arquivos temporários mesmo em caso de erro
+        for caminho_audio, _ in itens:
+            if caminho_audio is not None:
+                _ = cleanup.limpar_audio(caminho_audio)
+
+
+def transcrever_video(nome_base):
+    """
+    Fluxo de transcrição para um vídeo:
+      1) extrai áudio para o armazenamento temporário (ou para a memória)
+      2) transcreve o áudio
+      3) remove o arquivo de áudio temporário
+    """
+    print("\n🎵 [1/2] EXTRAINDO ÁUDIO")
+    audio_em_cache = obter_audio_em_cache(nome_base)
+    if audio_em_cache is not None:
+        print(f"♻️  Espectrograma em cache, extração dispensada\n")
+        return concluir_transcricao(audio_em_cache, nome_base)
+
+    sucesso_extracao, caminho_audio = extract_audio.obter_audio_do_video(nome_base)
+    
+    if not sucesso_extracao:
+        return False
+    
+    print(f"✅ Áudio extraído com sucesso\n")
+
+    return concluir_transcricao(caminho_audio, nome_base)
@@ -66,3 +66,55 @@ def formatar_duracao(segundos_total: float) -> str:
     if len(partes) == 2:
         return f"{partes[0]} e {partes[1]}"
     return f"{partes[0]}, {partes[1]} e {partes[2]}"
+
+
+def obter_memoria_atual_mb():
+    """
+    Retorna a memória residente (MB) do processo neste momento, pelo /proc
+    do Linux, ou None nos demais sistemas.
+    """
+    import os
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            paginas_residentes = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas_residentes * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def obter_pico_memoria_mb():
+    """
+    Retorna o pico de memória residente (MB) do processo atual,
+    ou None quando a informação não está disponível (ex.: Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # O Linux informa o valor em KB; o macOS, em bytes
+    if sys.platform == "darwin":
+        return pico / 1024 ** 2
+    return pico / 1024
+
+
+class Estatisticas(dict):
+    """
+    Totais acumulados no processo atual por um módulo do pipeline. As chaves
+    são fixadas na criação; no modo --workers, os totais de cada processo são
+    somados no principal (ver workers.somar_estatisticas_modulos).
+    """
+
+    def registrar(self, contadores):
+        """Acumula os contadores de um arquivo nos totais do processo."""
+        for chave in self:
+            self[chave] += contadores.get(chave, 0)
+
+    def obter(self):
+        """Retorna uma cópia dos totais acumulados neste processo."""
+        return dict(self)
+
+    def somar(self, outras):
+        """Soma totais vindos de outro processo (modo --workers)."""
+        self.registrar(outras)
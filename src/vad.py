@@ -0,0 +1,126 @@
+import numpy as np
+from src.utils import Estatisticas, formatar_duracao
+
+
+# -------------------------------
+# Configurações da detecção de voz (VAD por energia)
+# -------------------------------
+VAD_ATIVADO = False  # Pula trechos de silêncio antes de chamar o modelo
+
+VAD_JANELA_MS = 30  # Duração de cada quadro analisado (ms)
+
+VAD_LIMIAR_DB = 12.0  # Quanto um quadro precisa estar acima do piso de ruído para contar como fala
+
+VAD_ENERGIA_MINIMA_DB = -50.0  # Quadros abaixo deste nível absoluto são sempre silêncio
+
+VAD_PAUSA_MAXIMA = 1.0  # Pausas menores que isto (s) não quebram um trecho de fala
+
+VAD_FALA_MINIMA = 0.25  # Trechos de fala menores que isto (s) são descartados
+
+VAD_MARGEM = 0.3  # Margem (s) adicionada antes e depois de cada trecho de fala
+
+# Totais acumulados no processo atual (segundos)
+_estatisticas = Estatisticas({"segundos_total": 0.0, "segundos_ignorados": 0.0})
+
+
+def calcular_energia_db(audio, taxa_amostragem=16000, janela_ms=None):
+    """
+    Calcula a energia média (dB) de quadros consecutivos do áudio.
+
+    Retorna (energia_db, amostras_por_quadro).
+    """
+    if janela_ms is None:
+        janela_ms = VAD_JANELA_MS
+    amostras_por_quadro = max(1, int(taxa_amostragem * janela_ms / 1000))
+    num_quadros = len(audio) // amostras_por_quadro
+    if num_quadros == 0:
+        return np.empty(0, dtype=np.float32), amostras_por_quadro
+    quadros = np.asarray(audio[:num_quadros * amostras_por_quadro], dtype=np.float32)
+    quadros = quadros.reshape(num_quadros, amostras_por_quadro)
+    energia = np.mean(quadros * quadros, axis=1)
+    return 10.0 * np.log10(energia + 1e-10), amostras_por_quadro
+
+
+def _limites_de_trechos(ativo):
+    # Converte um vetor booleano em pares (início, fim) de quadros ativos
+    bordas = np.diff(np.concatenate(([0], ativo.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1)
+    fins = np.flatnonzero(bordas == -1)
+    return inicios, fins
+
+
+def detectar_fala(audio, taxa_amostragem=16000):
+    """
+    Encontra os trechos com fala em um áudio mono float32.
+
+    O limiar acompanha o piso de ruído do próprio arquivo (percentil 10 da
+    energia); quando o áudio não tem contraste suficiente entre ruído e fala,
+    vale apenas o nível mínimo absoluto. Pausas curtas são unidas e cada
+    trecho recebe uma margem.
+
+    Retorna uma lista de tuplas (inicio, fim) em segundos.
+    """
+    energia_db, amostras_por_quadro = calcular_energia_db(audio, taxa_amostragem)
+    if energia_db.size == 0:
+        return []
+
+    piso = np.percentile(energia_db, 10)
+    topo = np.percentile(energia_db, 95)
+    if topo - piso >= VAD_LIMIAR_DB:
+        limiar = max(piso + VAD_LIMIAR_DB, VAD_ENERGIA_MINIMA_DB)
+    else:
+        limiar = VAD_ENERGIA_MINIMA_DB
+    inicios, fins = _limites_de_trechos(energia_db > limiar)
+    if inicios.size == 0:
+        return []
+
+    duracao_quadro = amostras_por_quadro / taxa_amostragem
+    inicios = inicios * duracao_quadro
+    fins = fins * duracao_quadro
+
+    # Une trechos separados por pausas curtas
+    pausas = inicios[1:] - fins[:-1]
+    manter = np.concatenate(([True], pausas >= VAD_PAUSA_MAXIMA))
+    inicios = inicios[manter]
+    fins = fins[np.concatenate((manter[1:], [True]))]
+
+    # Remove ruídos curtos e aplica a margem
+    longos = (fins - inicios) >= VAD_FALA_MINIMA
+    inicios = np.maximum(inicios[longos] - VAD_MARGEM, 0.0)
+    duracao_total = len(audio) / taxa_amostragem
+    fins = np.minimum(fins[longos] + VAD_MARGEM, duracao_total)
+
+    trechos = []
+    for inicio, fim in zip(inicios.tolist(), fins.tolist()):
+        # A margem pode fazer trechos vizinhos se sobreporem
+        if trechos and inicio <= trechos[-1][1]:
+            trechos[-1] = (trechos[-1][0], fim)
+        else:
+            trechos.append((inicio, fim))
+    return trechos
+
+
+def converter_para_clip_timestamps(trechos):
+    """
+    Converte trechos [(inicio, fim), ...] para a lista plana aceita pelo
+    parâmetro 'clip_timestamps' do whisper, que mantém os tempos da
+    transcrição na linha do tempo original do áudio.
+    """
+    return [round(valor, 2) for trecho in trechos for valor in trecho]
+
+
+registrar_estatisticas = _estatisticas.registrar
+obter_estatisticas = _estatisticas.obter
+somar_estatisticas = _estatisticas.somar
+
+
+def exibir_relatorio_vad():
+    """
+    Mostra quanto do áudio processado foi pulado por não conter fala.
+    """
+    total = _estatisticas["segundos_total"]
+    if not VAD_ATIVADO or total <= 0:
+        return
+    ignorado = _estatisticas["segundos_ignorados"]
+    print(f"\n🔇 Silêncio ignorado: {formatar_duracao(ignorado)} de "
+          f"{formatar_duracao(total)} ({ignorado / total:.0%} do áudio)")
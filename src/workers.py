@@ -0,0 +1,243 @@
+import os
+import time
+from pathlib import Path
+from src import cache_mel
+from src import calibracao
+from src import cascata
+from src import decodificacao_lote
+from src import fallback
+from src import fila_tarefas
+from src import formatos_saida
+from src import indice_midias
+from src import supervisor
+from src import transcriber
+from src import vad
+from src.utils import formatar_duracao
+
+# Módulos cujas estatísticas, acumuladas nos processos de transcrição, vão para o relatório final
+_MODULOS_ESTATISTICAS = {
+    "vad": vad,
+    "fallback": fallback,
+    "cascata": cascata,
+    "lote": decodificacao_lote,
+    "mel": cache_mel,
+}
+
+
+def obter_pasta_projeto():
+    """
+    Retorna a pasta raiz do projeto (um nível acima de 'src').
+    """
+    return Path(__file__).parent.parent.absolute()
+
+
+def dividir_threads(num_workers):
+    """
+    Divide os núcleos da máquina entre os workers.
+
+    Usa as threads da calibração desta máquina quando ela foi medida com o
+    mesmo número de workers. Retorna quantas threads do PyTorch cada
+    processo deve usar (mínimo 1).
+    """
+    calibrada = calibracao.obter_calibracao()
+    if calibrada is not None and calibrada["workers"] == num_workers:
+        return calibrada["threads"]
+    nucleos = os.cpu_count() or 1
+    return max(1, nucleos // max(1, num_workers))
+
+
+def ordenar_por_duracao(nomes_videos):
+    """
+    Ordena os vídeos do mais longo para o mais curto usando a duração
+    do índice de mídias (escalonamento "maior primeiro").
+
+    Vídeos cuja duração não pôde ser lida vão para o início da fila, já que
+    podem ser longos. Retorna uma lista de tuplas (nome_video, duracao).
+    """
+    infos = indice_midias.indexar_videos(nomes_videos)
+    pares = [(nome, infos[nome]["duracao"] if infos[nome] else None) for nome in nomes_videos]
+    pares.sort(key=lambda par: float("inf") if par[1] is None else par[1], reverse=True)
+    return pares
+
+
+def _obter_estatisticas_modulos():
+    # Totais deste processo nos módulos que acumulam estatísticas para o relatório final
+    return {nome: modulo.obter_estatisticas() for nome, modulo in _MODULOS_ESTATISTICAS.items()}
+
+
+def _calcular_diferenca(antes):
+    # Quanto cada módulo acumulou desde 'antes' (a parte de uma tarefa)
+    depois = _obter_estatisticas_modulos()
+    return {
+        nome: {chave: depois[nome][chave] - antes[nome][chave] for chave in depois[nome]}
+        for nome in depois
+    }
+
+
+def somar_estatisticas_modulos(diferencas):
+    """
+    Soma no processo principal as estatísticas de VAD, fallback, cascata,
+    decodificação em lote e cache de espectrogramas acumuladas por uma
+    tarefa em outro processo.
+    """
+    for nome, diferenca in diferencas.items():
+        _MODULOS_ESTATISTICAS[nome].somar_estatisticas(diferenca)
+
+
+def processar_no_worker(nome_video, caminho_audio=None):
+    """
+    Executa, dentro de um processo supervisionado, o fluxo completo de um
+    vídeo ou, com 'caminho_audio' (áudio já extraído pelo pipeline), só a
+    transcrição.
+
+    Retorna (nome_video, sucesso, erro, tempo, estatisticas) para ser
+    agregado no processo principal (ver somar_estatisticas_modulos).
+    """
+    tempo_inicio = time.time()
+    antes = _obter_estatisticas_modulos()
+    try:
+        if caminho_audio is None:
+            sucesso = transcriber.transcrever_video(nome_video)
+        else:
+            sucesso = transcriber.concluir_transcricao(caminho_audio, nome_video)
+        erro = None if sucesso else "falha na extração ou transcrição"
+    except Exception as excecao:
+        sucesso = False
+        erro = f"{type(excecao).__name__}: {excecao}"
+    return nome_video, sucesso, erro, time.time() - tempo_inicio, _calcular_diferenca(antes)
+
+
+def processar_lote_no_worker(itens):
+    """
+    Transcreve juntos, dentro de um processo supervisionado, vários áudios
+    já extraídos pelo pipeline (decodificação em lote).
+
+    - itens: lista de (nome_video, caminho_audio)
+
+    Retorna ({nome_video: (sucesso, erro)}, estatisticas).
+    """
+    antes = _obter_estatisticas_modulos()
+    try:
+        situacoes = transcriber.concluir_transcricoes_em_lote(
+            [(caminho_audio, nome_video) for nome_video, caminho_audio in itens]
+        )
+    except Exception as excecao:
+        erro = f"{type(excecao).__name__}: {excecao}"
+        situacoes = {nome_video: (False, erro) for nome_video, _ in itens}
+    return situacoes, _calcular_diferenca(antes)
+
+
+def processar_em_paralelo(num_workers, grupo=None):
+    """
+    Transcreve os vídeos da fila persistente (src/fila_tarefas.py) em
+    'num_workers' processos, cada um com seu próprio modelo e uma fatia das
+    threads da máquina.
+
+    Os vídeos são entregues na ordem da fila; enfileirados do mais longo para
+    o mais curto (ordenar_por_duracao), o lote termina o mais cedo possível.
+    Cada processo é supervisionado (src/supervisor.py): se passar do limite
+    de memória ou do tempo limite do vídeo, é encerrado e substituído.
+    Uma falha não interrompe os demais: o vídeo volta à fila para nova
+    tentativa, e com Ctrl+C os vídeos em andamento voltam a ficar pendentes.
+
+    'grupo' é um GrupoSupervisionado já criado pelo pré-carregamento
+    (src/precarregamento.py); se tiver mais processos que vídeos, é
+    substituído por um do tamanho certo.
+
+    Retorna (sucessos, estatisticas) onde 'estatisticas' inclui a lista de
+    falhas definitivas como tuplas (nome_video, motivo).
+    """
+    pendentes = fila_tarefas.listar_pendentes()
+    num_workers = max(1, min(num_workers, len(pendentes)))
+    if grupo is not None and grupo.num_processos != num_workers:
+        grupo.encerrar()
+        grupo = None
+    # A afinidade calibrada é herdada pelos processos criados a seguir
+    calibracao.aplicar_calibracao()
+    threads_por_worker = dividir_threads(num_workers)
+    estatisticas = {
+        "num_workers": num_workers,
+        "threads_por_worker": threads_por_worker,
+        "tempo_videos": 0.0,
+        "tempo_total": 0.0,
+        "falhas": [],
+    }
+    sucessos = 0
+    tempo_inicio = time.time()
+
+    # Baixa os modelos uma única vez antes de abrir os processos (o pré-carregamento
+    # só cria o grupo quando os modelos já estão em disco)
+    if grupo is None:
+        transcriber.baixar_modelos()
+
+    infos = indice_midias.indexar_videos(pendentes)
+    print(f"\n⚙️  {num_workers} workers × {threads_por_worker} threads")
+    for nome_video in pendentes:
+        duracao = infos[nome_video]["duracao"] if infos[nome_video] else None
+        rotulo = formatar_duracao(duracao) if duracao is not None else "duração desconhecida"
+        print(f"   🎬 {nome_video} ({rotulo})")
+
+    if grupo is None:
+        grupo = supervisor.GrupoSupervisionado(
+            num_workers,
+            transcriber.inicializar_processo_worker,
+            (threads_por_worker, formatos_saida.FORMATOS_SAIDA)
+        )
+    em_andamento = {}
+    try:
+        while True:
+            # Mantém um vídeo por worker, reservando na fila só quando há processo livre
+            while grupo.livres() > 0:
+                nome_video = fila_tarefas.reservar_proxima()
+                if nome_video is None:
+                    break
+                duracao = infos[nome_video]["duracao"] if infos.get(nome_video) else None
+                identificador = grupo.enviar(
+                    processar_no_worker,
+                    (nome_video,),
+                    supervisor.calcular_tempo_limite(duracao, transcriber.MODEL_SIZE),
+                    nome_video
+                )
+                em_andamento[identificador] = (nome_video, time.time())
+            if not em_andamento and not fila_tarefas.ha_trabalho():
+                break
+
+            for identificador, sucesso, resultado in grupo.aguardar(timeout=1.0):
+                nome_video, inicio = em_andamento.pop(identificador)
+                if sucesso:
+                    nome_video, sucesso, erro, tempo, estatisticas_video = resultado
+                    somar_estatisticas_modulos(estatisticas_video)
+                else:
+                    # Processo encerrado pelo supervisor (memória/tempo) ou morto
+                    erro, tempo = resultado, time.time() - inicio
+                estatisticas["tempo_videos"] += tempo
+                if sucesso:
+                    sucessos += 1
+                    fila_tarefas.concluir(nome_video, tempo)
+                    continue
+                espera = fila_tarefas.registrar_falha(nome_video, erro, tempo)
+                if espera is None:
+                    print(f"❌ {nome_video}: {erro} (sem novas tentativas)")
+                    estatisticas["falhas"].append((nome_video, erro))
+                else:
+                    print(f"🔁 {nome_video}: {erro}; nova tentativa em {formatar_duracao(espera)}")
+    finally:
+        grupo.encerrar()
+        # Vídeos reservados e não concluídos (Ctrl+C) ficam para a próxima execução
+        fila_tarefas.liberar_reservas()
+        estatisticas["tempo_total"] = time.time() - tempo_inicio
+
+    return sucessos, estatisticas
+
+
+def exibir_relatorio_workers(estatisticas):
+    """
+    Mostra a configuração usada e o ganho do processamento em paralelo.
+    """
+    tempo_total = estatisticas["tempo_total"]
+    tempo_videos = estatisticas["tempo_videos"]
+    aceleracao = tempo_videos / tempo_total if tempo_total > 0 else 0.0
+
+    print(f"\n⚙️  Workers: {estatisticas['num_workers']} × {estatisticas['threads_por_worker']} threads")
+    print(f"   🎬 Soma dos tempos por vídeo: {formatar_duracao(tempo_videos)}")
+    print(f"   ⏩ Aceleração sobre o processamento serial: {aceleracao:.1f}x")
@@ -0,0 +1,8 @@
+import pytest
+from src import metricas
+
+
+@pytest.fixture(autouse=True)
+def _sem_metricas(monkeypatch):
+    # Os testes não escrevem no log de métricas do projeto (usado nas estimativas de tempo)
+    monkeypatch.setattr(metricas, "METRICAS_ATIVADAS", False)
@@ -0,0 +1,85 @@
+import pytest
+from src import cache_transcricoes
+from src import formatos_saida
+
+ASSINATURA = "abc123"
+RESULTADO = {
+    "language": "pt",
+    "text": " Olá mundo.",
+    "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " Olá mundo.", "tokens": [1, 2, 3], "avg_logprob": -0.2}],
+}
+
+
+@pytest.fixture(autouse=True)
+def _projeto_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_transcricoes, "obter_pasta_projeto", lambda: tmp_path)
+    (tmp_path / "videos").mkdir()
+    (tmp_path / "transcripts").mkdir()
+    return tmp_path
+
+
+def _criar_video(projeto, nome, conteudo=b"conteudo do video"):
+    (projeto / "videos" / nome).write_bytes(conteudo)
+
+
+def _transcrever(projeto, nome, formatos=("txt",)):
+    # Simula transcriber.salvar_transcricao
+    arquivos = formatos_saida.gravar_saidas(RESULTADO, projeto / "transcripts", nome, formatos)
+    cache_transcricoes.registrar_transcricao(nome, arquivos[0], ASSINATURA, RESULTADO)
+
+
+def test_video_novo_e_transcrito(_projeto_temporario):
+    _criar_video(_projeto_temporario, "a.mp4")
+    assert cache_transcricoes.consultar_status("a.mp4", ASSINATURA) == (cache_transcricoes.STATUS_NOVO, None)
+    _transcrever(_projeto_temporario, "a.mp4")
+    assert cache_transcricoes.consultar_status("a.mp4", ASSINATURA) == (cache_transcricoes.STATUS_TRANSCRITO, None)
+    # Outra configuração de decodificação
+    status, _ = cache_transcricoes.consultar_status("a.mp4", "outra")
+    assert status == cache_transcricoes.STATUS_DESATUALIZADO
+
+
+def test_conteudo_substituido_fica_desatualizado(_projeto_temporario):
+    _criar_video(_projeto_temporario, "a.mp4")
+    _transcrever(_projeto_temporario, "a.mp4")
+    _criar_video(_projeto_temporario, "a.mp4", b"outro conteudo, maior que o anterior")
+    status, _ = cache_transcricoes.consultar_status("a.mp4", ASSINATURA)
+    assert status == cache_transcricoes.STATUS_DESATUALIZADO
+
+
+def test_consulta_de_video_renomeado_nao_copia_nada(_projeto_temporario):
+    _criar_video(_projeto_temporario, "a.mp4")
+    _transcrever(_projeto_temporario, "a.mp4", ("txt", "srt"))
+    (_projeto_temporario / "videos" / "a.mp4").rename(_projeto_temporario / "videos" / "b.mp4")
+
+    status, origem = cache_transcricoes.consultar_status("b.mp4", ASSINATURA)
+    assert status == cache_transcricoes.STATUS_REAPROVEITADO
+    assert origem == _projeto_temporario / "transcripts" / "a.txt"
+    assert not (_projeto_temporario / "transcripts" / "b.txt").exists()
+
+    arquivo = cache_transcricoes.copiar_transcricao("b.mp4", origem, ASSINATURA)
+    assert arquivo.read_text(encoding="utf-8") == "Olá mundo."
+    assert (_projeto_temporario / "transcripts" / "b.srt").exists()
+    assert cache_transcricoes.consultar_status("b.mp4", ASSINATURA) == (cache_transcricoes.STATUS_TRANSCRITO, None)
+
+
+def test_formato_ausente_usa_o_resultado_guardado(_projeto_temporario):
+    _criar_video(_projeto_temporario, "a.mp4")
+    _transcrever(_projeto_temporario, "a.mp4")
+    status, _ = cache_transcricoes.consultar_status("a.mp4", ASSINATURA, ("txt", "srt"))
+    assert status == cache_transcricoes.STATUS_TRANSCRITO
+
+    resultado = cache_transcricoes.obter_resultado("a.mp4", ASSINATURA)
+    assert resultado["segments"] == [{"id": 0, "start": 0.0, "end": 1.5, "text": " Olá mundo."}]
+    arquivos = formatos_saida.gravar_formatos_ausentes(resultado, _projeto_temporario / "transcripts", "a.mp4",
+                                                       ("txt", "srt", "vtt"))
+    assert [arquivo.name for arquivo in arquivos] == ["a.srt", "a.vtt"]
+    assert "00:00:01,500" in (_projeto_temporario / "transcripts" / "a.srt").read_text(encoding="utf-8")
+
+
+def test_formato_ausente_sem_resultado_guardado_fica_desatualizado(_projeto_temporario):
+    _criar_video(_projeto_temporario, "a.mp4")
+    # Transcrição anterior ao manifesto: só o .txt, reconhecido pelo nome
+    (_projeto_temporario / "transcripts" / "a.txt").write_text("texto", encoding="utf-8")
+    assert cache_transcricoes.consultar_status("a.mp4", ASSINATURA) == (cache_transcricoes.STATUS_TRANSCRITO, None)
+    status, _ = cache_transcricoes.consultar_status("a.mp4", ASSINATURA, ("txt", "srt"))
+    assert status == cache_transcricoes.STATUS_DESATUALIZADO
@@ -0,0 +1,52 @@
+import pytest
+from src import cascata
+
+
+def _segmento(inicio, fim, texto="", logprob=-0.1):
+    return {"start": inicio, "end": fim, "text": texto, "avg_logprob": logprob}
+
+
+@pytest.fixture(autouse=True)
+def _limites(monkeypatch):
+    monkeypatch.setattr(cascata, "CASCATA_LOGPROB_MINIMO", -0.5)
+    monkeypatch.setattr(cascata, "CASCATA_UNIAO", 1.0)
+    monkeypatch.setattr(cascata, "CASCATA_MARGEM", 0.2)
+
+
+def test_sem_duvidosos_nao_seleciona_trechos():
+    assert cascata.selecionar_trechos([_segmento(0.0, 2.0), _segmento(2.0, 4.0)]) == []
+
+
+def test_duvidosos_proximos_sao_unidos_com_margem_limitada_pelos_vizinhos():
+    segmentos = [
+        _segmento(0.0, 2.0),
+        _segmento(2.1, 3.0, logprob=-1.0),
+        _segmento(3.5, 4.0, logprob=-1.0),
+        _segmento(4.1, 6.0),
+    ]
+    # A margem de 0,2 s não invade os segmentos mantidos (fim em 2,0 e início em 4,1)
+    assert cascata.selecionar_trechos(segmentos) == [(2.0, 4.1)]
+
+
+def test_duvidosos_distantes_geram_trechos_separados():
+    segmentos = [
+        _segmento(0.0, 1.0, logprob=-1.0),
+        _segmento(1.0, 5.0),
+        _segmento(5.0, 6.0, logprob=-1.0),
+    ]
+    assert cascata.selecionar_trechos(segmentos) == [(0.0, 1.0), (5.0, 6.2)]
+
+
+def test_costurar_troca_apenas_os_segmentos_dos_trechos():
+    rascunho = {
+        "language": "pt",
+        "segments": [_segmento(0.0, 2.0, " um"), _segmento(2.0, 4.0, " dois?"), _segmento(4.0, 6.0, " três")],
+    }
+    # A revisão via clip_timestamps pode devolver segmentos fora do trecho; eles são ignorados
+    revisao = {"segments": [_segmento(1.0, 1.5, " extra"), _segmento(2.0, 3.0, " do"), _segmento(3.0, 4.0, " is")]}
+
+    resultado = cascata.costurar(rascunho, revisao, [(2.0, 4.0)])
+
+    assert resultado["text"] == " um do is três"
+    assert [segmento["id"] for segmento in resultado["segments"]] == [0, 1, 2, 3]
+    assert resultado["language"] == "pt"
@@ -0,0 +1,87 @@
+import json
+import numpy as np
+import pytest
+from src import checkpoints
+
+TAXA = 16000
+
+
+class _ModeloFalso:
+    # Devolve um segmento por chamada cobrindo o recorte inteiro; pode falhar na chamada 'falhar_em'
+    def __init__(self, falhar_em=None):
+        self.chamadas = []
+        self.falhar_em = falhar_em
+
+    def transcribe(self, audio, verbose=False, **parametros):
+        self.chamadas.append((len(audio) / TAXA, parametros))
+        if len(self.chamadas) == self.falhar_em:
+            raise KeyboardInterrupt()
+        return {"segments": [{"start": 0.0, "end": len(audio) / TAXA, "text": f" janela{len(self.chamadas)}"}]}
+
+
+@pytest.fixture(autouse=True)
+def _pasta_temporaria(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "obter_pasta_projeto", lambda: tmp_path)
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_JANELA", 2.0)
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_BUSCA_SILENCIO", 0.5)
+
+
+def _transcrever(modelo, audio, identificacao="id-1"):
+    parametros = {"language": "pt", "condition_on_previous_text": True, "initial_prompt": None}
+    return checkpoints.transcrever_com_checkpoints(
+        modelo, audio, "video.mp4", parametros, identificacao, taxa_amostragem=TAXA
+    )
+
+
+def test_ler_diario_descarta_linha_truncada():
+    caminho = checkpoints.obter_caminho_diario("video.mp4")
+    caminho.parent.mkdir(parents=True)
+    completo = (
+        json.dumps({"tipo": "cabecalho", "identificacao": "id-1"}) + "\n"
+        + json.dumps({"tipo": "janela", "inicio": 0.0, "fim": 2.0, "segmentos": []}) + "\n"
+    )
+    # Queda no meio da gravação: uma linha JSON válida sem a quebra de linha também é descartada
+    for resto in ['{"tipo": "jan', json.dumps({"tipo": "janela", "inicio": 2.0, "fim": 4.0, "segmentos": []})]:
+        caminho.write_text(completo + resto, encoding="utf-8")
+        cabecalho, janelas = checkpoints._ler_diario(caminho)
+        assert cabecalho == "id-1"
+        assert [janela["fim"] for janela in janelas] == [2.0]
+        assert caminho.read_text(encoding="utf-8") == completo
+
+
+def test_retoma_da_ultima_janela_gravada():
+    audio = np.zeros(7 * TAXA, dtype=np.float32)
+    interrompido = _ModeloFalso(falhar_em=2)
+    with pytest.raises(KeyboardInterrupt):
+        _transcrever(interrompido, audio)
+    assert checkpoints.possui_diario("video.mp4")
+
+    modelo = _ModeloFalso()
+    resultado = _transcrever(modelo, audio)
+    # Só as janelas que faltavam são decodificadas, cada uma a partir do próprio recorte
+    assert len(modelo.chamadas) == 2
+    assert all(duracao < 7.0 for duracao, _ in modelo.chamadas)
+    assert modelo.chamadas[0][1]["initial_prompt"] == "janela1"
+
+    segmentos = resultado["segments"]
+    assert [segmento["text"] for segmento in segmentos] == [" janela1", " janela1", " janela2"]
+    assert segmentos[0]["start"] == 0.0
+    assert segmentos[-1]["end"] == pytest.approx(7.0)
+    # Tempos levados de volta à linha do tempo original, sem lacunas entre janelas
+    for anterior, seguinte in zip(segmentos, segmentos[1:]):
+        assert seguinte["start"] == pytest.approx(anterior["end"])
+    assert [segmento["id"] for segmento in segmentos] == [0, 1, 2]
+
+    checkpoints.descartar_diario("video.mp4")
+    assert not checkpoints.possui_diario("video.mp4")
+
+
+def test_diario_de_outra_configuracao_recomeca():
+    audio = np.zeros(7 * TAXA, dtype=np.float32)
+    with pytest.raises(KeyboardInterrupt):
+        _transcrever(_ModeloFalso(falhar_em=2), audio, identificacao="id-1")
+
+    modelo = _ModeloFalso()
+    resultado = _transcrever(modelo, audio, identificacao="id-2")
+    assert len(modelo.chamadas) == len(resultado["segments"]) == 3
+    assert modelo.chamadas[0][1]["initial_prompt"] is None
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+from src import decodificacao_lote  # noqa: E402
+
+TAXA = 16000
+INICIO_TEMPO = 1000  # Primeiro token de tempo do tokenizador falso
+
+
+class _TokenizadorFalso:
+    timestamp_begin = INICIO_TEMPO
+    eot = INICIO_TEMPO - 1
+
+    def decode(self, tokens):
+        return "".join(f" t{token}" for token in tokens if token < INICIO_TEMPO)
+
+
+def _resultado(tokens):
+    return SimpleNamespace(tokens=tokens, temperature=0.0, avg_logprob=-0.2,
+                           compression_ratio=1.2, no_speech_prob=0.01)
+
+
+def _tempo(segundos):
+    return INICIO_TEMPO + round(segundos / 0.02)
+
+
+def _ruido(segundos, silencios=()):
+    gerador = np.random.default_rng(0)
+    audio = (gerador.standard_normal(int(segundos * TAXA)) * 0.1).astype(np.float32)
+    for inicio, fim in silencios:
+        audio[int(inicio * TAXA):int(fim * TAXA)] = 0.0
+    return audio
+
+
+def test_extrair_segmentos_pelos_pares_de_tempo():
+    tokens = [_tempo(0.0), 1, 2, _tempo(1.0), _tempo(1.0), 3, _tempo(2.5)]
+    segmentos = decodificacao_lote.extrair_segmentos(_resultado(tokens), 10.0, 40.0, _TokenizadorFalso())
+
+    assert [(s["start"], s["end"], s["text"]) for s in segmentos] == [
+        (10.0, 11.0, " t1 t2"),
+        (11.0, 12.5, " t3"),
+    ]
+    assert all(s["seek"] == 1000 for s in segmentos)
+
+
+def test_extrair_segmentos_mantem_o_ultimo_incompleto_ate_o_fim_da_janela():
+    tokens = [_tempo(0.0), 1, _tempo(1.0), _tempo(1.0), 2, 3]
+    segmentos = decodificacao_lote.extrair_segmentos(_resultado(tokens), 0.0, 28.0, _TokenizadorFalso())
+
+    assert [(s["start"], s["end"], s["text"]) for s in segmentos] == [
+        (0.0, 1.0, " t1"),
+        (1.0, 28.0, " t2 t3"),
+    ]
+
+
+def test_extrair_segmentos_limita_os_tempos_a_janela():
+    tokens = [_tempo(0.0), 1, _tempo(29.0)]
+    segmentos = decodificacao_lote.extrair_segmentos(_resultado(tokens), 0.0, 22.0, _TokenizadorFalso())
+
+    assert [(s["start"], s["end"]) for s in segmentos] == [(0.0, 22.0)]
+
+
+def test_planejar_janelas_corta_no_silencio():
+    audio = _ruido(70.0, silencios=[(24.0, 25.0), (50.0, 51.0)])
+    janelas = decodificacao_lote.planejar_janelas(audio, taxa_amostragem=TAXA)
+
+    assert len(janelas) == 3
+    assert janelas[0][0] == 0.0 and janelas[-1][1] == 70.0
+    assert 24.0 <= janelas[0][1] <= 25.0
+    assert 50.0 <= janelas[1][1] <= 51.0
+    assert all(fim - inicio <= 30.0 for inicio, fim in janelas)
+    assert all(janelas[i][1] == janelas[i + 1][0] for i in range(len(janelas) - 1))
+
+
+def test_planejar_janelas_respeita_clip_timestamps():
+    audio = _ruido(60.0)
+    # Número ímpar de tempos: o último trecho vai até o fim do áudio
+    janelas = decodificacao_lote.planejar_janelas(audio, [2.0, 10.0, 45.0], taxa_amostragem=TAXA)
+
+    assert janelas == [(2.0, 10.0), (45.0, 60.0)]
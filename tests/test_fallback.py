@@ -0,0 +1,61 @@
+import pytest
+from src import fallback
+
+PARAMETROS = {
+    "temperature": (0.0, 0.2, 0.4),
+    "logprob_threshold": -1.0,
+    "compression_ratio_threshold": 2.4,
+}
+
+
+@pytest.fixture(autouse=True)
+def _historico_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(fallback, "obter_pasta_projeto", lambda: tmp_path)
+    monkeypatch.setattr(fallback, "FALLBACK_ADAPTATIVO", True)
+    monkeypatch.setattr(fallback, "FALLBACK_MIN_OBSERVACOES", 10)
+    monkeypatch.setattr(fallback, "FALLBACK_TAXA_MINIMA_RESGATE", 0.1)
+
+
+def _registrar(por_temperatura=None, resgates=None, motivos=None, resgates_por_motivo=None):
+    contadores = fallback.novos_contadores()
+    contadores["por_temperatura"] = por_temperatura or {}
+    contadores["resgates"] = resgates or {}
+    contadores["motivos"] = motivos or {}
+    contadores["resgates_por_motivo"] = resgates_por_motivo or {}
+    fallback.atualizar_historico(contadores)
+
+
+def test_sem_modo_adaptativo_parametros_inalterados(monkeypatch):
+    monkeypatch.setattr(fallback, "FALLBACK_ADAPTATIVO", False)
+    _registrar(por_temperatura={"0.20": 50}, motivos={"logprob": 50})
+    assert fallback.aplicar_politica(PARAMETROS) is PARAMETROS
+
+
+def test_pouco_historico_nao_ajusta():
+    _registrar(por_temperatura={"0.20": 5}, motivos={"logprob": 5})
+    assert fallback.aplicar_politica(PARAMETROS) == PARAMETROS
+
+
+def test_temperatura_que_nao_resgata_sai_da_escada():
+    _registrar(por_temperatura={"0.20": 30, "0.40": 30}, resgates={"0.20": 1, "0.40": 12})
+    ajustados = fallback.aplicar_politica(PARAMETROS)
+
+    assert ajustados["temperature"] == (0.0, 0.4)
+    # A cópia é ajustada; os parâmetros originais não mudam
+    assert PARAMETROS["temperature"] == (0.0, 0.2, 0.4)
+
+
+def test_limiar_que_nao_resgata_e_relaxado_ate_o_limite(monkeypatch):
+    monkeypatch.setattr(fallback, "FALLBACK_LIMITE_LOGPROB", -1.1)
+    _registrar(motivos={"logprob": 40, "compressao": 40}, resgates_por_motivo={"logprob": 1, "compressao": 20})
+    ajustados = fallback.aplicar_politica(PARAMETROS)
+
+    assert ajustados["logprob_threshold"] == pytest.approx(-1.1)
+    assert ajustados["compression_ratio_threshold"] == 2.4
+
+
+def test_historico_soma_execucoes():
+    _registrar(por_temperatura={"0.20": 6}, resgates={"0.20": 0})
+    assert fallback.aplicar_politica(PARAMETROS)["temperature"] == (0.0, 0.2, 0.4)
+    _registrar(por_temperatura={"0.20": 6}, resgates={"0.20": 0})
+    assert fallback.aplicar_politica(PARAMETROS)["temperature"] == (0.0, 0.4)
@@ -0,0 +1,134 @@
+import os
+import platform
+import sqlite3
+import pytest
+from src import fila_tarefas
+
+
+@pytest.fixture(autouse=True)
+def _banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(fila_tarefas, "obter_caminho_banco", lambda: tmp_path / "fila.db")
+    return tmp_path / "fila.db"
+
+
+def _marcar_executando(banco, nome_video, dono):
+    # Simula uma reserva feita por outro processo
+    conexao = sqlite3.connect(banco)
+    with conexao:
+        conexao.execute(
+            "UPDATE tarefas SET estado = ?, dono = ?, tentativas = tentativas + 1 WHERE nome_video = ?",
+            (fila_tarefas.ESTADO_EXECUTANDO, dono, nome_video)
+        )
+    conexao.close()
+
+
+def _antecipar_tentativas(banco):
+    # Simula o fim da espera entre tentativas
+    conexao = sqlite3.connect(banco)
+    with conexao:
+        conexao.execute("UPDATE tarefas SET proxima_tentativa = 0")
+    conexao.close()
+
+
+def test_ordem_por_prioridade_e_chegada():
+    fila_tarefas.enfileirar(["b.mp4", "a.mp4"])
+    fila_tarefas.enfileirar(["novo.mp4"], fila_tarefas.FILA_PRIORIDADE_NOVOS)
+    assert fila_tarefas.listar_pendentes() == ["novo.mp4", "b.mp4", "a.mp4"]
+    assert fila_tarefas.reservar_proxima() == "novo.mp4"
+    assert fila_tarefas.obter_tentativas("novo.mp4") == 1
+
+
+def test_espera_dobra_ate_desistir(_banco_temporario, monkeypatch):
+    monkeypatch.setattr(fila_tarefas, "FILA_MAX_TENTATIVAS", 3)
+    monkeypatch.setattr(fila_tarefas, "FILA_ESPERA_BASE", 10.0)
+    fila_tarefas.enfileirar(["v.mp4"])
+
+    esperas = []
+    for _ in range(3):
+        assert fila_tarefas.reservar_proxima() == "v.mp4"
+        esperas.append(fila_tarefas.registrar_falha("v.mp4", "erro", 1.0))
+        if esperas[-1] is not None:
+            # Aguardando nova tentativa: ainda há trabalho, mas nada a reservar agora
+            assert fila_tarefas.reservar_proxima() is None
+            assert fila_tarefas.ha_trabalho()
+            _antecipar_tentativas(_banco_temporario)
+    assert esperas == [10.0, 20.0, None]
+    assert not fila_tarefas.ha_trabalho()
+
+
+def test_espera_respeita_o_maximo(_banco_temporario, monkeypatch):
+    monkeypatch.setattr(fila_tarefas, "FILA_MAX_TENTATIVAS", 10)
+    monkeypatch.setattr(fila_tarefas, "FILA_ESPERA_MAXIMA", 45.0)
+    fila_tarefas.enfileirar(["v.mp4"])
+    conexao = sqlite3.connect(_banco_temporario)
+    with conexao:
+        conexao.execute("UPDATE tarefas SET tentativas = 6")
+    conexao.close()
+    assert fila_tarefas.registrar_falha("v.mp4", "erro", 1.0) == 45.0
+
+
+def test_liberar_reservas_nao_conta_a_tentativa():
+    fila_tarefas.enfileirar(["v.mp4"])
+    fila_tarefas.reservar_proxima()
+    fila_tarefas.liberar_reservas()
+    assert fila_tarefas.listar_pendentes() == ["v.mp4"]
+    assert fila_tarefas.obter_tentativas("v.mp4") == 0
+
+
+def test_reenfileirar_concluido_zera_tentativas():
+    fila_tarefas.enfileirar(["v.mp4"])
+    fila_tarefas.reservar_proxima()
+    fila_tarefas.concluir("v.mp4", 2.0)
+    assert not fila_tarefas.ha_trabalho()
+    fila_tarefas.enfileirar(["v.mp4"])
+    assert fila_tarefas.listar_pendentes() == ["v.mp4"]
+    assert fila_tarefas.obter_tentativas("v.mp4") == 0
+
+
+def test_recupera_reserva_de_processo_encerrado(_banco_temporario):
+    fila_tarefas.enfileirar(["v.mp4"])
+    _marcar_executando(_banco_temporario, "v.mp4", f"{platform.node()}:{2 ** 22 + 1}:123")
+    assert fila_tarefas.recuperar_interrompidas() == 1
+    assert fila_tarefas.reservar_proxima() == "v.mp4"
+
+
+def test_recupera_reserva_com_o_mesmo_pid_apos_reinicio(_banco_temporario):
+    # Contêiner reiniciado: mesma máquina e mesmo PID, outra execução
+    fila_tarefas.enfileirar(["v.mp4"])
+    _marcar_executando(_banco_temporario, "v.mp4", f"{platform.node()}:{os.getpid()}:1")
+    assert fila_tarefas.recuperar_interrompidas() == 1
+    assert fila_tarefas.reservar_proxima() == "v.mp4"
+    fila_tarefas.concluir("v.mp4", 1.0)
+
+    # Formato antigo do dono, sem o instante de início
+    fila_tarefas.enfileirar(["w.mp4"])
+    _marcar_executando(_banco_temporario, "w.mp4", f"{platform.node()}:{os.getpid()}")
+    assert fila_tarefas.recuperar_interrompidas() == 1
+
+
+def test_recupera_reserva_de_pid_reutilizado(_banco_temporario):
+    pid_pai = os.getppid()
+    if not fila_tarefas._obter_inicio_processo(pid_pai):
+        pytest.skip("sem /proc para ler o instante de início")
+    fila_tarefas.enfileirar(["v.mp4"])
+    _marcar_executando(_banco_temporario, "v.mp4", f"{platform.node()}:{pid_pai}:1")
+    assert fila_tarefas.recuperar_interrompidas() == 1
+
+
+def test_mantem_reserva_de_processo_ativo(_banco_temporario):
+    pid_pai = os.getppid()
+    fila_tarefas.enfileirar(["v.mp4", "w.mp4"])
+    dono_ativo = f"{platform.node()}:{pid_pai}:{fila_tarefas._obter_inicio_processo(pid_pai)}"
+    _marcar_executando(_banco_temporario, "v.mp4", dono_ativo)
+    _marcar_executando(_banco_temporario, "w.mp4", "outra-maquina:1:1")
+    assert fila_tarefas.recuperar_interrompidas() == 0
+    assert fila_tarefas.listar_pendentes() == []
+
+
+def test_interrompida_demais_vira_falha(_banco_temporario, monkeypatch):
+    monkeypatch.setattr(fila_tarefas, "FILA_MAX_TENTATIVAS", 1)
+    fila_tarefas.enfileirar(["v.mp4"])
+    _marcar_executando(_banco_temporario, "v.mp4", f"{platform.node()}:{2 ** 22 + 1}:1")
+    assert fila_tarefas.recuperar_interrompidas() == 1
+    assert fila_tarefas.listar_pendentes() == []
+    assert not fila_tarefas.ha_trabalho()
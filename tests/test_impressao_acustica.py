@@ -0,0 +1,37 @@
+import numpy as np
+from src import impressao_acustica
+
+
+def _impressao(quadros, semente=0):
+    return np.random.default_rng(semente).integers(0, 2 ** 32, quadros, dtype=np.uint32).astype("<u4")
+
+
+def test_impressoes_iguais_nao_tem_erro():
+    impressao = _impressao(200)
+    assert impressao_acustica.calcular_taxa_erro(impressao, impressao.copy(), 0) == 0.0
+
+
+def test_atraso_dentro_do_limite_e_compensado():
+    impressao = _impressao(200)
+    atrasada = impressao[7:]
+    assert impressao_acustica.calcular_taxa_erro(impressao, atrasada, 10) == 0.0
+    assert impressao_acustica.calcular_taxa_erro(atrasada, impressao, 10) == 0.0
+
+
+def test_atraso_fora_do_limite_parece_outro_audio():
+    impressao = _impressao(200)
+    taxa = impressao_acustica.calcular_taxa_erro(impressao, impressao[20:], 10)
+    # Bits sem relação diferem em cerca de metade das posições
+    assert 0.4 < taxa < 0.6
+
+
+def test_impressoes_opostas_tem_erro_total():
+    impressao = _impressao(100)
+    assert impressao_acustica.calcular_taxa_erro(impressao, ~impressao, 0) == 1.0
+
+
+def test_sobreposicao_pequena_e_ignorada():
+    # Só um atraso de 90 quadros alinharia as impressões, deixando 10 quadros em comum (menos da metade)
+    impressao = _impressao(100)
+    taxa = impressao_acustica.calcular_taxa_erro(impressao, np.concatenate([_impressao(90, 1), impressao[:10]]), 95)
+    assert taxa > 0.4
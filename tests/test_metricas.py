@@ -0,0 +1,53 @@
+import json
+import time
+import numpy as np
+import pytest
+from src import metricas
+from src.utils import obter_memoria_atual_mb
+
+
+@pytest.fixture
+def _arquivo_metricas(tmp_path, monkeypatch):
+    caminho = tmp_path / "metricas.jsonl"
+    monkeypatch.setattr(metricas, "METRICAS_ATIVADAS", True)
+    monkeypatch.setattr(metricas, "METRICAS_ARQUIVO", str(caminho))
+    return caminho
+
+
+def _eventos(caminho):
+    return [json.loads(linha) for linha in caminho.read_text(encoding="utf-8").splitlines()]
+
+
+def test_evento_com_fator_de_tempo_real(_arquivo_metricas):
+    with metricas.medir_etapa("transcribe", "v.mp4", modelo="tiny") as dados:
+        dados["duracao_audio"] = 10.0
+    evento, = _eventos(_arquivo_metricas)
+    assert evento["etapa"] == "transcribe"
+    assert evento["video"] == "v.mp4"
+    assert evento["modelo"] == "tiny"
+    assert evento["sucesso"] is True
+    assert evento["fator_tempo_real"] == pytest.approx(evento["tempo_parede"] / 10.0, abs=1e-3)
+
+
+def test_erro_registra_falha(_arquivo_metricas):
+    with pytest.raises(ValueError):
+        with metricas.medir_etapa("extract", "v.mp4"):
+            raise ValueError()
+    evento, = _eventos(_arquivo_metricas)
+    assert evento["sucesso"] is False
+
+
+def test_pico_de_memoria_da_etapa_inclui_memoria_liberada(_arquivo_metricas):
+    if obter_memoria_atual_mb() is None:
+        pytest.skip("sem /proc para ler a memória residente")
+    with metricas.medir_etapa("transcribe", "v.mp4"):
+        bloco = np.ones(200 * 1024 ** 2 // 8)
+        time.sleep(5 * metricas.METRICAS_INTERVALO_MEMORIA)
+        del bloco
+    with metricas.medir_etapa("write", "v.mp4"):
+        pass
+    transcricao, escrita = _eventos(_arquivo_metricas)
+    assert transcricao["pico_memoria_mb"] - transcricao["memoria_inicio_mb"] > 150
+    assert transcricao["memoria_fim_mb"] - transcricao["memoria_inicio_mb"] < 50
+    # A etapa seguinte não herda o pico da anterior
+    assert escrita["pico_memoria_mb"] < transcricao["pico_memoria_mb"] - 150
@@ -0,0 +1,60 @@
+import os
+import time
+import pytest
+from src import supervisor
+
+
+@pytest.fixture(autouse=True)
+def _sem_reserva(monkeypatch):
+    monkeypatch.setattr(supervisor, "SUPERVISOR_RESERVA_AQUECIDA", False)
+
+
+def test_processo_morto_ao_iniciar_encerra_o_grupo():
+    # os._exit como inicializador: o filho morre antes de ficar pronto
+    grupo = supervisor.GrupoSupervisionado(1, os._exit, (3,))
+    try:
+        with pytest.raises(RuntimeError, match="ao iniciar"):
+            grupo.executar(divmod, (7, 2))
+        assert grupo.erro is not None
+
+        inicio = time.monotonic()
+        with pytest.raises(RuntimeError, match="ao iniciar"):
+            grupo.executar(divmod, (7, 2))
+        assert time.monotonic() - inicio < 1.0
+        with pytest.raises(RuntimeError):
+            grupo.livres()
+    finally:
+        grupo.encerrar()
+
+
+def test_processo_morto_durante_tarefa_e_substituido():
+    grupo = supervisor.GrupoSupervisionado(1)
+    try:
+        sucesso, motivo = grupo.executar(os._exit, (5,), rotulo="video.mp4")
+        assert not sucesso
+        assert "código 5" in motivo
+        # O substituto assume as tarefas seguintes
+        assert grupo.executar(divmod, (7, 2)) == (True, (3, 1))
+    finally:
+        grupo.encerrar()
+
+
+def test_erro_da_tarefa_nao_derruba_o_processo():
+    grupo = supervisor.GrupoSupervisionado(1)
+    try:
+        sucesso, motivo = grupo.executar(divmod, (1, 0))
+        assert not sucesso
+        assert motivo.startswith("ZeroDivisionError")
+        assert grupo.executar(divmod, (9, 4)) == (True, (2, 1))
+    finally:
+        grupo.encerrar()
+
+
+def test_tempo_limite_encerra_a_tarefa():
+    grupo = supervisor.GrupoSupervisionado(1)
+    try:
+        sucesso, motivo = grupo.executar(time.sleep, (30,), limite_tempo=0.5, rotulo="longo.mp4")
+        assert not sucesso
+        assert "tempo limite" in motivo
+    finally:
+        grupo.encerrar()